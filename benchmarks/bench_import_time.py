@@ -0,0 +1,81 @@
+"""Benchmark: import time of whisper_gui and of `whisper_gui.py --help`.
+
+Runs `python -X importtime -c "import whisper_gui"` in fresh interpreters and
+reports the cumulative import time and the slowest imports. It exits with 1
+if a heavy or GUI-only module (torch, whisper, tkinter, pyannote.audio,
+googletrans, winreg) is imported at module level or the import takes longer
+than --max-ms, so it can guard against regressions in CI.
+
+Run from the repository root:
+    python benchmarks/bench_import_time.py --runs 5 --max-ms 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# must only be imported by the code paths that use them
+DEFERRED_MODULES = ('torch', 'whisper', 'tkinter', 'pyannote.audio', 'googletrans', 'winreg')
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return imports
+
+
+def time_import():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import whisper_gui'],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def time_help():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'whisper_gui.py', '--help'], cwd=REPO_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark whisper_gui import time')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time (the median is reported)')
+    parser.add_argument('--max-ms', type=float, default=500.0,
+                        help='Fail if importing whisper_gui takes longer than this (median)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    runs = [time_import() for _ in range(args.runs)]
+    import_ms = statistics.median(run['whisper_gui'][1] for run in runs) / 1000
+    help_s = statistics.median(time_help() for _ in range(args.runs))
+
+    print(f"import whisper_gui: {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"whisper_gui --help: {help_s * 1000:8.1f} ms")
+    print("Slowest imports (cumulative):")
+    last = runs[-1]
+    for name, (_, cumulative) in sorted(last.items(), key=lambda item: -item[1][1])[1:args.top + 1]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in DEFERRED_MODULES if name in last]
+    if eager:
+        print(f"FAIL: imported at module level: {', '.join(eager)}")
+        failed = True
+    if import_ms > args.max_ms:
+        print(f"FAIL: import took {import_ms:.1f} ms, budget {args.max_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Benchmark: sequential model.transcribe vs long-file mode (parallel chunks).
+
+Needs Whisper, ffmpeg and a long recording. Both runs use the same decoded
+audio and language; the chunked transcript is compared with the sequential
+one word by word, so a speedup that costs accuracy at the cuts shows up.
+
+Run from the repository root:
+    python benchmarks/bench_long_file_chunking.py --input meeting.mp4 --model small --chunk-minutes 10 --workers 4
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+import whisper
+
+from whisper_gui import (DEFAULT_CHUNK_MINUTES, SAMPLE_RATE, default_chunk_workers, detect_audio_language,
+                         find_chunk_boundaries, load_audio, transcribe_chunked)
+
+
+def words(result):
+    return [w.strip(".,!?;:").lower() for w in result['text'].split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark long-file chunked transcription')
+    parser.add_argument('--input', required=True, help='Audio/video file (longer is better)')
+    parser.add_argument('--model', default='small')
+    parser.add_argument('--chunk-minutes', type=float, default=DEFAULT_CHUNK_MINUTES)
+    parser.add_argument('--workers', type=int, default=default_chunk_workers())
+    parser.add_argument('--max-minutes', type=float, help='Only use the first N minutes of the input')
+    parser.add_argument('--skip-sequential', action='store_true', help='Only time the chunked run')
+    args = parser.parse_args()
+
+    audio = load_audio(args.input)
+    if args.max_minutes:
+        audio = audio[:int(args.max_minutes * 60 * SAMPLE_RATE)]
+    duration = len(audio) / SAMPLE_RATE
+    model = whisper.load_model(args.model)
+    language = detect_audio_language(model, audio)
+    chunks = find_chunk_boundaries(audio, args.chunk_minutes * 60)
+    print(f"Audio: {duration / 60:.1f} min, language {language}, {len(chunks)} chunks, "
+          f"{args.workers} workers, {torch.get_num_threads()} torch threads available")
+
+    sequential = None
+    if not args.skip_sequential:
+        start = time.perf_counter()
+        sequential = model.transcribe(audio, language=language, verbose=None)
+        sequential_time = time.perf_counter() - start
+        print(f"Sequential: {sequential_time:8.1f} s ({duration / sequential_time:.1f}x realtime, "
+              f"{len(sequential['segments'])} segments)")
+
+    # includes starting the workers and loading a model in each, as a real run would
+    start = time.perf_counter()
+    chunked = transcribe_chunked(model, args.model, audio, args.chunk_minutes, args.workers, language=language)
+    chunked_time = time.perf_counter() - start
+    print(f"Chunked:    {chunked_time:8.1f} s ({duration / chunked_time:.1f}x realtime, "
+          f"{len(chunked['segments'])} segments)")
+
+    if sequential is not None:
+        similarity = difflib.SequenceMatcher(None, words(sequential), words(chunked), autojunk=False).ratio()
+        print(f"Speedup:    {sequential_time / chunked_time:.2f}x")
+        print(f"Word match: {similarity:.1%} of the sequential transcript")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
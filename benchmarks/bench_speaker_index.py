@@ -0,0 +1,113 @@
+"""Micro-benchmark: SpeakerIndex lookups vs the old linear itertracks scan.
+
+Run from the repository root:
+    python benchmarks/bench_speaker_index.py --turns 3000 --lookups 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper_gui import SpeakerIndex
+
+
+class FakeTurn:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class FakeAnnotation:
+    """Minimal stand-in for pyannote's Annotation (only itertracks is used)"""
+
+    def __init__(self, turns):
+        self.turns = sorted(turns, key=lambda t: (t[0], t[1]))
+
+    def itertracks(self, yield_label=False):
+        for start, end, label in self.turns:
+            yield FakeTurn(start, end), None, label
+
+
+def linear_speaker_at(annotation, timestamp):
+    """The lookup SpeakerIndex replaces: two full scans per call"""
+    for turn, _, speaker in annotation.itertracks(yield_label=True):
+        if turn.start <= timestamp <= turn.end:
+            return speaker
+
+    closest_speaker = None
+    min_distance = float('inf')
+    for turn, _, speaker in annotation.itertracks(yield_label=True):
+        if timestamp < turn.start:
+            distance = turn.start - timestamp
+        elif timestamp > turn.end:
+            distance = timestamp - turn.end
+        else:
+            return speaker
+        if distance < min_distance:
+            min_distance = distance
+            closest_speaker = speaker
+
+    if min_distance <= 0.8:
+        return closest_speaker
+    return None
+
+
+def make_turns(n_turns, n_speakers, seed):
+    rng = random.Random(seed)
+    turns = []
+    t = 0.0
+    for _ in range(n_turns):
+        t += rng.uniform(0.0, 2.0)  # gaps, some of them beyond the fallback tolerance
+        duration = rng.uniform(0.3, 6.0)
+        turns.append((t, t + duration, f"SPEAKER_{rng.randrange(n_speakers):02d}"))
+        t += duration * rng.uniform(0.7, 1.0)  # occasional overlap with the next turn
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark speaker lookup strategies')
+    parser.add_argument('--turns', type=int, default=3000, help='Number of diarization turns')
+    parser.add_argument('--speakers', type=int, default=6, help='Number of distinct speakers')
+    parser.add_argument('--lookups', type=int, default=200000, help='Timestamps to look up with the index')
+    parser.add_argument('--linear-lookups', type=int, default=2000,
+                        help='Timestamps to look up with the linear scan (it is slow)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    turns = make_turns(args.turns, args.speakers, args.seed)
+    annotation = FakeAnnotation(turns)
+    rng = random.Random(args.seed + 1)
+    horizon = turns[-1][1] + 5.0
+    timestamps = [rng.uniform(0.0, horizon) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    index = SpeakerIndex.from_annotation(annotation)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.speaker_at(ts) for ts in timestamps]
+    index_time = time.perf_counter() - start
+
+    sample = timestamps[:args.linear_lookups]
+    start = time.perf_counter()
+    linear = [linear_speaker_at(annotation, ts) for ts in sample]
+    linear_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(indexed, linear) if a != b)
+    index_per_call = index_time / len(timestamps)
+    linear_per_call = linear_time / len(sample)
+
+    print(f"Turns: {len(index)}, lookups: {len(timestamps)} indexed / {len(sample)} linear")
+    print(f"Index build:   {build_time * 1000:.2f} ms")
+    print(f"Index lookup:  {index_per_call * 1e6:.2f} us/call")
+    print(f"Linear lookup: {linear_per_call * 1e6:.2f} us/call")
+    print(f"Speedup:       {linear_per_call / index_per_call:.0f}x")
+    print(f"Mismatches:    {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Benchmark: per-segment translation vs TranslationBatcher.
+
+By default it runs against a simulated backend that sleeps for a fixed round
+trip plus a per-character cost, so the numbers reflect request count and
+concurrency rather than network luck. It can also answer with simulated 429
+errors to exercise the engine's backoff. --backend measures one of the real
+translation backends (e.g. an offline argos install) instead.
+
+Run from the repository root:
+    python benchmarks/bench_translation_batching.py --segments 2000 --latency-ms 40 --concurrency 4
+    python benchmarks/bench_translation_batching.py --backend argos --source-language en --target-language es
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper_gui import (TRANSLATION_BACKENDS, StubBackend, TranslationBatcher, TranslationEngine,
+                         TranslationUnavailable)
+
+COMMON_PHRASES = ["Thank you.", "Yeah.", "Okay.", "Right.", "I see.", "Mm-hmm.", "Sure.", "No."]
+WORDS = ("the meeting budget quarter project deadline customer release team review "
+         "schedule update question answer plan report issue design test data").split()
+
+
+class SimulatedBackend(StubBackend):
+    """Stub backend with simulated latency, rate limiting and mangled batches"""
+
+    name = "simulated"
+
+    def __init__(self, latency, per_char, mangle_rate=0.0, rate_limit_rate=0.0, seed=0):
+        self.latency = latency
+        self.per_char = per_char
+        self.mangle_rate = mangle_rate  # chance of merging lines, to exercise the per-text fallback
+        self.rate_limit_rate = rate_limit_rate  # chance of a simulated HTTP 429
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.chars = 0
+
+    def translate(self, text, source_lang, target_lang):
+        with self.lock:
+            self.calls += 1
+            self.chars += len(text)
+            rate_limited = self.rng.random() < self.rate_limit_rate
+            mangle = self.rng.random() < self.mangle_rate
+        time.sleep(self.latency + self.per_char * len(text))
+        if rate_limited:
+            raise RuntimeError("429 Too Many Requests")
+        lines = super().translate(text, source_lang, target_lang).split("\n")
+        if len(lines) > 1 and mangle:
+            lines[:2] = [lines[0] + " " + lines[1]]
+        return "\n".join(lines)
+
+
+def make_segments(n_segments, repeat_rate, seed):
+    rng = random.Random(seed)
+    segments = []
+    for _ in range(n_segments):
+        if rng.random() < repeat_rate:
+            segments.append(rng.choice(COMMON_PHRASES))
+        else:
+            segments.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 18))).capitalize() + ".")
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched translation against a stub backend')
+    parser.add_argument('--segments', type=int, default=2000, help='Number of transcript segments')
+    parser.add_argument('--repeat-rate', type=float, default=0.3,
+                        help='Fraction of segments that are short recurring phrases')
+    parser.add_argument('--backend', choices=['simulated'] + list(TRANSLATION_BACKENDS), default='simulated',
+                        help='Backend to measure (default: simulated stub with latency)')
+    parser.add_argument('--source-language', default='en')
+    parser.add_argument('--target-language', default='es')
+    parser.add_argument('--latency-ms', type=float, default=40.0, help='Simulated round trip per request')
+    parser.add_argument('--per-char-us', type=float, default=2.0, help='Simulated cost per character')
+    parser.add_argument('--concurrency', type=int, help="Requests in flight at once (default: the backend's limit)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Chance a request fails with a simulated 429 (retried with backoff)')
+    parser.add_argument('--mangle-rate', type=float, default=0.0,
+                        help='Chance the stub merges two lines of a batch (forces a fallback)')
+    parser.add_argument('--baseline-segments', type=int, default=200,
+                        help='Segments to time with one request each (it is slow)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    segments = make_segments(args.segments, args.repeat_rate, args.seed)
+    latency = args.latency_ms / 1000
+    per_char = args.per_char_us / 1e6
+    source, target = args.source_language, args.target_language
+
+    def make_backend(faults):
+        if args.backend != 'simulated':
+            return TRANSLATION_BACKENDS[args.backend]()
+        if faults:
+            return SimulatedBackend(latency, per_char, args.mangle_rate, args.rate_limit_rate, args.seed)
+        return SimulatedBackend(latency, per_char)
+
+    # old behaviour: one request per segment, one at a time
+    baseline = TranslationEngine(make_backend(False), concurrency=1)
+    try:
+        baseline.backend.prepare(source, target)
+    except TranslationUnavailable as e:
+        print(f"Backend unavailable: {e}")
+        return 1
+    sample = segments[:args.baseline_segments]
+    start = time.perf_counter()
+    expected = [baseline.translate(text, target, source) for text in sample]
+    baseline_time = time.perf_counter() - start
+    baseline.close()
+
+    backend = make_backend(True)
+    engine = TranslationEngine(backend, concurrency=args.concurrency, backoff_base=max(latency, 0.01))
+    batcher = TranslationBatcher(engine)
+    start = time.perf_counter()
+    translated = batcher.translate(segments, target, source)
+    batched_time = time.perf_counter() - start
+    engine.close()
+
+    mismatches = sum(1 for a, b in zip(translated, expected) if a != b)
+    baseline_rate = len(sample) / baseline_time
+    batched_rate = len(segments) / batched_time
+
+    print(f"Segments: {len(segments)} ({len(set(segments))} distinct)")
+    print(f"Per-segment: {baseline_rate:8.1f} segments/s ({len(sample)} requests for {len(sample)} segments)")
+    print(f"Batched:     {batched_rate:8.1f} segments/s ({engine.requests} requests for {len(segments)} segments,"
+          f" {batcher.fallbacks} fallback batches, {engine.retries} retries,"
+          f" concurrency {engine.concurrency})")
+    print(f"Speedup:     {batched_rate / baseline_rate:.1f}x")
+    print(f"Mismatches:  {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Tests for CancellationToken and the cancellation points of a streaming transcription"""
+import sys
+import types
+
+import pytest
+
+import whisper_gui
+
+
+class FakeTqdm:
+    def __init__(self, total=None, **kwargs):
+        self.n = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n=1):
+        self.n += n
+
+
+class FakeModel:
+    """Decodes like whisper.transcribe: extends all_segments, then updates the module's progress bar"""
+
+    def __init__(self, windows=5):
+        self.windows = windows
+        self.decoded = 0
+
+    def transcribe(self, audio, **params):
+        transcribe_module = sys.modules['whisper.transcribe']
+        all_segments = []
+        with transcribe_module.tqdm.tqdm(total=self.windows) as pbar:
+            for window in range(self.windows):
+                self.decoded += 1
+                all_segments.extend([{'start': window * 30.0, 'end': window * 30.0 + 30.0, 'text': f" {window}"}])
+                pbar.update(1)
+        return {'segments': all_segments, 'text': ''.join(s['text'] for s in all_segments)}
+
+
+@pytest.fixture
+def hooked_whisper(monkeypatch):
+    """A whisper.transcribe module whose progress bar the segment hook can patch"""
+    module = types.ModuleType('whisper.transcribe')
+    module.tqdm = types.SimpleNamespace(tqdm=FakeTqdm)
+    monkeypatch.setitem(sys.modules, 'whisper.transcribe', module)
+    monkeypatch.setattr(whisper_gui, '_segment_hook_installed', False)
+    assert whisper_gui.install_segment_hook()
+
+
+def test_check_raises_once_cancelled():
+    token = whisper_gui.CancellationToken()
+    token.check()
+    assert not token.cancelled
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(whisper_gui.TranscriptionCancelled):
+        token.check()
+
+
+def test_callbacks_run_only_while_registered():
+    token = whisper_gui.CancellationToken()
+    calls = []
+    with token.on_cancel(lambda: calls.append('inside')):
+        pass
+    with token.on_cancel(lambda: calls.append('during')):
+        token.cancel()
+        token.cancel()  # a second cancel calls nothing again
+    assert calls == ['during']
+
+
+def test_callback_registered_after_cancel_runs_at_once():
+    token = whisper_gui.CancellationToken()
+    token.cancel()
+    calls = []
+    with token.on_cancel(lambda: calls.append('late')):
+        assert calls == ['late']
+
+
+def test_failing_callback_does_not_stop_the_others():
+    token = whisper_gui.CancellationToken()
+    calls = []
+
+    def broken():
+        raise OSError("process already gone")
+
+    with token.on_cancel(broken), token.on_cancel(lambda: calls.append('killed')):
+        token.cancel()
+    assert calls == ['killed']
+
+
+def test_streaming_transcription_stops_after_the_window_it_was_cancelled_in(hooked_whisper):
+    token = whisper_gui.CancellationToken()
+    model = FakeModel()
+    received = []
+
+    def on_segment(segment):
+        received.append(segment['text'])
+        if len(received) == 2:
+            token.cancel()
+
+    with pytest.raises(whisper_gui.TranscriptionCancelled):
+        whisper_gui.transcribe_streaming(model, None, on_segment, token)
+    assert received == [" 0", " 1"]
+    assert model.decoded == 2
+
+
+def test_streaming_transcription_reports_every_segment_once(hooked_whisper):
+    received = []
+    result = whisper_gui.transcribe_streaming(FakeModel(), None, lambda segment: received.append(segment['text']),
+                                              whisper_gui.CancellationToken())
+    assert received == [segment['text'] for segment in result['segments']]
@@ -0,0 +1,109 @@
+"""Tests for checkpointed transcription: an interrupted run resumes to the same result"""
+import contextlib
+import os
+import types
+
+import numpy as np
+import pytest
+
+import whisper_gui
+
+SAMPLE_RATE = whisper_gui.SAMPLE_RATE
+
+
+class FakeModel:
+    """Deterministic stand-in for a Whisper model: a segment per 10 s, text from the audio, seed and prompt"""
+
+    def __init__(self, fail_at_call=None):
+        self.calls = 0
+        self.fail_at_call = fail_at_call
+        self.seed = None
+
+    def transcribe(self, audio, initial_prompt=None, **params):
+        self.calls += 1
+        if self.calls == self.fail_at_call:
+            raise KeyboardInterrupt  # the run dies mid-file
+        segments = []
+        for start in range(0, len(audio) // SAMPLE_RATE, 10):
+            level = float(np.abs(audio[start * SAMPLE_RATE:(start + 10) * SAMPLE_RATE]).mean())
+            text = f" level {level:.4f} seed {self.seed} after {len(initial_prompt or '')}"
+            segments.append({'start': float(start), 'end': float(min(start + 8, len(audio) / SAMPLE_RATE)),
+                             'text': text})
+        return {'segments': segments, 'text': ''.join(s['text'] for s in segments), 'language': 'en'}
+
+
+@pytest.fixture
+def fake_torch(monkeypatch):
+    """torch with a global seed, handed to the models, that fork_rng restores on exit"""
+    fake = types.SimpleNamespace(models=[], seed='process seed')
+
+    def manual_seed(seed):
+        fake.seed = seed
+        for model in fake.models:
+            model.seed = seed
+
+    @contextlib.contextmanager
+    def fork_rng():
+        saved = fake.seed
+        try:
+            yield
+        finally:
+            fake.seed = saved
+
+    fake.manual_seed = manual_seed
+    fake.random = types.SimpleNamespace(fork_rng=fork_rng)
+    monkeypatch.setattr(whisper_gui, 'torch', fake)
+    return fake
+
+
+@pytest.fixture
+def audio():
+    rng = np.random.default_rng(3)
+    audio = rng.normal(0, 0.1, SAMPLE_RATE * 240).astype(np.float32)
+    for pause in (55, 118, 181):  # somewhere quiet to cut near every minute
+        audio[pause * SAMPLE_RATE:(pause + 2) * SAMPLE_RATE] *= 0.01
+    return audio
+
+
+def run(model, audio, path, fake_torch):
+    fake_torch.models.append(model)
+    return whisper_gui.transcribe_checkpointed(model, 'fake', audio, path, 1, language='en')
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path, audio, fake_torch):
+    expected = run(FakeModel(), audio, str(tmp_path / "straight.json"), fake_torch)
+    windows = len(whisper_gui.find_chunk_boundaries(audio, 60))
+    assert windows >= 3
+
+    path = str(tmp_path / "interrupted.json")
+    with pytest.raises(KeyboardInterrupt):
+        run(FakeModel(fail_at_call=3), audio, path, fake_torch)
+    assert os.path.exists(path)
+
+    resumed_model = FakeModel()
+    resumed = run(resumed_model, audio, path, fake_torch)
+    assert resumed_model.calls == windows - 2  # the two saved windows are not decoded again
+    assert resumed == expected
+    assert not os.path.exists(path)
+
+
+def test_window_seed_leaves_process_random_state_alone(tmp_path, audio, fake_torch):
+    run(FakeModel(), audio, str(tmp_path / "run.json"), fake_torch)
+    assert fake_torch.seed == 'process seed'
+
+
+def test_checkpoint_of_other_options_is_ignored(tmp_path, audio, fake_torch):
+    path = str(tmp_path / "run.json")
+    with pytest.raises(KeyboardInterrupt):
+        run(FakeModel(fail_at_call=2), audio, path, fake_torch)
+
+    model = FakeModel()
+    fake_torch.models.append(model)
+    whisper_gui.transcribe_checkpointed(model, 'fake', audio, path, 1, language='de')
+    assert model.calls == len(whisper_gui.find_chunk_boundaries(audio, 60))
+
+
+def test_unreadable_checkpoint_starts_over(tmp_path):
+    path = tmp_path / "run.json"
+    path.write_text("{not json")
+    assert whisper_gui.load_checkpoint(str(path), "key") is None
@@ -0,0 +1,85 @@
+"""Tests for long-file chunking: where chunks are cut and how their segments are stitched back together"""
+import numpy as np
+
+import whisper_gui
+
+
+def chunk(*segments):
+    """Whisper-style result with (start, end, text) segments on the chunk's own timeline"""
+    return {'segments': [{'start': start, 'end': end, 'text': text} for start, end, text in segments]}
+
+
+def stitch(first, second, cut=100.0, overlap=1.0):
+    segments = []
+    whisper_gui.stitch_chunk_segments(segments, first, cut, 0.0, False)
+    whisper_gui.stitch_chunk_segments(segments, second, 200.0, cut - overlap, True)
+    return segments
+
+
+def texts(segments):
+    return [segment['text'] for segment in segments]
+
+
+def test_segment_timed_across_the_cut_differently_is_kept_once():
+    # the first chunk puts the segment's midpoint just after the cut, the second just before it:
+    # owning it by midpoint dropped it from both
+    segments = stitch(chunk((90.0, 99.0, "a"), (99.8, 100.4, "b")),
+                      chunk((0.5, 1.4, "b"), (2.0, 5.0, "c")))
+    assert texts(segments) == ["a", "b", "c"]
+
+
+def test_segment_decoded_by_both_chunks_is_kept_once():
+    segments = stitch(chunk((90.0, 99.0, "a"), (99.2, 100.6, "b")),
+                      chunk((0.3, 1.5, "b"), (2.0, 5.0, "c")))
+    assert texts(segments) == ["a", "b", "c"]
+    assert segments[1]['start'] == 99.2
+
+
+def test_clamped_segment_clamps_its_words():
+    first = chunk((90.0, 99.5, "a"))
+    first['segments'][0]['words'] = [{'word': " a", 'start': 98.0, 'end': 99.5}]
+    second = chunk((0.2, 1.5, "b"))
+    second['segments'][0]['words'] = [{'word': " b1", 'start': 0.2, 'end': 0.4},
+                                      {'word': " b2", 'start': 0.6, 'end': 1.5}]
+    segments = stitch(first, second)
+    assert texts(segments) == ["a", "b"]
+    assert segments[1]['start'] == 99.5
+    words = [word for segment in segments for word in segment['words']]
+    assert [(word['start'], word['end']) for word in words[1:]] == [(99.5, 99.5), (99.6, 100.5)]
+    assert all(prev['end'] <= word['start'] for prev, word in zip(words, words[1:]))
+
+
+def test_overlap_segments_of_the_first_chunk_go_to_the_next():
+    segments = stitch(chunk((90.0, 99.0, "a"), (100.1, 101.0, "b (cut short)")),
+                      chunk((1.1, 3.0, "b"), (3.0, 5.0, "c")))
+    assert texts(segments) == ["a", "b", "c"]
+
+
+def test_stitched_segments_are_shifted_and_ordered():
+    segments = stitch(chunk((0.0, 50.0, "a")),
+                      chunk((1.5, 2.5, "b")))
+    assert [(s['start'], s['end']) for s in segments] == [(0.0, 50.0), (100.5, 101.5)]
+    assert [s['id'] for s in segments] == [0, 1]
+
+
+def test_tiny_chunk_size_is_clamped():
+    sample_rate = 16000
+    audio = np.random.default_rng(0).normal(0, 0.1, sample_rate * 120).astype(np.float32)
+    boundaries = whisper_gui.find_chunk_boundaries(audio, 0.001, sample_rate)
+    assert boundaries[0][0] == 0 and boundaries[-1][1] == len(audio)
+    assert all(start < end for start, end in boundaries)
+    assert all(end - start >= whisper_gui.MIN_CHUNK_SECONDS * sample_rate // 2 for start, end in boundaries)
+    assert len(boundaries) <= 120 / whisper_gui.MIN_CHUNK_SECONDS
+
+
+def test_boundaries_cover_the_audio():
+    sample_rate = 16000
+    audio = np.zeros(sample_rate * 600, dtype=np.float32)
+    audio[::7] = 0.2  # loud everywhere but a few pauses
+    for pause in (118, 242, 361, 480):
+        audio[pause * sample_rate:(pause + 1) * sample_rate] = 0
+    boundaries = whisper_gui.find_chunk_boundaries(audio, 120, sample_rate)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(boundaries, boundaries[1:]))
+    assert boundaries[-1][1] == len(audio)
+    for (_, cut), pause in zip(boundaries, (118, 242, 361, 480)):
+        assert pause * sample_rate <= cut <= (pause + 1) * sample_rate
@@ -0,0 +1,74 @@
+"""Tests for DiarizationProgress, the pyannote hook that reports diarization progress"""
+import pytest
+
+import whisper_gui
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(whisper_gui.time, 'perf_counter', clock)
+    return clock
+
+
+def run_pipeline(hook, clock, batches=10):
+    """The step reports of a pyannote diarization pipeline, one second per batch"""
+    hook('segmentation', None, total=batches, completed=0)
+    for completed in range(1, batches + 1):
+        clock.now += 1
+        hook('segmentation', None, total=batches, completed=completed)
+    hook('speaker_counting', None)
+    hook('embeddings', None, total=batches, completed=0)
+    for completed in range(1, batches + 1):
+        clock.now += 1
+        hook('embeddings', None, total=batches, completed=completed)
+    hook('embeddings', None)
+    clock.now += 5  # clustering reports nothing while it runs
+    hook('discrete_diarization', None)
+
+
+def test_progress_is_monotonic_and_ends_at_one(clock):
+    updates = []
+    run_pipeline(whisper_gui.DiarizationProgress(lambda *update: updates.append(update), min_interval=0),
+                 clock)
+    fractions = [fraction for _, fraction, _ in updates]
+    assert fractions == sorted(fractions)
+    assert fractions[-1] == 1.0
+    assert [stage for stage, _, _ in updates if stage == 'clustering']
+    assert {stage for stage, _, _ in updates} == set(whisper_gui.DIARIZATION_STAGE_RANGES)
+
+
+def test_eta_comes_from_the_measured_rate(clock):
+    updates = []
+    run_pipeline(whisper_gui.DiarizationProgress(lambda *update: updates.append(update), min_interval=0),
+                 clock)
+    embeddings = [(fraction, eta) for stage, fraction, eta in updates if stage == 'embeddings']
+    # 4 of 10 batches done after 4 seconds: 6 seconds left
+    start, end = whisper_gui.DIARIZATION_STAGE_RANGES['embeddings']
+    assert (pytest.approx(start + (end - start) * 0.4), pytest.approx(6.0)) in embeddings
+
+
+def test_reports_are_throttled_except_at_stage_edges(clock):
+    updates = []
+    run_pipeline(whisper_gui.DiarizationProgress(lambda *update: updates.append(update), min_interval=60),
+                 clock)
+    # only the forced reports: start and end of each stage, clustering start and end
+    assert [stage for stage, _, _ in updates] == ['segmentation', 'segmentation', 'embeddings',
+                                                  'embeddings', 'clustering', 'clustering']
+
+
+def test_cancelled_token_stops_the_pipeline(clock):
+    token = whisper_gui.CancellationToken()
+    hook = whisper_gui.DiarizationProgress(lambda *update: None, token)
+    hook('segmentation', None, total=10, completed=1)
+    token.cancel()
+    with pytest.raises(whisper_gui.TranscriptionCancelled):
+        hook('segmentation', None, total=10, completed=2)
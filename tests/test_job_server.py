@@ -0,0 +1,184 @@
+"""Tests for the --serve job server: submission checks, backpressure, pruning and the HTTP API"""
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import whisper_gui
+
+
+@pytest.fixture
+def server_args(tmp_path):
+    return argparse.Namespace(model='base', translation_backend=whisper_gui.DEFAULT_TRANSLATION_BACKEND,
+                              cache_dir=str(tmp_path / "cache"), no_cache=True)
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "call.wav"
+    path.write_bytes(b"\0" * 64)
+    return str(path)
+
+
+@pytest.fixture
+def JobServer():
+    """JobServer whose jobs stay running until the test ends, so the queue fills up"""
+    release = threading.Event()
+
+    class BlockedJobServer(whisper_gui.JobServer):
+        def run_job(self, job):
+            release.wait(10)
+
+    yield BlockedJobServer
+    release.set()
+
+
+def wait_for_state(job_server, job_id, state):
+    deadline = time.time() + 5
+    while job_server.status(job_id)['state'] != state:
+        assert time.time() < deadline, f"job never became {state}"
+        time.sleep(0.01)
+
+
+def test_submit_rejects_bad_input(server_args, audio_file, JobServer):
+    job_server = JobServer(server_args)
+    with pytest.raises(ValueError, match="absolute"):
+        job_server.submit("call.wav")
+    with pytest.raises(ValueError, match="does not exist"):
+        job_server.submit(audio_file + ".missing")
+    with pytest.raises(ValueError, match="unknown options: cache_dir"):
+        job_server.submit(audio_file, {'cache_dir': '/tmp'})
+    with pytest.raises(ValueError, match="unknown model"):
+        job_server.submit(audio_file, {'model': 'huge'})
+    with pytest.raises(ValueError, match="unknown translation backend"):
+        job_server.submit(audio_file, {'translation_backend': 'nope'})
+    with pytest.raises(ValueError, match="absolute"):
+        job_server.submit(audio_file, {'export_srt': 'out.srt'})
+
+
+def test_output_paths_must_be_inside_an_output_dir(server_args, audio_file, tmp_path, JobServer):
+    allowed = tmp_path / "out"
+    allowed.mkdir()
+    job_server = JobServer(server_args, output_dirs=[str(allowed)])
+    for path in ("/etc/cron.d/job", str(tmp_path / "outside.srt"), str(allowed / ".." / "escape.srt")):
+        with pytest.raises(ValueError, match="--serve-output-dir"):
+            job_server.submit(audio_file, {'export_srt': path})
+    status = job_server.submit(audio_file, {'export_srt': str(allowed / "call.srt")})
+    assert status['options'] == {'export_srt': str(allowed / "call.srt")}
+
+
+def test_full_queue_refuses_jobs(server_args, audio_file, JobServer):
+    job_server = JobServer(server_args, workers=1, queue_size=1)
+    running = job_server.submit(audio_file)
+    wait_for_state(job_server, running['id'], 'running')
+    waiting = job_server.submit(audio_file)
+    assert waiting['state'] == 'queued' and waiting['queue_position'] == 1
+    with pytest.raises(queue.Full):
+        job_server.submit(audio_file)
+    assert len(job_server.list_jobs()) == 2
+
+
+def test_prune_keeps_newest_finished_jobs(server_args, JobServer):
+    job_server = JobServer(server_args, keep_jobs=2)
+    for index, finished in enumerate([3.0, 1.0, 2.0, None]):
+        job_id = f"job{index}"
+        os.makedirs(os.path.join(job_server.jobs_dir, job_id))
+        job_server.jobs[job_id] = {'id': job_id, 'state': 'running' if finished is None else 'done',
+                                   'finished': finished, 'outputs': {}}
+    job_server.prune()
+    assert sorted(job_server.jobs) == ['job0', 'job2', 'job3']
+    assert sorted(os.listdir(job_server.jobs_dir)) == ['job0', 'job2', 'job3']
+
+
+def test_only_job_directories_of_stopped_servers_are_removed(server_args, JobServer):
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+    stale_dir = os.path.join(server_args.cache_dir, "jobs", f"{finished.stdout.strip()}-old")
+    os.makedirs(stale_dir)
+    other_server = JobServer(server_args, workers=1)
+    os.makedirs(other_server.jobs_dir)
+    job_server = JobServer(server_args, workers=1)
+    assert not os.path.exists(stale_dir)
+    assert os.path.isdir(other_server.jobs_dir)
+    assert job_server.jobs_dir != other_server.jobs_dir
+    other_server.close()
+    assert not os.path.exists(other_server.jobs_dir)
+
+
+def test_is_loopback_host():
+    assert whisper_gui.is_loopback_host('127.0.0.1')
+    assert whisper_gui.is_loopback_host('localhost')
+    assert whisper_gui.is_loopback_host('::1')
+    assert not whisper_gui.is_loopback_host('0.0.0.0')
+    assert not whisper_gui.is_loopback_host('192.168.1.10')
+    assert not whisper_gui.is_loopback_host('gpu-box')
+
+
+@pytest.fixture
+def http_server(server_args, JobServer):
+    """(base URL, JobServer) of a server with a one-job queue and a token"""
+    job_server = JobServer(server_args, workers=1, queue_size=1, token="s3cret")
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), whisper_gui.make_job_request_handler(job_server))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", job_server
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(url, body, content_type='application/json', token="s3cret"):
+    headers = {'Content-Type': content_type}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    req = urllib.request.Request(url + "/jobs", data=json.dumps(body).encode('utf-8'), method='POST',
+                                 headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_http_requires_token(http_server, audio_file):
+    url, _ = http_server
+    assert post(url, {'input': audio_file}, token=None)[0] == 401
+    assert post(url, {'input': audio_file}, token="wrong")[0] == 401
+    req = urllib.request.Request(url + "/health")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(req, timeout=5)
+    assert error.value.code == 401
+
+
+def test_http_requires_json_content_type(http_server, audio_file):
+    url, _ = http_server
+    code, _, body = post(url, {'input': audio_file}, content_type='text/plain')
+    assert code == 415
+    assert "application/json" in body['error']
+
+
+def test_http_rejects_bad_options(http_server, audio_file):
+    url, _ = http_server
+    code, _, body = post(url, {'input': audio_file, 'options': {'model': 'huge'}})
+    assert code == 400
+    assert "unknown model" in body['error']
+    assert post(url, ["not", "an", "object"])[0] == 400
+
+
+def test_http_full_queue_answers_503(http_server, audio_file):
+    url, job_server = http_server
+    code, headers, running = post(url, {'input': audio_file})
+    assert code == 202
+    assert headers['Location'] == f"/jobs/{running['id']}"
+    wait_for_state(job_server, running['id'], 'running')
+    assert post(url, {'input': audio_file})[0] == 202
+    code, headers, body = post(url, {'input': audio_file})
+    assert code == 503
+    assert headers['Retry-After'] == '5'
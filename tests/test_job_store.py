@@ -0,0 +1,120 @@
+"""Tests for the --job-db JobStore: state transitions, retries and recovery after a crash"""
+import pytest
+
+import whisper_gui
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = whisper_gui.JobStore(str(tmp_path / "jobs.sqlite"))
+    yield store
+    store.close()
+
+
+def job(store, input_path):
+    return next(row for row in store.jobs() if row['input'] == input_path)
+
+
+def test_jobs_run_in_batch_order(store):
+    store.add("/b.wav", {'model': 'base'}, 2)
+    store.add("/a.wav", {'model': 'base'}, 1)
+    assert [(input_path, options) for _, input_path, options in store.runnable(3)] == [
+        ("/a.wav", {'model': 'base'}), ("/b.wav", {'model': 'base'})]
+    assert store.counts() == {'queued': 2}
+
+
+def test_job_moves_through_its_stages(store):
+    store.add("/a.wav", {}, 1)
+    job_id = store.runnable(3)[0][0]
+    store.start(job_id)
+    assert job(store, "/a.wav")['state'] == 'decoding'
+    assert store.attempts(job_id) == 1
+    store.set_state(job_id, 'transcribing', {'decoding': 1.5})
+    store.finish(job_id, 'done', {'decoding': 1.5, 'transcribing': 3.0}, duration=60.0, cache_hit=False)
+    row = job(store, "/a.wav")
+    assert row['state'] == 'done' and row['duration'] == 60.0 and row['finished'] is not None
+    assert store.runnable(3) == []
+    assert store.counts_text() == "1 done"
+
+
+def test_done_jobs_keep_their_options(store):
+    store.add("/a.wav", {'model': 'base'}, 1)
+    job_id = store.runnable(3)[0][0]
+    store.start(job_id)
+    store.finish(job_id, 'done', {})
+    store.add("/a.wav", {'model': 'small'}, 1)
+    assert job(store, "/a.wav")['options'] == '{"model": "base"}'
+
+
+def test_failed_jobs_are_retried_until_attempts_run_out(store):
+    store.add("/a.wav", {}, 1)
+    job_id = store.runnable(2)[0][0]
+    for _ in range(2):
+        assert [row[0] for row in store.runnable(2)] == [job_id]
+        store.start(job_id)
+        store.finish(job_id, 'failed', {}, "boom")
+    assert store.runnable(2) == []
+    assert job(store, "/a.wav")['error'] == "boom"
+
+
+def test_retry_failed_resets_attempts(store):
+    store.add("/a.wav", {}, 1)
+    job_id = store.runnable(1)[0][0]
+    store.start(job_id)
+    store.finish(job_id, 'failed', {}, "boom")
+    assert store.runnable(1) == []
+    assert store.retry_failed() == 1
+    assert [row[0] for row in store.runnable(1)] == [job_id]
+    assert store.attempts(job_id) == 0
+
+
+def test_new_options_reset_attempts_of_failed_jobs(store):
+    store.add("/a.wav", {'model': 'base'}, 1)
+    job_id = store.runnable(1)[0][0]
+    store.start(job_id)
+    store.finish(job_id, 'failed', {}, "out of memory")
+    store.add("/a.wav", {'model': 'base'}, 1)
+    assert store.runnable(1) == []  # same options, no attempts left
+    store.add("/a.wav", {'model': 'tiny'}, 1)
+    assert store.runnable(1) == [(job_id, "/a.wav", {'model': 'tiny'})]
+    assert job(store, "/a.wav")['state'] == 'queued'
+
+
+def test_recover_requeues_jobs_left_mid_stage(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = whisper_gui.JobStore(path)
+    for index, name in enumerate(("/a.wav", "/b.wav", "/c.wav")):
+        store.add(name, {}, index)
+    a, b, c = (row[0] for row in store.runnable(2))
+    store.start(a)
+    store.set_state(a, 'transcribing', {})
+    store.start(b)
+    store.finish(b, 'failed', {}, "boom")
+    store.start(b)  # second and last attempt, then the process dies
+    store.close()
+
+    store = whisper_gui.JobStore(path)
+    assert store.recover(2) == 2
+    assert job(store, "/a.wav")['state'] == 'queued'
+    assert job(store, "/a.wav")['error'] == 'interrupted'
+    assert job(store, "/b.wav")['state'] == 'failed'
+    assert [row[0] for row in store.runnable(2)] == [a, c]
+    store.close()
+
+
+def test_release_gives_the_attempt_back(store):
+    store.add("/a.wav", {}, 1)
+    job_id = store.runnable(1)[0][0]
+    store.start(job_id)
+    store.release(job_id)
+    assert job(store, "/a.wav")['state'] == 'queued'
+    assert store.attempts(job_id) == 0
+
+
+def test_in_memory_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = whisper_gui.JobStore(':memory:')
+    store.add("/a.wav", {}, 1)
+    assert store.counts() == {'queued': 1}
+    store.close()
+    assert list(tmp_path.iterdir()) == []
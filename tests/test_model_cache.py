@@ -0,0 +1,43 @@
+"""Tests for ModelCache eviction and pinning"""
+import types
+
+import pytest
+
+import whisper_gui
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # every model counts as 60 bytes against a 100 byte budget, so two never fit
+    monkeypatch.setattr(whisper_gui, 'estimate_model_bytes', lambda model, seen=None, _depth=0: 60)
+    monkeypatch.setattr(whisper_gui, 'torch', types.SimpleNamespace(cuda=types.SimpleNamespace(is_available=lambda: False)))
+    evicted = []
+    model_cache = whisper_gui.ModelCache(100, on_evict=evicted.append)
+    model_cache.evicted = evicted
+    return model_cache
+
+
+def test_least_recently_used_model_is_evicted(cache):
+    cache.get('a', lambda: 'model a')
+    cache.get('b', lambda: 'model b')
+    assert cache.evicted == ['a']
+    assert cache.peek('a') is None
+    assert cache.peek('b') == 'model b'
+
+
+def test_model_pinned_by_get_survives_until_unpinned(cache):
+    assert cache.get('a', lambda: 'model a', pin=True) == 'model a'
+    cache.get('b', lambda: 'model b')
+    assert cache.evicted == []
+    cache.unpin(['a'])
+    cache.evict()
+    assert cache.evicted == ['a']
+
+
+def test_cache_hit_pins_resident_model(cache):
+    cache.get('a', lambda: 'model a')
+    cache.get('a', lambda: pytest.fail("a resident model is not loaded again"), pin=True)
+    cache.get('b', lambda: 'model b')
+    assert cache.peek('a') == 'model a'
+    cache.unpin()
+    assert cache.pinned == set()
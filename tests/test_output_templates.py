@@ -0,0 +1,51 @@
+"""Tests for batch output naming templates"""
+import argparse
+import os
+
+import pytest
+
+import whisper_gui
+
+
+def batch_args(**outputs):
+    args = argparse.Namespace(**{name: None for name in whisper_gui.BATCH_OUTPUT_ARGS})
+    for name, template in outputs.items():
+        setattr(args, name, template)
+    return args
+
+
+def test_template_expands_placeholders(tmp_path):
+    path = whisper_gui.format_output_template("{dir}/{index}-{stem}.{ext}.{lang}.srt", str(tmp_path / "call.wav"), 3)
+    assert path == f"{tmp_path}/3-call.wav.{{lang}}.srt"
+
+
+def test_escaped_braces_are_literal():
+    assert whisper_gui.format_output_template("out/{{x}}_{stem}.txt", "a.wav", 1) == "out/{x}_a.txt"
+
+
+@pytest.mark.parametrize('template', ["out/{stme}.txt", "out/{}.txt", "out/{stem.txt", "out/}{stem}.txt"])
+def test_malformed_template_raises_value_error(template):
+    with pytest.raises(ValueError):
+        whisper_gui.format_output_template(template, "a.wav", 1)
+
+
+def test_same_stem_in_two_directories_is_refused(capsys):
+    args = batch_args(output="out/{stem}.txt")
+    assert not whisper_gui.prepare_batch_outputs(args, ["day1/call.wav", "day2/call.wav"])
+    assert os.path.abspath("out/call.txt") in capsys.readouterr().out
+
+
+def test_index_keeps_same_stems_apart():
+    args = batch_args(output="out/{index}_{stem}.txt")
+    assert whisper_gui.prepare_batch_outputs(args, ["day1/call.wav", "day2/call.wav"])
+
+
+def test_two_options_writing_one_path_are_refused():
+    args = batch_args(output="out/{stem}.txt", export_json="out/{stem}.txt")
+    assert not whisper_gui.prepare_batch_outputs(args, ["call.wav"])
+
+
+def test_malformed_template_is_a_usage_error(capsys):
+    args = batch_args(export_srt="out/{stem}}.srt")
+    assert not whisper_gui.prepare_batch_outputs(args, ["call.wav"])
+    assert "Error: --export-srt:" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+"""Tests for assigning diarization speakers to transcript intervals"""
+import numpy as np
+
+import whisper_gui
+
+
+def brute_force(starts, ends, turns):
+    speakers = []
+    for start, end in zip(starts, ends):
+        totals = {}
+        for turn_start, turn_end, label in turns:
+            overlap = min(end, turn_end) - max(start, turn_start)
+            if overlap > 0:
+                totals[label] = totals.get(label, 0.0) + overlap
+        speakers.append(max(sorted(totals), key=totals.get) if totals else None)
+    return speakers
+
+
+def test_matches_brute_force_with_a_long_early_turn():
+    rng = np.random.default_rng(1)
+    # a turn spanning the whole recording keeps every later turn a candidate for every chunk
+    turns = []
+    position = 0.0
+    for i in range(400):
+        length = float(rng.uniform(0.5, 4.0))
+        turns.append((position, position + length, f"SPEAKER_{1 + i % 3:02d}"))
+        position += length + float(rng.uniform(0.0, 1.0))
+    turns.append((0.0, position, "SPEAKER_00"))
+    starts = np.sort(rng.uniform(0, position, 300))
+    ends = starts + rng.uniform(0.1, 6.0, 300)
+    index = whisper_gui.SpeakerIndex(turns)
+
+    speakers = whisper_gui.assign_speakers_to_intervals(starts, ends, index, chunk_size=32, turn_chunk_size=16)
+    assert speakers == brute_force(starts, ends, turns)
+
+
+def test_intervals_without_overlap_use_the_nearest_turn():
+    index = whisper_gui.SpeakerIndex([(0.0, 1.0, "A"), (5.0, 6.0, "B")])
+    speakers = whisper_gui.assign_speakers_to_intervals([0.2, 6.05, 3.0], [0.8, 6.05, 3.5], index)
+    assert speakers[:2] == ["A", "B"]
+    assert speakers[2] is None
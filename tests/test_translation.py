@@ -0,0 +1,71 @@
+"""Tests for TranslationBatcher: batching through the stub backend, the translation memory and reporting failed backends"""
+import pytest
+
+import whisper_gui
+
+
+class FailingBackend(whisper_gui.TranslationBackend):
+    name = "failing"
+
+    def translate(self, text, source_lang, target_lang):
+        raise ValueError("service down")
+
+
+class FlakyBackend(whisper_gui.StubBackend):
+    """Fails every request that contains 'bad'"""
+    name = "flaky"
+
+    def translate(self, text, source_lang, target_lang):
+        if "bad" in text:
+            raise ValueError("rejected")
+        return super().translate(text, source_lang, target_lang)
+
+
+def translate(backend, texts, memory=None):
+    engine = whisper_gui.TranslationEngine(backend, max_retries=0)
+    try:
+        batcher = whisper_gui.TranslationBatcher(engine, memory)
+        return batcher.translate(texts, 'es'), batcher
+    finally:
+        engine.close()
+
+
+def test_stub_backend_translates_in_one_request():
+    translations, batcher = translate(whisper_gui.StubBackend(), ["hello", "world", "hello"])
+    assert translations == ["[es] hello", "[es] world", "[es] hello"]
+    assert batcher.requests == 1
+    assert batcher.error is None and batcher.failed == 0
+
+
+def test_translations_are_stored_in_one_commit(tmp_path):
+    memory = whisper_gui.TranslationMemory(str(tmp_path / "translations.sqlite"))
+    statements = []
+    memory._conn.set_trace_callback(statements.append)
+    texts = [f"line {i}" for i in range(50)]
+    translate(whisper_gui.StubBackend(), texts, memory)
+    assert statements.count("COMMIT") == 1
+    translations, batcher = translate(whisper_gui.StubBackend(), texts, memory)
+    assert translations == [f"[es] {text}" for text in texts]
+    assert batcher.requests == 0
+
+
+def test_backend_failing_every_request_sets_error():
+    translations, batcher = translate(FailingBackend(), ["hello", "world"])
+    assert translations == ["hello", "world"]
+    assert batcher.failed == 2
+    assert "service down" in batcher.error
+
+
+def test_partial_failure_is_counted_without_error():
+    translations, batcher = translate(FlakyBackend(), ["good", "bad"])
+    assert translations == ["[es] good", "bad"]
+    assert batcher.failed == 1
+    assert batcher.error is None
+
+
+def test_backend_must_implement_translate():
+    class Incomplete(whisper_gui.TranslationBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
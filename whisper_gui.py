@@ -11,42 +11,1855 @@ warnings.filterwarnings("ignore", message=".*TorchCodec.*")
 warnings.filterwarnings("ignore", module="pyannote.*")
 warnings.filterwarnings("ignore", module="torchaudio.*")
 
-import tkinter as tk
-import tkinter.font as tkfont
-from tkinter import filedialog, messagebox, ttk
-import whisper
 import threading
 import os
 import json
 import re
-import torch
-import tempfile
 import subprocess
 import sys
 import io
+import abc
 import argparse
+import asyncio
+import collections
+import bisect
+import concurrent.futures
+import contextlib
+import multiprocessing
+import gc
+import glob
+import hashlib
+import hmac
+import importlib
+import importlib.metadata
+import importlib.util
+import queue
+import random
+import shutil
+import signal
+import sqlite3
+import time
+import types
+import uuid
+from array import array
+import numpy as np
 from datetime import timedelta
 from dotenv import load_dotenv
-import winreg
 
-# Optional import for speaker diarization
-try:
-    from pyannote.audio import Pipeline
-    PYANNOTE_AVAILABLE = True
-except ImportError:
-    Pipeline = None
-    PYANNOTE_AVAILABLE = False
+class LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access.
+
+    torch and whisper take seconds to import; --help, cache maintenance and
+    export-only runs never touch them.
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+torch = LazyModule('torch')
+whisper = LazyModule('whisper')
+
+# tkinter is only imported in GUI mode (see import_tkinter), so the CLI runs on hosts without Tk
+tk = tkfont = filedialog = messagebox = ttk = None
+
+def import_tkinter():
+    global tk, tkfont, filedialog, messagebox, ttk
+    import tkinter as tk
+    import tkinter.font as tkfont
+    from tkinter import filedialog, messagebox, ttk
+
+def optional_module_available(name):
+    """Whether an optional dependency is installed, checked without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Optional import for speaker diarization (pyannote.audio is imported when a pipeline is loaded)
+PYANNOTE_AVAILABLE = optional_module_available('pyannote.audio')
 
 # Optional import for translation
-try:
-    from googletrans import Translator
-    GOOGLETRANS_AVAILABLE = True
-except ImportError:
-    Translator = None
-    GOOGLETRANS_AVAILABLE = False
+GOOGLETRANS_AVAILABLE = optional_module_available('googletrans')
 
 load_dotenv()
 
+# max gap (seconds) between a timestamp and the nearest turn for it to still get that speaker
+SPEAKER_FALLBACK_TOLERANCE = 0.8
+
+class SpeakerIndex:
+    """Sorted interval index over diarization turns for fast speaker lookup"""
+
+    def __init__(self, turns):
+        # turns: iterable of (start, end, label), kept in the order they were given
+        turns = sorted(turns, key=lambda t: (t[0], t[1]))
+        self.starts = array('d', (t[0] for t in turns))
+        self.ends = array('d', (t[1] for t in turns))
+        self.labels = [t[2] for t in turns]
+
+        # running max of turn ends (and the first index reaching it) so containment
+        # and "closest turn before" queries are a single bisect each
+        self.max_ends = array('d')
+        self.max_end_index = array('l')
+        best_end, best_index = float('-inf'), -1
+        for i, end in enumerate(self.ends):
+            if end > best_end:
+                best_end, best_index = end, i
+            self.max_ends.append(best_end)
+            self.max_end_index.append(best_index)
+
+    @classmethod
+    def from_annotation(cls, annotation):
+        """Build the index from a pyannote Annotation"""
+        return cls((turn.start, turn.end, speaker)
+                   for turn, _, speaker in annotation.itertracks(yield_label=True))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def speaker_at(self, timestamp, tolerance=SPEAKER_FALLBACK_TOLERANCE):
+        """Return the speaker at timestamp, or the nearest one within tolerance"""
+        if not self.labels:
+            return None
+
+        # turns [0, n_started) start at or before the timestamp
+        n_started = bisect.bisect_right(self.starts, timestamp)
+
+        # first turn whose end reaches the timestamp; it contains it if it has started
+        first_reaching = bisect.bisect_left(self.max_ends, timestamp)
+        if first_reaching < n_started:
+            return self.labels[first_reaching]
+
+        # no exact match - pick the closest turn on either side (earlier turn wins ties)
+        closest_index = None
+        min_distance = float('inf')
+        if n_started > 0:
+            min_distance = timestamp - self.max_ends[n_started - 1]
+            closest_index = self.max_end_index[n_started - 1]
+        if n_started < len(self.labels):
+            distance = self.starts[n_started] - timestamp
+            if distance < min_distance:
+                min_distance = distance
+                closest_index = n_started
+
+        # only assign speaker if timestamp is very close
+        if min_distance <= tolerance:
+            return self.labels[closest_index]
+
+        return None
+
+def assign_speakers_to_intervals(starts, ends, speaker_index, chunk_size=4096, turn_chunk_size=512):
+    """Return the speaker with the most overlap for each (start, end) interval.
+
+    Intervals are processed in start order, chunk_size at a time, against only
+    the turns that can overlap the chunk, turn_chunk_size turns at a time, so
+    memory stays bounded even when many turns overlap one chunk. Intervals
+    with no overlap at all (gaps, zero-length words) fall back to the nearest
+    turn lookup on their start time.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    speakers = [None] * len(starts)
+    if len(starts) == 0 or len(speaker_index) == 0:
+        return speakers
+
+    turn_starts = np.frombuffer(speaker_index.starts, dtype=np.float64)
+    turn_ends = np.frombuffer(speaker_index.ends, dtype=np.float64)
+    turn_max_ends = np.frombuffer(speaker_index.max_ends, dtype=np.float64)
+    speaker_names = sorted(set(speaker_index.labels))
+    speaker_ids = {name: i for i, name in enumerate(speaker_names)}
+    # one-hot turn -> speaker matrix turns per-turn overlap into per-speaker totals
+    turn_speakers = np.zeros((len(speaker_index), len(speaker_names)))
+    turn_speakers[np.arange(len(speaker_index)),
+                  [speaker_ids[label] for label in speaker_index.labels]] = 1.0
+
+    order = np.argsort(starts, kind='stable')
+    for chunk_begin in range(0, len(order), chunk_size):
+        chunk = order[chunk_begin:chunk_begin + chunk_size]
+        chunk_starts = starts[chunk]
+        chunk_ends = ends[chunk]
+
+        # turns ending after the chunk begins and starting before it ends
+        lo = int(np.searchsorted(turn_max_ends, chunk_starts.min(), side='right'))
+        hi = int(np.searchsorted(turn_starts, chunk_ends.max(), side='left'))
+        # one long early turn keeps lo low for the rest of the file, so drop the turns in between that ended too
+        candidates = lo + np.flatnonzero(turn_ends[lo:hi] > chunk_starts.min())
+
+        # total overlap per speaker, then the speaker with the most of it
+        per_speaker = np.zeros((len(chunk), len(speaker_names)))
+        for tile_begin in range(0, len(candidates), turn_chunk_size):
+            tile = candidates[tile_begin:tile_begin + turn_chunk_size]
+            overlap = (np.minimum(chunk_ends[:, None], turn_ends[None, tile]) -
+                       np.maximum(chunk_starts[:, None], turn_starts[None, tile]))
+            np.clip(overlap, 0.0, None, out=overlap)
+            per_speaker += overlap @ turn_speakers[tile]
+
+        best = np.full(len(chunk), -1)
+        has_overlap = per_speaker.max(axis=1) > 0
+        best[has_overlap] = per_speaker[has_overlap].argmax(axis=1)
+
+        for position, interval in enumerate(chunk):
+            if best[position] >= 0:
+                speakers[interval] = speaker_names[best[position]]
+            else:
+                speakers[interval] = speaker_index.speaker_at(starts[interval])
+
+    return speakers
+
+def assign_speakers(result, diarization_result, speaker_index=None):
+    """Store the dominant speaker on every segment and word of a Whisper result.
+
+    Sets a 'speaker' key (None when no speaker is close enough) so display and
+    export code can read it directly instead of looking it up per timestamp.
+    """
+    segments = result.get('segments', []) if result else []
+    if not segments:
+        return
+    if speaker_index is None:
+        speaker_index = SpeakerIndex.from_annotation(diarization_result)
+
+    items = []
+    for segment in segments:
+        items.append(segment)
+        items.extend(segment.get('words', []))
+
+    speakers = assign_speakers_to_intervals([item['start'] for item in items],
+                                            [item['end'] for item in items],
+                                            speaker_index)
+    for item, speaker in zip(items, speakers):
+        item['speaker'] = speaker
+
+# Whisper and pyannote both work on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+def load_audio(file_path, sample_rate=SAMPLE_RATE, cancel_token=None):
+    """Decode any ffmpeg-readable file to a mono float32 array, read from ffmpeg's stdout"""
+    cmd = ['ffmpeg', '-nostdin', '-threads', '0', '-i', file_path,
+           '-vn', '-f', 'f32le', '-ac', '1', '-acodec', 'pcm_f32le', '-ar', str(sample_rate), '-']
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg not found - please install FFmpeg")
+    # cancelling kills ffmpeg, which ends communicate() right away
+    with cancel_token.on_cancel(process.kill) if cancel_token else contextlib.nullcontext():
+        stdout, stderr = process.communicate()
+    if cancel_token:
+        cancel_token.check()
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(stdout, dtype=np.float32)
+
+def diarization_input(audio, sample_rate=SAMPLE_RATE):
+    """Wrap decoded audio in the in-memory format pyannote pipelines accept"""
+    # from_numpy shares memory with the array, so no extra copy of the waveform
+    return {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": sample_rate}
+
+def run_diarization_pipeline(pipeline, audio, hook=None):
+    """Run a pyannote pipeline on decoded audio, passing hook to pyannote's per-step progress hook.
+
+    Pipelines without hook support (older pyannote versions) just run without it.
+    """
+    if hook is None:
+        return pipeline(diarization_input(audio))
+    try:
+        return pipeline(diarization_input(audio), hook=hook)
+    except TypeError as e:
+        if 'hook' not in str(e):
+            raise
+        return pipeline(diarization_input(audio))
+
+# pyannote's speaker diarization pipeline reports every segmentation and embedding batch
+# to its hook; clustering runs between the last embedding batch and the final
+# "discrete_diarization" step without reports. Share of the total time per stage:
+DIARIZATION_STAGE_RANGES = {'segmentation': (0.0, 0.3), 'embeddings': (0.3, 0.9), 'clustering': (0.9, 1.0)}
+
+class DiarizationProgress:
+    """pyannote pipeline hook that turns its step reports into real progress.
+
+    callback(stage, fraction, eta) receives the stage ('segmentation',
+    'embeddings' or 'clustering'), the fraction of the whole diarization done
+    (0-1) and the seconds left in the stage, estimated from the batches per
+    second measured so far (None until there is a measurement). Calls are
+    throttled to one per min_interval seconds, except when a stage starts or
+    ends. A cancel_token is checked on every report.
+    """
+    
+    def __init__(self, callback, cancel_token=None, min_interval=0.25):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.min_interval = min_interval
+        self.stage = None
+        self.stage_started = None
+        self.stage_first_completed = 0
+        self.last_report = 0.0
+    
+    def __call__(self, step_name, step_artifact=None, file=None, total=None, completed=None):
+        if self.cancel_token:
+            self.cancel_token.check()
+        if step_name == 'discrete_diarization':
+            self.report('clustering', 1.0, force=True)
+            return
+        if step_name not in DIARIZATION_STAGE_RANGES:
+            return  # e.g. speaker_counting, which is instant
+        if completed is None or not total:
+            # a step reporting its final artifact
+            if step_name == 'embeddings':
+                if self.stage != 'clustering':
+                    self.report('clustering', 0.0, force=True)
+            else:
+                self.report(step_name, 1.0, force=True)
+            return
+        
+        now = time.perf_counter()
+        if step_name != self.stage:
+            self.stage = step_name
+            self.stage_started = now
+            self.stage_first_completed = completed
+        eta = None
+        done = completed - self.stage_first_completed
+        if done > 0 and now > self.stage_started:
+            rate = done / (now - self.stage_started)
+            eta = (total - completed) / rate
+        self.report(step_name, completed / total, eta, force=completed in (0, total))
+        if step_name == 'embeddings' and completed >= total:
+            self.report('clustering', 0.0, force=True)
+    
+    def report(self, stage, stage_fraction, eta=None, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.min_interval:
+            return
+        self.last_report = now
+        self.stage = stage
+        start, end = DIARIZATION_STAGE_RANGES[stage]
+        # exactly the next stage's start at the end, so rounding never steps backwards
+        self.callback(stage, end if stage_fraction >= 1.0 else start + (end - start) * stage_fraction, eta)
+
+def diarization_progress_text(stage, fraction, eta):
+    """Status line for DiarizationProgress updates"""
+    text = f"Speaker diarization: {stage}... {fraction:.0%}"
+    if eta is not None:
+        text += f" (about {timedelta(seconds=int(eta))} left in this step)"
+    return text
+
+def split_cpu_threads(diarization_threads=None):
+    """Split torch's intra-op threads between diarization and transcription"""
+    total = max(2, torch.get_num_threads())
+    if not diarization_threads:
+        diarization_threads = total // 2
+    diarization_threads = min(max(1, diarization_threads), total - 1)
+    return diarization_threads, total - diarization_threads
+
+def run_phases_concurrently(diarize, transcribe, diarization_threads, transcription_threads):
+    """Run diarize() in a helper thread while transcribe() runs in the calling thread.
+
+    torch's OpenMP intra-op thread count is a per-thread setting, so each
+    phase sets its own share before starting. Returns (diarization_result,
+    transcription_result, diarization_error); the diarization thread is always
+    joined before returning, even if transcription fails.
+    """
+    outcome = {}
+    
+    def _diarize():
+        torch.set_num_threads(diarization_threads)
+        try:
+            outcome['result'] = diarize()
+        except Exception as e:
+            outcome['error'] = e
+    
+    original_threads = torch.get_num_threads()
+    diarization_thread = threading.Thread(target=_diarize, daemon=True)
+    diarization_thread.start()
+    try:
+        torch.set_num_threads(transcription_threads)
+        transcription_result = transcribe()
+    finally:
+        diarization_thread.join()
+        torch.set_num_threads(original_threads)
+    
+    return outcome.get('result'), transcription_result, outcome.get('error')
+
+class TranscriptionCancelled(Exception):
+    """Raised at the next cancellation point once a run's CancellationToken is cancelled"""
+
+class CancellationToken:
+    """Cancellation flag shared by the stages of one run.
+
+    Stages call check() between units of work (Whisper's 30 s windows, pyannote
+    batches, chunks); work that can't poll, like an ffmpeg process or chunk
+    workers, is stopped by callbacks registered with on_cancel().
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+    
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def check(self):
+        if self._event.is_set():
+            raise TranscriptionCancelled()
+    
+    @contextlib.contextmanager
+    def on_cancel(self, callback):
+        """Call callback if the run is cancelled while the with block runs (or already was)"""
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self._event.is_set()
+        if cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+# openai-whisper has no per-segment callback. Its transcribe loop extends a local
+# `all_segments` list right before every progress bar update, so a tqdm subclass
+# swapped into whisper.transcribe passes the new segments to the listener
+# registered by the calling thread.
+_segment_listener = threading.local()
+_segment_hook_lock = threading.Lock()
+_segment_hook_installed = False
+
+def install_segment_hook():
+    """Patch whisper.transcribe's progress bar once; False if this Whisper build can't be hooked"""
+    global _segment_hook_installed
+    with _segment_hook_lock:
+        if _segment_hook_installed:
+            return True
+        transcribe_module = sys.modules.get('whisper.transcribe')
+        tqdm_module = getattr(transcribe_module, 'tqdm', None)
+        if not isinstance(getattr(tqdm_module, 'tqdm', None), type):
+            return False
+        
+        class SegmentReportingTqdm(tqdm_module.tqdm):
+            def update(self, n=1):
+                callback = getattr(_segment_listener, 'callback', None)
+                if callback is not None:
+                    segments = sys._getframe(1).f_locals.get('all_segments')
+                    if isinstance(segments, list):
+                        callback(segments)
+                cancel_token = getattr(_segment_listener, 'cancel_token', None)
+                if cancel_token is not None:
+                    # between windows the model holds no decoding state, so it stays usable
+                    cancel_token.check()
+                return super().update(n)
+        
+        transcribe_module.tqdm = types.SimpleNamespace(tqdm=SegmentReportingTqdm)
+        _segment_hook_installed = True
+        return True
+
+def transcribe_streaming(model, audio, on_segment=None, cancel_token=None, **transcribe_params):
+    """model.transcribe that calls on_segment(segment) for every segment as soon as it is decoded.
+
+    With a cancel_token, cancelling stops the transcription after the current 30 s window.
+    """
+    if on_segment is None and cancel_token is None:
+        return model.transcribe(audio, **transcribe_params)
+    
+    reported = 0
+    
+    def report(segments):
+        nonlocal reported
+        if on_segment:
+            for segment in segments[reported:]:
+                on_segment(segment)
+        reported = len(segments)
+    
+    hooked = install_segment_hook()
+    _segment_listener.callback = report if hooked else None
+    _segment_listener.cancel_token = cancel_token if hooked else None
+    if cancel_token:
+        cancel_token.check()
+    try:
+        result = model.transcribe(audio, **transcribe_params)
+    finally:
+        _segment_listener.callback = None
+        _segment_listener.cancel_token = None
+    if cancel_token:
+        cancel_token.check()
+    # segments added after the last progress update (all of them if the hook is unavailable)
+    report(result['segments'])
+    return result
+
+def segment_jsonl_record(segment, speaker_index=None, source=None):
+    """JSON-ready view of one Whisper segment for --stream-jsonl"""
+    record = {'id': segment.get('id'), 'start': segment['start'], 'end': segment['end'],
+              'text': segment['text'].strip()}
+    speaker = segment.get('speaker')
+    if speaker is None and speaker_index is not None:
+        speaker = assign_speakers_to_intervals([segment['start']], [segment['end']], speaker_index)[0]
+    if speaker is not None:
+        record['speaker'] = speaker
+    
+    words = segment.get('words')
+    if words:
+        word_speakers = [word.get('speaker') for word in words]
+        if speaker_index is not None and 'speaker' not in words[0]:
+            word_speakers = assign_speakers_to_intervals([w['start'] for w in words], [w['end'] for w in words],
+                                                         speaker_index)
+        record['words'] = []
+        for word, word_speaker in zip(words, word_speakers):
+            entry = {'word': word['word'], 'start': word['start'], 'end': word['end'],
+                     'probability': word.get('probability')}
+            if word_speaker is not None:
+                entry['speaker'] = word_speaker
+            record['words'].append(entry)
+    
+    if source:
+        record['input'] = source
+    return record
+
+# real stdout while --stream-jsonl is active (everything else printed goes to stderr)
+_jsonl_stream = None
+
+def start_jsonl_stream():
+    """Reserve stdout for JSONL records and send all other output to stderr"""
+    global _jsonl_stream
+    if _jsonl_stream is None:
+        _jsonl_stream = sys.stdout
+        sys.stdout = sys.stderr
+
+def write_jsonl_record(record):
+    _jsonl_stream.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+    _jsonl_stream.flush()
+
+# --input - keeps at most one window of audio in memory. A segment is final once it
+# ends STREAM_TAIL_SECONDS before the window edge (later audio can't change it); the
+# audio after the last final segment is carried over into the next window.
+STREAM_WINDOW_SECONDS = 30.0
+STREAM_TAIL_SECONDS = 5.0
+STREAM_PROMPT_CHARS = 200  # finalized text passed on as initial_prompt for context
+
+def open_stdin_decoder(input_format=None, sample_rate=SAMPLE_RATE):
+    """Start ffmpeg decoding our stdin to mono float32 on its stdout"""
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-threads', '0']
+    if input_format:
+        # headerless PCM needs FORMAT[:RATE[:CHANNELS]], e.g. s16le:16000:1
+        fmt, _, rest = input_format.partition(':')
+        rate, _, channels = rest.partition(':')
+        cmd += ['-f', fmt]
+        if rate:
+            cmd += ['-ar', rate]
+        if channels:
+            cmd += ['-ac', channels]
+    cmd += ['-i', 'pipe:0', '-vn', '-f', 'f32le', '-ac', '1', '-acodec', 'pcm_f32le', '-ar', str(sample_rate),
+            'pipe:1']
+    try:
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg not found - please install FFmpeg")
+
+def read_pcm_samples(stream, count):
+    """Read up to count float32 samples from a byte stream; fewer only at end of stream"""
+    wanted = count * 4
+    data = bytearray()
+    while len(data) < wanted:
+        chunk = stream.read(wanted - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return np.frombuffer(bytes(data[:len(data) - len(data) % 4]), dtype=np.float32)
+
+def iter_rolling_transcription(model, stream, transcribe_params, window_seconds=STREAM_WINDOW_SECONDS,
+                               sample_rate=SAMPLE_RATE):
+    """Transcribe a float32 PCM byte stream window by window, yielding finalized segments.
+    
+    Segment and word times are shifted to stream time and ids count up across
+    windows. Memory stays at one window however long the stream runs.
+    """
+    window = int(window_seconds * sample_rate)
+    tail = min(STREAM_TAIL_SECONDS, window_seconds / 3)
+    params = dict(transcribe_params)
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0.0
+    segment_id = 0
+    eof = False
+    
+    while not eof:
+        wanted = window - len(buffer)
+        samples = read_pcm_samples(stream, wanted)
+        eof = len(samples) < wanted
+        buffer = np.concatenate([buffer, samples])
+        if not len(buffer):
+            break
+        
+        duration = len(buffer) / sample_rate
+        result = model.transcribe(buffer, **params)
+        if 'language' not in params and result.get('language'):
+            # keep the language detected in the first window instead of re-detecting per window
+            params['language'] = result['language']
+        segments = result['segments']
+        
+        if eof:
+            final = segments
+            consumed = duration
+        else:
+            final = [segment for segment in segments if segment['end'] <= duration - tail]
+            if not final and segments:
+                # one long segment running into the edge: keep only the last one open
+                final = segments[:-1] or segments
+            consumed = final[-1]['end'] if final else 0.0
+            if consumed <= 0:
+                # nothing usable (silence); drop all but the tail
+                consumed = duration - tail
+        
+        for segment in final:
+            shifted = dict(segment, id=segment_id, start=segment['start'] + offset, end=segment['end'] + offset)
+            if segment.get('words'):
+                shifted['words'] = [dict(word, start=word['start'] + offset, end=word['end'] + offset)
+                                    for word in segment['words']]
+            segment_id += 1
+            yield shifted
+        
+        if final:
+            prompt = ' '.join(segment['text'].strip() for segment in final)
+            params['initial_prompt'] = prompt[-STREAM_PROMPT_CHARS:]
+        cut = min(len(buffer), int(consumed * sample_rate))
+        buffer = buffer[cut:].copy()
+        offset += cut / sample_rate
+
+# Long-file mode: model.transcribe conditions every 30 s window on the previous one, so one
+# file can't be split across workers inside Whisper. Instead the audio is cut at quiet
+# points into chunks of about --chunk-minutes, the chunks are transcribed in parallel
+# worker processes and their segments are stitched back onto the global timeline.
+DEFAULT_CHUNK_MINUTES = 10
+MIN_CHUNK_SECONDS = 30.0  # one Whisper window; shorter chunks only add overhead and leave no room to search for a cut
+CHUNK_SEARCH_SECONDS = 30.0  # look this far either side of each target cut for a quiet spot
+CHUNK_QUIET_SECONDS = 0.5  # length of the quietest stretch a cut is placed in
+CHUNK_FRAME_SECONDS = 0.03
+# each chunk gets this much audio past its cuts, so a word at the boundary is heard whole;
+# a segment is kept by the chunk it starts in, unless the chunk before already covers it
+CHUNK_OVERLAP_SECONDS = 1.0
+
+def default_chunk_workers():
+    return max(1, min(4, (os.cpu_count() or 1) // 4))
+
+def find_chunk_boundaries(audio, chunk_seconds, sample_rate=SAMPLE_RATE):
+    """Split audio into (start, end) sample ranges of about chunk_seconds, cut at the quietest nearby moment"""
+    chunk = int(max(chunk_seconds, MIN_CHUNK_SECONDS) * sample_rate)
+    search = int(CHUNK_SEARCH_SECONDS * sample_rate)
+    frame = int(CHUNK_FRAME_SECONDS * sample_rate)
+    span = max(1, int(CHUNK_QUIET_SECONDS / CHUNK_FRAME_SECONDS))
+    cuts = [0]
+    # the last chunk is at least half a chunk long
+    while len(audio) - cuts[-1] > chunk * 3 // 2:
+        target = cuts[-1] + chunk
+        lo = target - min(search, chunk // 2)
+        hi = target + min(search, chunk // 2)
+        # RMS energy per frame, only around the target, so long files are never copied whole
+        frames = len(audio[lo:hi]) // frame
+        energy = np.sqrt(np.mean(audio[lo:lo + frames * frame].reshape(frames, frame) ** 2, axis=1))
+        if frames > span:
+            energy = np.convolve(energy, np.ones(span) / span, mode='valid')
+        # the quietest stretch closest to the target, cut in the middle of the pause around it
+        quiet = energy <= energy.min() * 1.5 + 1e-4
+        candidates = np.flatnonzero(quiet)
+        best = int(candidates[np.argmin(np.abs(candidates - (target - lo) // frame))])
+        left = right = best
+        while left > 0 and quiet[left - 1]:
+            left -= 1
+        while right < len(quiet) - 1 and quiet[right + 1]:
+            right += 1
+        cuts.append(lo + ((left + right) // 2 + min(span, frames) // 2) * frame)
+    cuts.append(len(audio))
+    return list(zip(cuts[:-1], cuts[1:]))
+
+def detect_audio_language(model, audio):
+    """Language code Whisper detects in the first 30 seconds, as transcribe() itself does"""
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+def stitch_chunk_segments(segments, result, core_end, offset, last):
+    """Shift one chunk's segments to the global timeline and append those it owns; returns the new ones.
+
+    A segment is owned if it starts before the chunk's end cut and is not
+    already covered by the segments stitched so far (its midpoint lies past
+    their end). Both chunks at a cut are judged against the same stitched
+    timeline, so a segment they time differently is kept exactly once.
+    """
+    added = []
+    for segment in result['segments']:
+        start = segment['start'] + offset
+        end = segment['end'] + offset
+        if start >= core_end and not last:
+            continue  # decoded from the overlap, the next chunk owns it
+        if segments and (start + end) / 2 < segments[-1]['end']:
+            continue  # decoded from the overlap, the chunk before already has it
+        if segments and start < segments[-1]['end']:
+            start = segments[-1]['end']
+        shifted = dict(segment, id=len(segments), start=start, end=max(start, end))
+        if 'seek' in segment:
+            shifted['seek'] = segment['seek'] + int(round(offset * 100))  # mel frames
+        if segment.get('words'):
+            # words clamped with their segment, so they never start before it or overlap the words before it
+            words = []
+            for word in segment['words']:
+                word_start = max(start, word['start'] + offset)
+                words.append(dict(word, start=word_start, end=max(word_start, word['end'] + offset)))
+            shifted['words'] = words
+        segments.append(shifted)
+        added.append(shifted)
+    return added
+
+# per-process state for chunk workers (set by _init_chunk_worker)
+_chunk_worker_state = {}
+
+def _init_chunk_worker(model_name, threads):
+    """Process pool initializer: pin torch threads and load the Whisper model once per worker"""
+    torch.set_num_threads(threads)
+    _chunk_worker_state['model'] = whisper.load_model(model_name)
+
+def _transcribe_chunk_worker(audio, transcribe_params):
+    return _chunk_worker_state['model'].transcribe(audio, **transcribe_params)
+
+def transcribe_chunked(model, model_name, audio, chunk_minutes, workers=None, on_segment=None,
+                       progress_callback=None, threads_per_worker=None, sample_rate=SAMPLE_RATE,
+                       cancel_token=None, **transcribe_params):
+    """Transcribe audio as parallel chunks (see find_chunk_boundaries) and return one stitched result.
+
+    model is only used to detect the language once for all chunks (and to run the
+    chunks in-process when workers is 1). Segments reach on_segment in timeline
+    order as soon as every chunk before them is done; progress_callback(done, total)
+    is called per finished chunk. Cancelling cancel_token kills the chunk workers.
+    """
+    workers = workers or default_chunk_workers()
+    boundaries = find_chunk_boundaries(audio, chunk_minutes * 60, sample_rate)
+    params = dict(transcribe_params, verbose=None)  # workers would interleave their console output
+    if not params.get('language'):
+        # one language for every chunk, detected like a sequential run would
+        params['language'] = detect_audio_language(model, audio)
+    overlap = int(CHUNK_OVERLAP_SECONDS * sample_rate)
+    padded = [(max(0, start - overlap), min(len(audio), end + overlap)) for start, end in boundaries]
+    
+    completed = 0
+    completed_lock = threading.Lock()
+    
+    def chunk_done(_=None):
+        nonlocal completed
+        with completed_lock:
+            completed += 1
+            done = completed
+        if progress_callback:
+            progress_callback(done, len(boundaries))
+    
+    executor = None
+    if workers > 1 and len(boundaries) > 1:
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        # spawn gives every worker a clean interpreter (forking a process with torch threads can hang)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(boundaries)),
+                                                          mp_context=multiprocessing.get_context('spawn'),
+                                                          initializer=_init_chunk_worker,
+                                                          initargs=(model_name, threads))
+    try:
+        if executor:
+            futures = [executor.submit(_transcribe_chunk_worker, audio[start:end], params) for start, end in padded]
+            for future in futures:
+                future.add_done_callback(chunk_done)
+            results = (future.result() for future in futures)
+        else:
+            def run_in_process():
+                for start, end in padded:
+                    result = transcribe_streaming(model, audio[start:end], None, cancel_token, **params)
+                    chunk_done()
+                    yield result
+            results = run_in_process()
+        
+        def kill_chunk_workers():
+            # no chunk that hasn't started will run; a running one can't be interrupted inside the pool,
+            # so its worker processes are killed (_processes is private and may be gone or already None)
+            processes = list((getattr(executor, '_processes', None) or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.kill()
+        
+        segments = []
+        with cancel_token.on_cancel(kill_chunk_workers) if executor and cancel_token else contextlib.nullcontext():
+            try:
+                for index, result in enumerate(results):
+                    added = stitch_chunk_segments(segments, result, boundaries[index][1] / sample_rate,
+                                                  padded[index][0] / sample_rate, index == len(boundaries) - 1)
+                    if on_segment:
+                        for segment in added:
+                            on_segment(segment)
+            except (concurrent.futures.BrokenExecutor, concurrent.futures.CancelledError):
+                if cancel_token:
+                    cancel_token.check()
+                raise
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+    
+    return {'text': ''.join(segment['text'] for segment in segments), 'segments': segments,
+            'language': params['language']}
+
+# Checkpointed mode: the audio is cut at pauses into windows of about --checkpoint-minutes
+# that are transcribed one after another, each prompted with the end of the text before
+# it. After every window the segments so far, the decode position and that prompt are
+# saved to a sidecar file, so an interrupted run continues from the last finished window
+# and merges to the same result an uninterrupted run gives.
+DEFAULT_CHECKPOINT_MINUTES = 5
+CHECKPOINT_VERSION = 1
+
+def checkpoint_path(input_path):
+    return input_path + ".whisper-checkpoint.json"
+
+def checkpoint_key(audio, model_name, window_minutes, transcribe_params):
+    """Identity of a checkpointed run: the audio, the model, the window size and the decoding options"""
+    params = {key: value for key, value in transcribe_params.items() if key != 'verbose'}
+    payload = json.dumps([audio_content_hash(audio), model_name, window_minutes, params],
+                         sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_checkpoint(path, key):
+    """Saved state of the run identified by key, or None if there is none (or it belongs to another run)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if state.get('version') != CHECKPOINT_VERSION or state.get('key') != key:
+        print(f"Note: {path} is from a different model, options or audio; starting over")
+        return None
+    return state
+
+def save_checkpoint(path, state):
+    """Write the checkpoint atomically, so a crash mid-write leaves the previous one intact"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=_json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def transcribe_checkpointed(model, model_name, audio, path, window_minutes=DEFAULT_CHECKPOINT_MINUTES,
+                            on_segment=None, progress_callback=None, sample_rate=SAMPLE_RATE,
+                            **transcribe_params):
+    """Transcribe audio window by window, checkpointing to path after each one (see above).
+
+    A checkpoint left at path by the same run is resumed; the file is removed once
+    the whole audio is done. Segments reach on_segment window by window and
+    progress_callback(done, total) is called per finished window.
+    """
+    boundaries = find_chunk_boundaries(audio, window_minutes * 60, sample_rate)
+    params = dict(transcribe_params, verbose=None)  # window-relative times would only confuse
+    key = checkpoint_key(audio, model_name, window_minutes, params)
+    state = load_checkpoint(path, key)
+    if state:
+        print(f"Resuming from checkpoint: {state['next_window']}/{len(boundaries)} windows "
+              f"({timedelta(seconds=int(state['position']))} of "
+              f"{timedelta(seconds=int(len(audio) / sample_rate))}) already transcribed")
+        if on_segment:
+            for segment in state['segments']:
+                on_segment(segment)
+    else:
+        if not params.get('language'):
+            # one language for every window, detected like a sequential run would
+            params['language'] = detect_audio_language(model, audio)
+        state = {'version': CHECKPOINT_VERSION, 'key': key, 'windows': len(boundaries), 'next_window': 0,
+                 'position': 0.0, 'language': params['language'], 'prompt': params.get('initial_prompt'),
+                 'segments': []}
+    params['language'] = state['language']
+    segments = state['segments']
+    
+    for index in range(state['next_window'], len(boundaries)):
+        start, end = boundaries[index]
+        window_params = dict(params)
+        if state['prompt']:
+            window_params['initial_prompt'] = state['prompt']
+        # temperature fallback samples; a fixed seed per window decodes it the same way on every run,
+        # and forking the RNG keeps that seed from changing anyone else's random state in this process
+        with torch.random.fork_rng():
+            torch.manual_seed(index)
+            result = model.transcribe(audio[start:end], **window_params)
+        added = stitch_chunk_segments(segments, result, end / sample_rate, start / sample_rate,
+                                      index == len(boundaries) - 1)
+        text = ' '.join(segment['text'].strip() for segment in segments[-50:])
+        state.update(next_window=index + 1, position=end / sample_rate,
+                     prompt=text[-STREAM_PROMPT_CHARS:] or state['prompt'])
+        try:
+            save_checkpoint(path, state)
+        except OSError as e:
+            print(f"Warning: could not save checkpoint {path}: {e}")
+        if on_segment:
+            for segment in added:
+                on_segment(segment)
+        if progress_callback:
+            progress_callback(index + 1, len(boundaries))
+    
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return {'text': ''.join(segment['text'] for segment in segments), 'segments': segments,
+            'language': state['language']}
+
+# Voice activity pre-filter: only speech regions are passed to Whisper, joined by a short
+# silence, and timestamps are mapped back to the original recording afterwards
+VAD_FRAME_SECONDS = 0.03
+VAD_SPEECH_DBFS = -35.0  # frames at least this loud always count as speech
+VAD_PAD_SECONDS = 0.3  # kept around every region so word onsets and endings aren't clipped
+VAD_MIN_GAP_SECONDS = 1.0  # shorter pauses stay in
+VAD_MIN_SPEECH_SECONDS = 0.2
+VAD_JOIN_SECONDS = 0.2  # silence inserted between regions in the compacted audio
+
+class SpeechMap:
+    """Speech regions of a recording and the mapping from the compacted (speech-only) timeline back to it"""
+    
+    def __init__(self, regions, duration, source, sample_rate=SAMPLE_RATE):
+        self.duration = duration
+        self.source = source
+        self.sample_rate = sample_rate
+        self.regions = []
+        for start, end in sorted(regions):
+            start = max(0.0, start - VAD_PAD_SECONDS)
+            end = min(duration, end + VAD_PAD_SECONDS)
+            if self.regions and start - self.regions[-1][1] < VAD_MIN_GAP_SECONDS:
+                self.regions[-1] = (self.regions[-1][0], max(self.regions[-1][1], end))
+            elif end - start >= VAD_MIN_SPEECH_SECONDS:
+                self.regions.append((start, end))
+        # start of every region on the compacted timeline
+        self.compact_starts = []
+        position = 0.0
+        for start, end in self.regions:
+            self.compact_starts.append(position)
+            position += end - start + VAD_JOIN_SECONDS
+    
+    @classmethod
+    def from_audio(cls, audio, sample_rate=SAMPLE_RATE):
+        """Energy-based detection: frames well above the recording's noise floor are speech"""
+        frame = int(VAD_FRAME_SECONDS * sample_rate)
+        frames = len(audio) // frame
+        energy = np.empty(frames, dtype=np.float32)
+        block = 20000  # frames per step, so long recordings are never squared as a whole
+        for i in range(0, frames, block):
+            n = min(block, frames - i)
+            energy[i:i + n] = np.sqrt(np.mean(audio[i * frame:(i + n) * frame].reshape(n, frame) ** 2, axis=1))
+        if not frames:
+            return cls([], len(audio) / sample_rate, 'energy', sample_rate)
+        noise_floor = float(np.percentile(energy, 10))
+        threshold = min(max(noise_floor * 2, 1e-4), 10 ** (VAD_SPEECH_DBFS / 20))
+        speech = np.concatenate([[False], energy > threshold, [False]])
+        edges = np.flatnonzero(speech[1:] != speech[:-1])
+        regions = [(int(start) * VAD_FRAME_SECONDS, int(end) * VAD_FRAME_SECONDS)
+                   for start, end in zip(edges[::2], edges[1::2])]
+        return cls(regions, len(audio) / sample_rate, 'energy', sample_rate)
+    
+    @classmethod
+    def from_annotation(cls, annotation, duration, sample_rate=SAMPLE_RATE):
+        """Reuse a diarization result: anywhere a speaker talks is speech (music and noise get no turns)"""
+        regions = [(segment.start, segment.end) for segment in annotation.get_timeline().support()]
+        return cls(regions, duration, 'diarization', sample_rate)
+    
+    @property
+    def speech_duration(self):
+        return sum(end - start for start, end in self.regions)
+    
+    def compact(self, audio):
+        """Speech-only audio for Whisper"""
+        join = np.zeros(int(VAD_JOIN_SECONDS * self.sample_rate), dtype=audio.dtype)
+        parts = []
+        for start, end in self.regions:
+            parts.append(audio[int(start * self.sample_rate):int(end * self.sample_rate)])
+            parts.append(join)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=audio.dtype)
+    
+    def to_original(self, t):
+        """Map a time on the compacted timeline to the original recording"""
+        if not self.regions:
+            return t
+        index = max(0, bisect.bisect_right(self.compact_starts, t) - 1)
+        start, end = self.regions[index]
+        # times inside the inserted join belong to the end of the region before it
+        return min(start + t - self.compact_starts[index], end)
+    
+    def map_segment(self, segment):
+        mapped = dict(segment, start=self.to_original(segment['start']), end=self.to_original(segment['end']))
+        if segment.get('words'):
+            mapped['words'] = [dict(word, start=self.to_original(word['start']), end=self.to_original(word['end']))
+                               for word in segment['words']]
+        return mapped
+    
+    def map_result(self, result):
+        result['segments'] = [self.map_segment(segment) for segment in result['segments']]
+        return result
+    
+    def summary_text(self):
+        skipped = self.duration - self.speech_duration
+        ratio = self.duration / max(self.speech_duration, 1e-9)
+        return (f"skipped {timedelta(seconds=int(skipped))} of {timedelta(seconds=int(self.duration))} "
+                f"({skipped / max(self.duration, 1e-9):.0%}) as non-speech ({self.source}), "
+                f"~{ratio:.1f}x less audio to decode")
+
+def transcribe_speech_only(transcribe, audio, speech_map, on_segment=None):
+    """Run transcribe(audio, on_segment) on the speech regions only and return the result on the original timeline"""
+    def report_mapped(segment):
+        on_segment(speech_map.map_segment(segment))
+    mapped_callback = report_mapped if on_segment else None
+    if not speech_map.regions:
+        return {'text': '', 'segments': [], 'language': None}
+    return speech_map.map_result(transcribe(speech_map.compact(audio), mapped_callback))
+
+# Persistent caches live here unless WHISPER_CACHE_DIR is set (e.g. in .env)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "whisper_gui")
+DEFAULT_CACHE_SIZE_MB = 2048
+
+def get_cache_dir():
+    """Base directory for the on-disk caches"""
+    return os.getenv('WHISPER_CACHE_DIR') or DEFAULT_CACHE_DIR
+
+def audio_content_hash(audio):
+    """Hash of the decoded samples, so the same audio in any container maps to one key"""
+    return hashlib.sha256(np.ascontiguousarray(audio).data).hexdigest()
+
+def _json_default(value):
+    # numpy scalars/arrays that may appear in Whisper results
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class LRUDiskCache:
+    """Directory of cache entries with size-based LRU eviction (file mtime = last use)"""
+
+    def __init__(self, directory, max_bytes, suffix, refresh=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.refresh = refresh  # ignore existing entries but still store new ones
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def read(self, key):
+        """Return the stored text for key, or None on a miss"""
+        path = self.path_for(key)
+        if not self.refresh:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                os.utime(path)  # mark as recently used
+                with self._lock:
+                    self.hits += 1
+                return text
+            except OSError:
+                pass
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def write(self, key, text):
+        """Store text under key atomically, then evict old entries over the budget"""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        """List (mtime, size, path) for every entry, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats_text(self):
+        return f"{self.hits} hits, {self.misses} misses"
+
+class ResultCache(LRUDiskCache):
+    """Whisper transcription results keyed by audio content, model and decode options"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024, refresh=False):
+        directory = directory or os.path.join(get_cache_dir(), "transcripts")
+        super().__init__(directory, max_bytes, ".json", refresh)
+
+    @staticmethod
+    def make_key(audio_hash, model_name, transcribe_params):
+        # verbose only changes console output, not the result
+        params = {k: v for k, v in transcribe_params.items() if k != 'verbose'}
+        payload = json.dumps({'audio': audio_hash, 'model': model_name, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        text = self.read(key)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None  # corrupt entry; it will be overwritten
+
+    def put(self, key, result):
+        self.write(key, json.dumps(result, ensure_ascii=False, default=_json_default))
+
+DIARIZATION_PIPELINE_NAME = "pyannote/speaker-diarization-3.1"
+
+def get_diarization_pipeline_version():
+    """Installed pyannote.audio version, part of the diarization cache key"""
+    try:
+        return importlib.metadata.version('pyannote.audio')
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+class DiarizationCache(LRUDiskCache):
+    """pyannote diarization results stored as RTTM, keyed by audio content and pipeline version"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024, refresh=False):
+        directory = directory or os.path.join(get_cache_dir(), "diarization")
+        super().__init__(directory, max_bytes, ".rttm", refresh)
+
+    @staticmethod
+    def make_key(audio_hash, pipeline_name=DIARIZATION_PIPELINE_NAME, pipeline_version=None):
+        pipeline_version = pipeline_version or get_diarization_pipeline_version()
+        payload = json.dumps({'audio': audio_hash, 'pipeline': pipeline_name, 'version': pipeline_version},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        text = self.read(key)
+        if text is None:
+            return None
+        try:
+            return self.annotation_from_rttm(text)
+        except (ValueError, IndexError):
+            return None  # corrupt entry; it will be overwritten
+
+    def put(self, key, annotation):
+        self.write(key, self.annotation_to_rttm(annotation, uri=key[:16]))
+
+    @staticmethod
+    def annotation_to_rttm(annotation, uri='audio'):
+        lines = []
+        for turn, _, speaker in annotation.itertracks(yield_label=True):
+            lines.append(f"SPEAKER {uri} 1 {turn.start:.6f} {turn.end - turn.start:.6f} "
+                         f"<NA> <NA> {speaker} <NA> <NA>\n")
+        return ''.join(lines)
+
+    @staticmethod
+    def annotation_from_rttm(text):
+        from pyannote.core import Annotation, Segment
+        
+        annotation = Annotation()
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0] != 'SPEAKER':
+                continue
+            annotation.uri = fields[1]
+            start, duration = float(fields[3]), float(fields[4])
+            segment = Segment(start, start + duration)
+            annotation[segment, annotation.new_track(segment)] = fields[7]
+        return annotation
+
+WHISPER_MODELS = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3", "turbo"]
+
+# RAM budget for models kept loaded at once (WHISPER_MODEL_BUDGET_MB in .env overrides it)
+DEFAULT_MODEL_BUDGET_MB = 8192
+
+def get_model_budget_mb():
+    try:
+        return int(os.getenv('WHISPER_MODEL_BUDGET_MB', DEFAULT_MODEL_BUDGET_MB))
+    except ValueError:
+        return DEFAULT_MODEL_BUDGET_MB
+
+def estimate_model_bytes(obj, _seen=None, _depth=0):
+    """Bytes held by the torch parameters and buffers reachable from obj (a model or a pipeline)"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or _depth > 3:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, torch.nn.Module):
+        tensors = list(obj.parameters()) + list(obj.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    # pipelines aren't modules themselves but hold their models as attributes
+    values = []
+    if isinstance(obj, dict):
+        values = list(obj.values())
+    elif isinstance(obj, (list, tuple)):
+        values = list(obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        values = list(vars(obj).values())
+    return sum(estimate_model_bytes(value, seen, _depth + 1) for value in values)
+
+def format_bytes(size):
+    return f"{size / 1024 ** 3:.1f} GB" if size >= 1024 ** 3 else f"{size / 1024 ** 2:.0f} MB"
+
+class ModelCache:
+    """Loaded models kept in memory under a byte budget, least recently used evicted first.
+
+    The model just requested, keys in pinned (models in use) and any keys
+    passed as keep are never evicted, even if that leaves the total over
+    budget. on_evict(key) lets the owner drop its own references so the
+    memory is actually freed.
+    """
+    
+    def __init__(self, max_bytes, on_evict=None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.entries = {}  # key -> [model, bytes], least recently used first
+        self.loading = {}  # key -> Event set when its load finishes
+        self.pinned = set()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+    
+    def get(self, key, loader, keep=(), pin=False):
+        """Return the resident model for key, calling loader() to load it if needed.
+
+        A second caller asking for a model that is already being loaded waits
+        for that load instead of loading the weights twice; different models
+        load independently. pin=True adds key to pinned under the same lock,
+        so no other thread can evict the model before the caller holds it.
+        """
+        while True:
+            with self.lock:
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.hits += 1
+                    self.entries[key] = entry
+                    if pin:
+                        self.pinned.add(key)
+                    return entry[0]
+                pending = self.loading.get(key)
+                if pending is None:
+                    pending = self.loading[key] = threading.Event()
+                    break
+            pending.wait()  # then take it from entries, or load it ourselves if that load failed
+        
+        try:
+            model = loader()
+            with self.lock:
+                self.loads += 1
+                self.entries[key] = [model, estimate_model_bytes(model)]
+                if pin:
+                    self.pinned.add(key)
+        finally:
+            with self.lock:
+                del self.loading[key]
+            pending.set()
+        self.evict(keep=(key,) + tuple(keep))
+        return model
+    
+    def unpin(self, keys=None):
+        """Release pinned keys (default: all of them), making them evictable again"""
+        with self.lock:
+            if keys is None:
+                self.pinned.clear()
+            else:
+                self.pinned.difference_update(keys)
+    
+    def is_loading(self, key):
+        with self.lock:
+            return key in self.loading
+    
+    def peek(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[0] if entry else None
+    
+    def evict(self, max_bytes=None, keep=()):
+        """Drop least recently used models until the total fits max_bytes (default: the budget)"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+        with self.lock:
+            for key in list(self.entries):
+                if self.total_bytes() <= limit:
+                    break
+                if key not in keep and key not in self.pinned:
+                    del self.entries[key]
+                    evicted.append(key)
+        for key in evicted:
+            if self.on_evict:
+                self.on_evict(key)
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return evicted
+    
+    def total_bytes(self):
+        with self.lock:
+            return sum(entry[1] for entry in self.entries.values())
+    
+    def resident(self):
+        """(key, bytes) pairs, most recently used last"""
+        with self.lock:
+            return [(key, entry[1]) for key, entry in self.entries.items()]
+    
+    def stats_text(self):
+        return (f"{len(self.entries)} models, {format_bytes(self.total_bytes())} of "
+                f"{format_bytes(self.max_bytes)}, {self.hits} hits, {self.loads} loads")
+
+# backend name recorded with every translation memory entry
+GOOGLETRANS_BACKEND = "googletrans"
+
+def transcript_language(result, transcribe_params):
+    """Language of the transcript text, i.e. the source language for subtitle translation"""
+    if transcribe_params and transcribe_params.get('task') == 'translate':
+        return 'en'
+    return (result or {}).get('language') or 'auto'
+
+def normalize_translation_text(text):
+    """Collapse whitespace so trivially different segments share one memory entry"""
+    return ' '.join(text.split())
+
+class TranslationMemory:
+    """Persistent SQLite store of translations.
+
+    Keyed by (hash of normalized source text, source language, target
+    language, backend), so recurring phrases and re-exports are translated
+    once. Safe to share between threads and batch worker processes.
+    """
+
+    def __init__(self, path=None, refresh=False):
+        self.path = path or os.path.join(get_cache_dir(), "translations.sqlite")
+        self.refresh = refresh  # ignore stored translations but still record new ones
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source_hash TEXT NOT NULL,"
+                " source_lang TEXT NOT NULL,"
+                " target_lang TEXT NOT NULL,"
+                " backend TEXT NOT NULL,"
+                " source_text TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (source_hash, source_lang, target_lang, backend))")
+            self._conn.commit()
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(normalize_translation_text(text).encode('utf-8')).hexdigest()
+
+    def lookup(self, text, source_lang, target_lang, backend=GOOGLETRANS_BACKEND):
+        """Return the stored translation, or None on a miss"""
+        row = None
+        if not self.refresh:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT translation FROM translations"
+                    " WHERE source_hash = ? AND source_lang = ? AND target_lang = ? AND backend = ?",
+                    (self.text_hash(text), source_lang, target_lang, backend)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def store(self, text, translation, source_lang, target_lang, backend=GOOGLETRANS_BACKEND):
+        self.store_many([(text, translation)], source_lang, target_lang, backend)
+    
+    def store_many(self, pairs, source_lang, target_lang, backend=GOOGLETRANS_BACKEND):
+        """Store (text, translation) pairs in one transaction, so one commit (and fsync) per call"""
+        now = time.time()
+        rows = [(self.text_hash(text), source_lang, target_lang, backend, normalize_translation_text(text),
+                 translation, now) for text, translation in pairs]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def clear(self):
+        """Delete every stored translation; returns the number removed"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM translations").rowcount
+            self._conn.commit()
+        return removed
+
+    def stats_text(self):
+        return f"{self.hits} hits, {self.misses} misses"
+
+# googletrans/Google Translate rejects requests much above 5000 characters
+TRANSLATION_BATCH_CHARS = 4500
+TRANSLATION_BATCH_ITEMS = 100
+# segments are normalized to a single line, so a newline survives translation as a boundary
+TRANSLATION_SEPARATOR = "\n"
+
+# translation engine limits; googletrans gets throttled quickly above a few parallel requests
+TRANSLATION_CONCURRENCY = 4
+TRANSLATION_MAX_RETRIES = 5
+TRANSLATION_BACKOFF_BASE = 1.0  # seconds, doubled per attempt
+TRANSLATION_BACKOFF_MAX = 30.0
+TRANSLATION_TIMEOUT = 60.0
+
+def is_retryable_translation_error(error):
+    """Rate limiting and transient network failures are worth another attempt"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status in (429, 503):
+        return True
+    if type(error).__name__ in ('ReadTimeout', 'ConnectTimeout', 'ConnectError', 'RemoteProtocolError'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message
+
+class TranslationUnavailable(RuntimeError):
+    """A backend cannot translate a language pair at all (missing library or language package)"""
+
+class TranslationBackend(abc.ABC):
+    """Interface implemented by every translation backend.
+
+    translate() may be a plain or an async method; plain ones run on the
+    engine's thread pool. The class attributes tell TranslationBatcher how
+    much text fits in one request and TranslationEngine how many requests
+    to keep in flight.
+    """
+
+    name = None
+    description = None
+    max_batch_chars = TRANSLATION_BATCH_CHARS
+    max_batch_items = TRANSLATION_BATCH_ITEMS
+    max_concurrency = TRANSLATION_CONCURRENCY
+
+    @classmethod
+    def unavailable_reason(cls):
+        """None if the backend can be used here, otherwise a message for the user"""
+        return None
+
+    @classmethod
+    def limits_text(cls):
+        return (f"{cls.max_batch_chars} chars / {cls.max_batch_items} segments per request, "
+                f"{cls.max_concurrency} concurrent")
+
+    def prepare(self, source_lang, target_lang):
+        """Load whatever a language pair needs; raises TranslationUnavailable"""
+
+    @abc.abstractmethod
+    def translate(self, text, source_lang, target_lang):
+        """Translated text; lines of text stay on their own lines"""
+
+class GoogletransBackend(TranslationBackend):
+    name = GOOGLETRANS_BACKEND
+    description = "Google Translate through googletrans (online)"
+
+    def __init__(self):
+        self._client = None
+        self._client_loop = None
+
+    @classmethod
+    def unavailable_reason(cls):
+        if not GOOGLETRANS_AVAILABLE:
+            return "Google Translate library not available. Please install googletrans."
+        return None
+
+    def prepare(self, source_lang, target_lang):
+        reason = self.unavailable_reason()
+        if reason:
+            raise TranslationUnavailable(reason)
+
+    async def translate(self, text, source_lang, target_lang):
+        # the source is left to Google's detection: Whisper codes such as "zh" are not all valid there
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # created on the engine loop and reused, so connections are kept alive
+            from googletrans import Translator
+            self._client = Translator()
+            self._client_loop = loop
+        if asyncio.iscoroutinefunction(self._client.translate):
+            result = await self._client.translate(text, dest=target_lang)
+        else:
+            # googletrans 3.x is synchronous
+            result = await loop.run_in_executor(None, lambda: self._client.translate(text, dest=target_lang))
+        return result.text if hasattr(result, 'text') else str(result)
+
+class ArgosBackend(TranslationBackend):
+    name = "argos"
+    description = "Argos Translate with locally installed language packages (offline)"
+    # one request already keeps every core busy; Argos translates newline-separated paragraphs independently
+    max_batch_chars = 20000
+    max_batch_items = 200
+    max_concurrency = 1
+
+    def __init__(self):
+        self._translations = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def unavailable_reason(cls):
+        # checked without importing: argostranslate pulls in its whole NLP stack on import
+        if importlib.util.find_spec("argostranslate") is None:
+            return "Argos Translate not available. Please install argostranslate and the language packages you need."
+        return None
+
+    def prepare(self, source_lang, target_lang):
+        with self._lock:
+            key = (source_lang, target_lang)
+            if key in self._translations:
+                return self._translations[key]
+            reason = self.unavailable_reason()
+            if reason:
+                raise TranslationUnavailable(reason)
+            if not source_lang or source_lang == 'auto':
+                raise TranslationUnavailable("Offline translation needs the source language; set it or let Whisper detect it")
+            
+            import argostranslate.translate
+            languages = {language.code: language for language in argostranslate.translate.get_installed_languages()}
+            translation = None
+            if source_lang in languages and target_lang in languages:
+                translation = languages[source_lang].get_translation(languages[target_lang])
+            if translation is None:
+                raise TranslationUnavailable(f"No Argos language package installed for {source_lang} -> {target_lang} "
+                                             f"(argospm install translate-{source_lang}_{target_lang})")
+            self._translations[key] = translation
+            return translation
+
+    def translate(self, text, source_lang, target_lang):
+        return self.prepare(source_lang, target_lang).translate(text)
+
+class StubBackend(TranslationBackend):
+    name = "stub"
+    description = "Deterministic fake translations for tests and benchmarks (offline)"
+    max_concurrency = 8
+
+    def translate(self, text, source_lang, target_lang):
+        # tag every line, so batching and splitting stay checkable
+        return "\n".join(f"[{target_lang}] {line}" for line in text.split("\n"))
+
+TRANSLATION_BACKENDS = {backend.name: backend for backend in (GoogletransBackend, ArgosBackend, StubBackend)}
+DEFAULT_TRANSLATION_BACKEND = GOOGLETRANS_BACKEND
+
+class TranslationEngine:
+    """Runs all requests for one TranslationBackend on a single event loop thread.
+
+    Up to `concurrency` requests (the backend's limit by default) are in
+    flight at once and rate-limited requests are retried with jittered
+    exponential backoff. The blocking
+    methods are for GUI worker threads and the CLI; the *_async methods can
+    be awaited from any other event loop.
+    """
+
+    def __init__(self, backend, concurrency=None,
+                 max_retries=TRANSLATION_MAX_RETRIES, backoff_base=TRANSLATION_BACKOFF_BASE,
+                 backoff_max=TRANSLATION_BACKOFF_MAX, timeout=TRANSLATION_TIMEOUT):
+        self.backend = backend
+        self.concurrency = concurrency or backend.max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.requests = 0
+        self.retries = 0
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="translation-engine", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _request(self, text, source_lang, target_lang):
+        """One backend call, always on the engine loop"""
+        if asyncio.iscoroutinefunction(self.backend.translate):
+            return await self.backend.translate(text, source_lang, target_lang)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.backend.translate, text, source_lang, target_lang)
+
+    async def _translate(self, text, source_lang, target_lang):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                self.requests += 1
+                try:
+                    return await asyncio.wait_for(self._request(text, source_lang, target_lang), self.timeout)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable_translation_error(e):
+                        raise
+            # back off outside the semaphore so other requests keep going
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))))
+
+    async def _translate_many(self, texts, source_lang, target_lang, on_result):
+        async def one(index, text):
+            try:
+                result = await self._translate(text, source_lang, target_lang)
+            except Exception as e:
+                result = e
+            if on_result:
+                on_result(index, result)
+            return result
+        return await asyncio.gather(*(one(i, text) for i, text in enumerate(texts)))
+
+    def _run(self, coro):
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("blocking TranslationEngine call from its own event loop; await the *_async method instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _await(self, coro):
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def translate(self, text, target_lang, source_lang='auto'):
+        """Translate one text, blocking; raises on failure"""
+        return self._run(self._translate(text, source_lang, target_lang))
+
+    def translate_many(self, texts, target_lang, source_lang='auto', on_result=None):
+        """Translate texts concurrently, blocking; failed items come back as their exception.
+
+        on_result(index, result) is called on the engine thread as each one finishes.
+        """
+        return self._run(self._translate_many(list(texts), source_lang, target_lang, on_result))
+
+    async def translate_async(self, text, target_lang, source_lang='auto'):
+        return await self._await(self._translate(text, source_lang, target_lang))
+
+    async def translate_many_async(self, texts, target_lang, source_lang='auto', on_result=None):
+        return await self._await(self._translate_many(list(texts), source_lang, target_lang, on_result))
+
+    def close(self):
+        """Stop the event loop thread; the engine restarts on next use"""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._semaphore = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+_translation_engines = {}
+_translation_engines_lock = threading.Lock()
+
+def get_translation_engine(backend_name=DEFAULT_TRANSLATION_BACKEND):
+    """Process-wide engine per backend, so clients, models and the loop outlive single exports"""
+    with _translation_engines_lock:
+        if backend_name not in _translation_engines:
+            _translation_engines[backend_name] = TranslationEngine(TRANSLATION_BACKENDS[backend_name]())
+        return _translation_engines[backend_name]
+
+class TranslationBatcher:
+    """Translate many texts with as few backend requests as possible.
+
+    Texts are normalized and deduplicated, looked up in the translation
+    memory, and the misses are packed into size-limited requests joined by
+    TRANSLATION_SEPARATOR and sent concurrently through a TranslationEngine.
+    Batch limits come from the engine's backend. If a reply does not split
+    back into the expected number of parts the batch is retried one text
+    at a time.
+    """
+
+    def __init__(self, engine, memory=None, max_chars=None, max_items=None,
+                 separator=TRANSLATION_SEPARATOR):
+        self.engine = engine
+        self.memory = memory
+        self.backend = engine.backend.name
+        self.max_chars = max_chars or engine.backend.max_batch_chars
+        self.max_items = max_items or engine.backend.max_batch_items
+        self.separator = separator
+        self.requests = 0  # backend requests made (before retries), for stats and benchmarks
+        self.fallbacks = 0  # batches that had to be retried per text
+        self.failed = 0  # texts left untranslated because every request for them failed
+        self.error = None  # why nothing could be translated, if the backend is unusable or every request failed
+
+    def translate(self, texts, target_lang, source_lang='auto', progress_callback=None):
+        """Return translations aligned with texts; untranslatable texts come back unchanged"""
+        normalized = [normalize_translation_text(text) for text in texts]
+        unique = list(dict.fromkeys(text for text in normalized if text))
+        
+        translations = {}
+        pending = []
+        for text in unique:
+            cached = None
+            if self.memory is not None:
+                cached = self.memory.lookup(text, source_lang, target_lang, self.backend)
+            if cached is not None:
+                translations[text] = cached
+            else:
+                pending.append(text)
+        
+        if pending:
+            try:
+                self.engine.backend.prepare(source_lang, target_lang)
+            except TranslationUnavailable as e:
+                self.error = str(e)
+                pending = []
+        
+        done = len(unique) - len(pending)
+        if progress_callback:
+            progress_callback(done, len(unique))
+        
+        new_translations = []  # stored by this thread afterwards, never by the engine loop
+        
+        def record(batch, parts):
+            # runs on the engine thread as replies arrive
+            nonlocal done
+            for text, translated in zip(batch, parts):
+                translations[text] = translated
+                new_translations.append((text, translated))
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, len(unique))
+        
+        batches = list(self.pack(pending))
+        retry = []
+        failures = []
+        
+        def on_batch(index, reply):
+            batch = batches[index]
+            if isinstance(reply, Exception):
+                print(f"Translation warning: {reply}")
+                failures.append(reply)
+                if len(batch) > 1:
+                    self.fallbacks += 1
+                    retry.extend(batch)
+                return
+            parts = [part.strip() for part in reply.split(self.separator)]
+            if len(batch) == 1:
+                record(batch, [reply.strip()])
+            elif len(parts) == len(batch):
+                record(batch, parts)
+            else:
+                self.fallbacks += 1
+                retry.extend(batch)
+        
+        try:
+            self.requests += len(batches)
+            self.engine.translate_many([self.separator.join(batch) for batch in batches], target_lang,
+                                       source_lang, on_batch)
+            
+            if retry:
+                def on_text(index, reply):
+                    if isinstance(reply, Exception):
+                        print(f"Translation warning: {reply}")
+                        failures.append(reply)
+                    else:
+                        record([retry[index]], [reply.strip()])
+                
+                self.requests += len(retry)
+                self.engine.translate_many(list(retry), target_lang, source_lang, on_text)
+        finally:
+            # one transaction for the whole call, also keeping what arrived before an error
+            if self.memory is not None:
+                self.memory.store_many(new_translations, source_lang, target_lang, self.backend)
+        
+        failed = sum(1 for text in pending if text not in translations)
+        self.failed += failed
+        if failed and failed == len(pending) and self.error is None:
+            self.error = f"every {self.backend} request failed, last with: {failures[-1] if failures else 'no reply'}"
+        
+        return [translations.get(norm, text) for text, norm in zip(texts, normalized)]
+
+    def pack(self, texts):
+        """Group texts into batches under max_chars / max_items (oversized texts go alone)"""
+        batch = []
+        size = 0
+        for text in texts:
+            extra = len(text) + (len(self.separator) if batch else 0)
+            if batch and (size + extra > self.max_chars or len(batch) >= self.max_items):
+                yield batch
+                batch, size, extra = [], 0, len(text)
+            batch.append(text)
+            size += extra
+        if batch:
+            yield batch
+
+def parse_subtitle_languages(value):
+    """'es, fr,de' -> ['es', 'fr', 'de'] (order kept, duplicates dropped)"""
+    return list(dict.fromkeys(code.strip() for code in value.split(',') if code.strip()))
+
+def translated_output_path(path, lang, multiple):
+    """Subtitle path for one language: fills {lang}, or inserts .<lang> before the extension in multi-language runs"""
+    if '{lang}' in path:
+        return path.replace('{lang}', lang)
+    if not multiple:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{lang}{ext}"
+
+def translate_languages(engine, texts, target_langs, source_lang='auto', memory=None, progress_callback=None):
+    """Translate texts into several languages in parallel; returns {lang: (translations, batcher)}.
+    
+    All languages share the engine, so its concurrency limit covers the whole fan-out.
+    """
+    progress = {}
+    progress_lock = threading.Lock()
+    
+    def translate_one(lang):
+        def on_progress(done, total):
+            with progress_lock:
+                progress[lang] = (done, total)
+                done_all = sum(d for d, _ in progress.values())
+                total_all = sum(t for _, t in progress.values())
+            progress_callback(done_all, total_all)
+        batcher = TranslationBatcher(engine, memory)
+        translated = batcher.translate(texts, lang, source_lang, on_progress if progress_callback else None)
+        return translated, batcher
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(target_langs))) as executor:
+        return dict(zip(target_langs, executor.map(translate_one, target_langs)))
+
 class WhisperGUI:
     def __init__(self, root):
         self.root = root
@@ -60,8 +1873,22 @@ class WhisperGUI:
         self.current_model_name = None  # Track which model is loaded
         self.transcription_result = None
         self.diarization_pipeline = None
+        # loaded Whisper models and the diarization pipeline, kept under a RAM budget
+        self.model_cache = ModelCache(get_model_budget_mb() * 1024 * 1024, on_evict=self.on_model_evicted)
+        # background preloading of the selected models (see schedule_preload)
+        self.preload_wanted = []
+        self.preload_thread = None
+        self.preload_lock = threading.Lock()
+        self.preloading = None
+        self.preload_errors = {}
         self.diarization_result = None
-        self.temp_files = []  # Track temporary files for cleanup
+        self.speaker_index = None  # Interval index over diarization_result
+        self.speech_source = None  # SpeechMap source of the last voice activity filtered run
+        self.result_cache = None  # Opened on first use
+        self.diarization_cache = None
+        self.translation_memory = None
+        self.transcribe_params = {}  # Options the current transcript was made with
+        self.cancel_token = None  # CancellationToken of the running transcription
         self.translated_segments = {}  # Cache translated segments
         
         # Progress tracking
@@ -78,10 +1905,14 @@ class WhisperGUI:
         
         # Ensure cleanup on window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # start loading the selected models while the user is still picking a file
+        self.root.after(200, self.schedule_preload)
     
     def detect_system_dark_mode(self):
         """Detect if Windows is using dark mode"""
         try:
+            import winreg  # Windows only; anywhere else this fails and light mode is used
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Microsoft\Windows\CurrentVersion\Themes\Personalize')
             value, _ = winreg.QueryValueEx(key, 'AppsUseLightTheme')
             winreg.CloseKey(key)
@@ -475,6 +2306,8 @@ class WhisperGUI:
                 self.dark_mode_btn.config(text="☀️ Light Mode")
             else:
                 self.dark_mode_btn.config(text="🌙 Dark Mode")
+        if hasattr(self, 'model_ready_label'):
+            self.update_model_ready_indicator()
         
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="10")
@@ -510,7 +2343,7 @@ class WhisperGUI:
         model_frame = ttk.Frame(main_frame)
         model_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        models = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3", "turbo"]
+        models = WHISPER_MODELS
         self.model_radio_labels = {}
         for i, model in enumerate(models):
             # indicator-less radiobutton for crisp look with bullet in text
@@ -524,6 +2357,10 @@ class WhisperGUI:
             rb.grid(row=0, column=i, padx=5)
             self.model_radio_labels[model] = rb
         
+        # ready indicator for the background preload of the selected models
+        self.model_ready_label = ttk.Label(model_frame, text="○ Not loaded")
+        self.model_ready_label.grid(row=0, column=len(models), padx=(15, 0))
+        
         # Language Settings
         ttk.Label(main_frame, text="Language Settings:", font=('Arial', 12, 'bold')).grid(
             row=4, column=0, sticky=tk.W, pady=(10, 5))
@@ -565,8 +2402,21 @@ class WhisperGUI:
         )
         self.target_language_combo.grid(row=0, column=3, sticky=tk.W, padx=(5, 0))
         
+        # translation backend used for non-English targets and translated subtitles
+        ttk.Label(language_frame, text="Backend:").grid(row=0, column=4, sticky=tk.W, padx=(20, 0))
+        self.translation_backend_var = tk.StringVar(value=DEFAULT_TRANSLATION_BACKEND)
+        self.translation_backend_combo = ttk.Combobox(
+            language_frame,
+            textvariable=self.translation_backend_var,
+            values=list(TRANSLATION_BACKENDS),
+            width=12,
+            state="readonly"
+        )
+        self.translation_backend_combo.grid(row=0, column=5, sticky=tk.W, padx=(5, 0))
+        self.translation_backend_combo.bind("<<ComboboxSelected>>", self.on_translation_backend_change)
+        
         # Bind combobox popup styling and apply initial styling
-        for combo in (self.source_language_combo, self.target_language_combo):
+        for combo in (self.source_language_combo, self.target_language_combo, self.translation_backend_combo):
             combo.bind("<Button-1>", lambda e, c=combo: self._style_combobox_popup(c))
             self._style_combobox_popup(combo)  # initial pass
 
@@ -580,6 +2430,7 @@ class WhisperGUI:
                 rb.configure(text=f" {bullet} {name}")
         self.model_var.trace_add('write', _update_model_bullets)
         _update_model_bullets()
+        self.model_var.trace_add('write', self.schedule_preload)
         
         ttk.Label(main_frame, text="Options:", font=('Arial', 12, 'bold')).grid(
             row=6, column=0, sticky=tk.W, pady=(10, 5))
@@ -596,13 +2447,68 @@ class WhisperGUI:
                        variable=self.word_timestamps_var).grid(row=0, column=1, sticky=tk.W, padx=(20, 0))
         
         self.speaker_diarization_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(options_frame, text="Speaker diarization", 
-                       variable=self.speaker_diarization_var).grid(row=1, column=0, sticky=tk.W)
+        ttk.Checkbutton(options_frame, text="Speaker diarization", variable=self.speaker_diarization_var,
+                       command=self.schedule_preload).grid(row=1, column=0, sticky=tk.W)
         
         self.clean_format_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(options_frame, text="Clean format (segments only)", 
                        variable=self.clean_format_var).grid(row=1, column=1, sticky=tk.W, padx=(20, 0))
         
+        self.parallel_diarization_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Diarize in parallel with transcription", 
+                       variable=self.parallel_diarization_var).grid(row=2, column=0, sticky=tk.W)
+        
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Reuse cached results", 
+                       variable=self.use_cache_var).grid(row=2, column=1, sticky=tk.W, padx=(20, 0))
+        
+        self.clear_cache_btn = ttk.Button(
+            options_frame,
+            text="Clear Cache",
+            command=self.clear_caches,
+            style='App.TButton'
+        )
+        self.clear_cache_btn.grid(row=2, column=2, sticky=tk.W, padx=(20, 0))
+        
+        self.long_file_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text=f"Long-file mode ({DEFAULT_CHUNK_MINUTES}-min chunks in parallel)", 
+                       variable=self.long_file_var).grid(row=3, column=0, sticky=tk.W)
+        
+        self.skip_silence_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Skip silence (voice activity detection)", 
+                       variable=self.skip_silence_var).grid(row=3, column=1, sticky=tk.W, padx=(20, 0))
+        
+        # resident models and the RAM budget they share
+        model_panel = ttk.Frame(options_frame)
+        model_panel.grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Label(model_panel, text="Loaded models:").grid(row=0, column=0, sticky=tk.W)
+        self.resident_models_var = tk.StringVar(value="none")
+        ttk.Label(model_panel, textvariable=self.resident_models_var).grid(row=0, column=1, sticky=tk.W, padx=(5, 20))
+        
+        ttk.Label(model_panel, text="RAM budget (GB):").grid(row=0, column=2, sticky=tk.W)
+        budget_gb = f"{self.model_cache.max_bytes / 1024 ** 3:g}"
+        budget_choices = sorted({"2", "4", "8", "16", "32", "64", budget_gb}, key=float)
+        self.model_budget_var = tk.StringVar(value=budget_gb)
+        self.model_budget_combo = ttk.Combobox(
+            model_panel,
+            textvariable=self.model_budget_var,
+            values=budget_choices,
+            width=6,
+            state="readonly"
+        )
+        self.model_budget_combo.grid(row=0, column=3, sticky=tk.W, padx=(5, 20))
+        self.model_budget_combo.bind("<<ComboboxSelected>>", self.on_model_budget_change)
+        self.model_budget_combo.bind("<Button-1>", lambda e: self._style_combobox_popup(self.model_budget_combo))
+        self._style_combobox_popup(self.model_budget_combo)
+        
+        self.unload_models_btn = ttk.Button(
+            model_panel,
+            text="Unload Models",
+            command=self.unload_models,
+            style='App.TButton'
+        )
+        self.unload_models_btn.grid(row=0, column=4, sticky=tk.W)
+        
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=8, column=0, columnspan=2, pady=10)
 
@@ -614,6 +2520,15 @@ class WhisperGUI:
         )
         self.transcribe_btn.grid(row=0, column=0, padx=5)
 
+        self.cancel_btn = ttk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_transcription,
+            state="disabled",
+            style='App.TButton'
+        )
+        self.cancel_btn.grid(row=0, column=1, padx=5)
+        
         self.save_btn = ttk.Button(
             button_frame,
             text="Save Transcript",
@@ -621,7 +2536,7 @@ class WhisperGUI:
             state="disabled",
             style='App.TButton'
         )
-        self.save_btn.grid(row=0, column=1, padx=5)
+        self.save_btn.grid(row=0, column=2, padx=5)
 
         self.format_btn = ttk.Button(
             button_frame,
@@ -630,7 +2545,7 @@ class WhisperGUI:
             state="disabled",
             style='App.TButton'
         )
-        self.format_btn.grid(row=0, column=2, padx=5)
+        self.format_btn.grid(row=0, column=3, padx=5)
 
         self.export_subtitle_btn = ttk.Button(
             button_frame,
@@ -639,7 +2554,7 @@ class WhisperGUI:
             state="disabled",
             style='App.TButton'
         )
-        self.export_subtitle_btn.grid(row=0, column=3, padx=5)
+        self.export_subtitle_btn.grid(row=0, column=4, padx=5)
 
         self.export_translated_btn = ttk.Button(
             button_frame,
@@ -648,7 +2563,7 @@ class WhisperGUI:
             state="disabled",
             style='App.TButton'
         )
-        self.export_translated_btn.grid(row=0, column=4, padx=5)
+        self.export_translated_btn.grid(row=0, column=5, padx=5)
         
         # Set initial dark mode button text based on current state
         initial_text = "☀️ Light Mode" if self.dark_mode.get() else "🌙 Dark Mode"
@@ -658,18 +2573,18 @@ class WhisperGUI:
             command=self.toggle_dark_mode,
             style='App.TButton'
         )
-        self.dark_mode_btn.grid(row=0, column=5, padx=5)
+        self.dark_mode_btn.grid(row=0, column=6, padx=5)
         
         # Current task progress bar
-        ttk.Label(main_frame, text="Current Task:", font=('Arial', 10)).grid(
-            row=9, column=0, sticky=tk.W, pady=(10, 2))
+        self.current_progress_label = ttk.Label(main_frame, text="Current Task:", font=('Arial', 10))
+        self.current_progress_label.grid(row=9, column=0, sticky=tk.W, pady=(10, 2))
         
         self.current_progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
         self.current_progress.grid(row=10, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
         
         # Overall progress bar  
-        ttk.Label(main_frame, text="Overall Progress:", font=('Arial', 10)).grid(
-            row=11, column=0, sticky=tk.W, pady=(5, 2))
+        self.progress_label = ttk.Label(main_frame, text="Overall Progress:", font=('Arial', 10))
+        self.progress_label.grid(row=11, column=0, sticky=tk.W, pady=(5, 2))
         
         self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
         self.progress.grid(row=12, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -719,6 +2634,22 @@ class WhisperGUI:
         else:
             self.target_language_combo.config(state="disabled")
         
+    def on_translation_backend_change(self, event=None):
+        """Drop translations from the previous backend and show what the new one can do"""
+        backend = TRANSLATION_BACKENDS[self.translation_backend_var.get()]
+        self.translated_segments = {}
+        reason = backend.unavailable_reason()
+        if reason:
+            self.set_status(reason, 'warning')
+        else:
+            self.set_status(f"Translation backend: {backend.description} ({backend.limits_text()})", 'info')
+        if self.transcription_result and self.translate_var.get():
+            self.display_results()
+    
+    def translation_backend_unavailable(self):
+        """Message explaining why the selected translation backend can't be used, or None"""
+        return TRANSLATION_BACKENDS[self.translation_backend_var.get()].unavailable_reason()
+    
     def browse_file(self):
         file_types = [
             ("All supported", "*.mp4 *.avi *.mov *.mkv *.mp3 *.wav *.m4a *.flac"),
@@ -751,54 +2682,115 @@ class WhisperGUI:
             self.current_progress['value'] = value
         self.root.after(0, _update)
     
-    def cleanup_temp_files(self):
-        """Clean up any temporary files"""
-        for temp_file in self.temp_files:
+    def wanted_model_keys(self):
+        """ModelCache keys of the models the current settings need"""
+        keys = [('whisper', self.model_var.get())]
+        if self.speaker_diarization_var.get() and PYANNOTE_AVAILABLE:
+            keys.append(('diarization', DIARIZATION_PIPELINE_NAME))
+        return keys
+    
+    def model_loader(self, key):
+        kind, name = key
+        if kind == 'whisper':
+            return lambda: whisper.load_model(name)
+        return self.load_diarization_model
+    
+    def schedule_preload(self, *_):
+        """Load the selected models in the background (on startup and whenever the selection changes)"""
+        with self.preload_lock:
+            # a load that is already running can't be interrupted, but models deselected
+            # before their turn are skipped; the thread always follows the latest selection
+            self.preload_wanted = self.wanted_model_keys()
+            self.preload_errors = {}
+            if self.preload_thread is None:
+                self.preload_thread = threading.Thread(target=self.preload_models, daemon=True)
+                self.preload_thread.start()
+        self.update_model_ready_indicator()
+    
+    def preload_models(self):
+        """Preload thread: load the wanted models one at a time until all are resident"""
+        while True:
+            with self.preload_lock:
+                pending = [key for key in self.preload_wanted
+                           if self.model_cache.peek(key) is None and key not in self.preload_errors]
+                if not pending:
+                    self.preload_thread = None
+                    self.preloading = None
+                    break
+                key = self.preloading = pending[0]
+            self.root.after(0, self.update_model_ready_indicator)
             try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
+                # never make room by evicting another wanted model, or the two would take turns forever
+                self.model_cache.get(key, self.model_loader(key), keep=self.preload_wanted)
             except Exception as e:
-                # Silently continue if cleanup fails
-                pass
+                self.preload_errors[key] = str(e)
+            self.root.after(0, self.update_model_panel)
+        self.root.after(0, self.update_model_ready_indicator)
+    
+    def update_model_ready_indicator(self):
+        """Show whether the selected models are ready, loading or failed to load"""
+        keys = self.wanted_model_keys()
         
-        # Clear the list after cleanup
-        self.temp_files = []
+        def label(key):
+            return key[1] if key[0] == 'whisper' else 'diarization'
+        
+        failed = [key for key in keys if key in self.preload_errors]
+        missing = [key for key in keys if self.model_cache.peek(key) is None]
+        loading = [key for key in missing if key == self.preloading or self.model_cache.is_loading(key)]
+        if failed:
+            text, status = f"✕ {', '.join(map(label, failed))} failed to load", 'error'
+        elif not missing:
+            text, status = "● Ready", 'success'
+        elif loading:
+            text, status = f"◌ Loading {', '.join(map(label, loading))}...", 'warning'
+        elif self.preloading:
+            # the previous selection is still loading and can't be interrupted
+            text, status = f"◌ Queued after {label(self.preloading)}", 'warning'
+        else:
+            text, status = "○ Not loaded", 'info'
+        self.model_ready_label.config(text=text, foreground=self.get_theme_color(status))
+    
+    def on_model_evicted(self, key):
+        """Drop our own reference to a model the cache evicted, so its memory is freed"""
+        kind, name = key
+        if kind == 'diarization' and self.diarization_pipeline:
+            self.diarization_pipeline = None
+        elif kind == 'whisper' and name == self.current_model_name:
+            self.model = None
+            self.current_model_name = None
+        self.root.after(0, self.update_model_panel)
+        self.root.after(0, self.update_model_ready_indicator)
+    
+    def update_model_panel(self):
+        """Show the resident models and their memory use"""
+        resident = self.model_cache.resident()
+        if not resident:
+            self.resident_models_var.set("none")
+            return
+        names = [f"{name if kind == 'whisper' else 'diarization'} ({format_bytes(size)})" for (kind, name), size in resident]
+        self.resident_models_var.set(f"{', '.join(names)} - {format_bytes(self.model_cache.total_bytes())} in use")
+    
+    def on_model_budget_change(self, event=None):
+        self.model_cache.max_bytes = int(float(self.model_budget_var.get()) * 1024 ** 3)
+        self.model_cache.evict(keep=[('whisper', self.current_model_name)])
+        self.update_model_panel()
+    
+    def unload_models(self):
+        """Free the memory of every resident model"""
+        if str(self.transcribe_btn['state']) == 'disabled':
+            messagebox.showinfo("Unload Models", "Models can be unloaded once the current transcription finishes.")
+            return
+        self.model_cache.evict(0)
+        self.set_status("Models unloaded", 'success')
     
     def on_closing(self):
         """Handle application closing and cleanup"""
-        self.cleanup_temp_files()
+        # stop a running transcription so ffmpeg and chunk workers don't outlive the window
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
         # Destroy the window
         self.root.destroy()
     
-    def convert_to_wav_for_diarization(self, file_path):
-        """Convert unsupported formats to WAV for speaker diarization"""
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
-        # If already supported format, return original
-        if file_ext in ['.wav', '.mp3', '.m4a', '.flac']:
-            return file_path
-            
-        # For video files, extract audio to temporary WAV
-        try:
-            temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_wav.close()
-            
-            
-            # Use ffmpeg to extract audio
-            cmd = ['ffmpeg', '-i', file_path, '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', '-y', temp_wav.name]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Track the temporary file for cleanup
-                self.temp_files.append(temp_wav.name)
-                return temp_wav.name
-            else:
-                os.unlink(temp_wav.name)
-                return None
-                
-        except Exception as e:
-            return None
-    
     def start_transcription(self):
         if not self.file_var.get():
             messagebox.showerror("Error", "Please select a file first.")
@@ -808,13 +2800,15 @@ class WhisperGUI:
             messagebox.showerror("Error", "Selected file does not exist.")
             return
         
-        # Reset previous results and clean up any remaining temp files
+        # Reset previous results
         self.transcription_result = None
         self.diarization_result = None
+        self.speaker_index = None
         self.translated_segments = {}  # Clear translation cache
-        self.cleanup_temp_files()
         
+        self.cancel_token = CancellationToken()
         self.transcribe_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
         self.save_btn.config(state="disabled")
         self.format_btn.config(state="disabled")
         self.export_subtitle_btn.config(state="disabled")
@@ -828,225 +2822,414 @@ class WhisperGUI:
         thread.daemon = True
         thread.start()
     
-    def transcribe_audio(self):
-        try:
-            file_path = self.file_var.get()
-            
-            self.root.after(0, lambda: self.set_status("Loading models...", 'info'))
-            
-            if self.model is None or self.current_model_name != self.model_var.get():
-                self.model = whisper.load_model(self.model_var.get())
-                self.current_model_name = self.model_var.get()
-            
-            if self.speaker_diarization_var.get():
-                if not PYANNOTE_AVAILABLE:
-                    self.root.after(0, lambda: self.set_status("Speaker diarization unavailable (pyannote.audio not installed)", 'warning'))
-                    self.diarization_pipeline = False
-                    self.diarization_result = None
-                elif self.diarization_pipeline is None:
-                    try:
-                        self.root.after(0, lambda: self.set_status("Loading speaker diarization model...", 'info'))
-                        hf_token = os.getenv('TOKEN')
-                        
-                        # try token first, fallback to huggingface-cli login
-                        try:
-                            self.diarization_pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",
-                                                                                use_auth_token=hf_token)
-                        except Exception as token_error:
-                            # Fallback to huggingface-cli login
-                            self.diarization_pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",
-                                                                                use_auth_token=True)
-                        
-                        # Move to CUDA if available
-                        if torch.cuda.is_available():
-                            self.diarization_pipeline = self.diarization_pipeline.to(torch.device("cuda"))
-                            
-                    except Exception as e:
-                        self.root.after(0, lambda: self.set_status("Speaker diarization unavailable, continuing with transcription...", 'warning'))
-                        self.diarization_pipeline = False
-                        self.diarization_result = None
-                
-                if self.diarization_pipeline and self.diarization_pipeline is not False:
-                    try:
-                        self.root.after(0, lambda: self.set_status("Performing speaker diarization...", 'info'))
-                        
-                        # Convert file if needed for speaker diarization
-                        diarization_file = self.convert_to_wav_for_diarization(file_path)
-                        if diarization_file:
-                            # simulate diarization progress - pyannote has no built-in progress
-                            import time
-                            
-                            def simulate_diarization_progress():
-                                """Simulate diarization progress over estimated time"""
-                                steps = [
-                                    ("Speaker diarization: loading models...", 0, 0.5),
-                                    ("Speaker diarization: segmentation...", 10, 1.0),
-                                    ("Speaker diarization: embeddings...", 25, 2.0),
-                                    ("Speaker diarization: clustering...", 40, 1.0),
-                                    ("Speaker diarization: finalizing...", 48, 0.5),
-                                ]
-                                
-                                for status, progress, duration in steps:
-                                    if hasattr(self, '_diarization_cancelled'):
-                                        break
-                                    # Update UI safely from background thread
-                                    def update_ui(s=status, p=progress):
-                                        self.set_status(s, 'info')
-                                        self.update_current_progress(p * 2)  # Scale to 0-100% for current task
-                                        self.update_progress(p)  # Scale to 0-50% for overall
-                                    
-                                    self.root.after(0, update_ui)
-                                    time.sleep(duration)
-                            
-                            # Start simulated progress
-                            self._diarization_cancelled = False
-                            progress_thread = threading.Thread(target=simulate_diarization_progress)
-                            progress_thread.daemon = True
-                            progress_thread.start()
-                            
-                            try:
-                                self.diarization_result = self.diarization_pipeline(diarization_file)
-                                # Cancel simulation and set to complete
-                                self._diarization_cancelled = True
-                                self.update_progress(50)
-                                self.update_current_progress(100)
-                                self.root.after(0, lambda: self.set_status("Speaker diarization complete!", 'success'))
-                                time.sleep(0.5)  # completion pause
-                            except Exception as e:
-                                self._diarization_cancelled = True
-                                raise e
-                            
-                            # temp file cleanup via self.temp_files tracking
-                        else:
-                            self.diarization_result = None
-                            
-                    except Exception as e:
-                        self.diarization_result = None
+    def cancel_transcription(self):
+        """Stop the running transcription at its next cancellation point"""
+        if self.cancel_token is None:
+            return
+        self.cancel_btn.config(state="disabled")
+        self.set_status("Cancelling...", 'warning')
+        self.cancel_token.cancel()
+    
+    def handle_cancelled(self):
+        self.progress['value'] = 0
+        self.current_progress['value'] = 0
+        self.set_status("Transcription cancelled", 'warning')
+        self.transcribe_btn.config(state="normal")
+    
+    def transcribe_audio(self):
+        cancel_token = self.cancel_token
+        try:
+            file_path = self.file_var.get()
             
-            self.root.after(0, lambda: self.set_status("Processing audio...", 'info'))
-            # Reset current progress for Whisper task
-            self.update_current_progress(0)
+            # decode once; the same samples feed both Whisper and pyannote
+            self.root.after(0, lambda: self.set_status("Decoding audio...", 'info'))
+            audio = load_audio(file_path, cancel_token=cancel_token)
+            transcribe_params = self.build_transcribe_params()
+            self.transcribe_params = transcribe_params
             
-            # capture progress by reading tqdm output from stderr
-            class ProgressCapture:
-                def __init__(self, gui_ref):
-                    self.gui_ref = gui_ref
-                    self.original_stderr = sys.stderr
-                    # no extra buffer needed; we stream directly to original stderr
-                
-                def write(self, text):
-                    # Parse tqdm progress from text like "100%|████| 612/612 [00:01<00:00, 327.88frames/s]"
-                    if '|' in text and '%' in text:
-                        try:
-                            # Extract percentage
-                            percentage_match = re.search(r'(\d+)%', text)
-                            if percentage_match:
-                                percentage = int(percentage_match.group(1))
-                                # Map Whisper progress based on whether diarization was used
-                                if self.gui_ref.speaker_diarization_var.get() and self.gui_ref.diarization_result:
-                                    # map to second half of progress bar
-                                    mapped_percentage = 50 + int(percentage * 0.5)
-                                else:
-                                    # Use full 0-100% range if no diarization
-                                    mapped_percentage = percentage
-                                self.gui_ref.update_progress(mapped_percentage)
-                                # update progress for current task
-                                self.gui_ref.update_current_progress(percentage)
-                                # Update status with more detail
-                                if 'frames/s' in text:
-                                    frames_match = re.search(r'(\d+)/(\d+)', text)
-                                    if frames_match:
-                                        current, total = frames_match.groups()
-                                        self.gui_ref.root.after(0, lambda: self.gui_ref.set_status(
-                                            f"Processing audio... ({current}/{total} frames, {percentage}%)", 'info'))
-                        except:
-                            pass
-                    
-                    # Still write to original stderr for any other output
-                    self.original_stderr.write(text)
-                
-                def flush(self):
-                    self.original_stderr.flush()
+            # a cached transcript skips loading the model and running inference
+            result = None
+            cache_key = None
+            audio_hash = None
+            diarization_key = None
+            if self.use_cache_var.get():
+                self.open_caches()
+                audio_hash = audio_content_hash(audio)
+                # cached diarization skips loading and running the pipeline
+                if self.speaker_diarization_var.get() and PYANNOTE_AVAILABLE:
+                    diarization_key = DiarizationCache.make_key(audio_hash)
+                    self.diarization_result = self.diarization_cache.get(diarization_key)
+                key_params = transcribe_params
+                if self.long_file_var.get() or self.skip_silence_var.get():
+                    key_params = dict(transcribe_params)
+                    if self.long_file_var.get():
+                        key_params['chunk_minutes'] = DEFAULT_CHUNK_MINUTES
+                    if self.skip_silence_var.get():
+                        # speech regions from diarization and from signal energy differ, and so do the transcripts
+                        key_params['vad'] = self.expected_speech_source()
+                cache_key = ResultCache.make_key(audio_hash, self.model_var.get(), key_params)
+                result = self.result_cache.get(cache_key)
+            cache_hit = result is not None
             
-            # Use progress capture during transcription
-            progress_capture = ProgressCapture(self)
-            original_stderr = sys.stderr
+            if not cache_hit:
+                # switching back to a model used earlier reuses it if it is still resident
+                model_name = self.model_var.get()
+                if self.model_cache.peek(('whisper', model_name)) is None:
+                    self.root.after(0, lambda: self.set_status("Loading models...", 'info'))
+                # a background preload of the same model is waited for, not repeated
+                # models in use by this run are pinned, so not even a preload evicts them
+                self.model = self.model_cache.get(('whisper', model_name), lambda: whisper.load_model(model_name), pin=True)
+                self.current_model_name = model_name
+                self.root.after(0, self.update_model_panel)
+                self.root.after(0, self.update_model_ready_indicator)
+            cancel_token.check()
             
-            try:
-                sys.stderr = progress_capture
-                # Prepare transcription parameters
-                transcribe_params = {
-                    "word_timestamps": self.word_timestamps_var.get(),
-                    "verbose": False
-                }
-                
-                # Add language parameter if not auto-detect
-                source_lang = self.source_language_var.get()
-                if source_lang and source_lang != "auto":
-                    transcribe_params["language"] = source_lang
-                
-                # Add translation task if enabled
-                if self.translate_var.get():
-                    target_lang = self.target_language_var.get()
-                    if target_lang == "en":
-                        # Use Whisper's built-in translation to English
-                        transcribe_params["task"] = "translate"
-                    else:
-                        # For other languages, we'll transcribe normally and translate afterwards
-                        # The translation will happen in display_results
-                        pass
+            use_diarization = False
+            if self.speaker_diarization_var.get():
+                # an empty Annotation (no speech found) is falsy, but it is still a cached result
+                if self.diarization_result is not None:
+                    self.speaker_index = SpeakerIndex.from_annotation(self.diarization_result)
+                    self.update_progress(50)
+                    self.root.after(0, lambda: self.set_status("Speaker diarization loaded from cache", 'info'))
+                else:
+                    use_diarization = self.load_diarization_pipeline()
+            cancel_token.check()
+            
+            if use_diarization and self.parallel_diarization_var.get() and not cache_hit:
+                result = self.run_diarization_and_whisper_concurrently(audio, transcribe_params)
+            else:
+                if use_diarization:
+                    self.run_diarization(audio)
+                    if self.diarization_result is not None:
+                        # lets segments shown during transcription carry their speaker
+                        self.speaker_index = SpeakerIndex.from_annotation(self.diarization_result)
                 
-                result = self.model.transcribe(file_path, **transcribe_params)
-            finally:
-                sys.stderr = original_stderr
+                cancel_token.check()
+                if not cache_hit:
+                    self.root.after(0, lambda: self.set_status("Processing audio...", 'info'))
+                    # Reset current progress for Whisper task
+                    self.update_current_progress(0)
+                    # map to second half of overall progress if diarization ran first
+                    layout = 'after_diarization' if self.diarization_result is not None else 'whisper_only'
+                    result = self.run_whisper(audio, transcribe_params, layout)
+            
+            # nothing partial is cached or shown once the run was cancelled
+            cancel_token.check()
+            if cache_key and not cache_hit:
+                if self.skip_silence_var.get() and self.speech_source != key_params['vad']:
+                    # diarization failed or found no speech, so the energy detector was used after all
+                    key_params['vad'] = self.speech_source
+                    cache_key = ResultCache.make_key(audio_hash, self.model_var.get(), key_params)
+                self.result_cache.put(cache_key, result)
+            if diarization_key and use_diarization and self.diarization_result is not None:
+                self.diarization_cache.put(diarization_key, self.diarization_result)
+            if self.result_cache is not None and self.use_cache_var.get():
+                stats = self.result_cache.stats_text()
+                message = "Transcript loaded from cache" if cache_hit else "Transcript cached"
+                self.root.after(0, lambda: self.set_status(f"{message} (cache: {stats})", 'info'))
             
             # Set both progress bars to 100% when done
             self.update_progress(100)
             self.update_current_progress(100)
             
+            # bulk speaker assignment for every segment and word, stored on the result
+            if self.diarization_result is not None:
+                if self.speaker_index is None:
+                    self.speaker_index = SpeakerIndex.from_annotation(self.diarization_result)
+                assign_speakers(result, self.diarization_result, self.speaker_index)
+            
             self.transcription_result = result
             
             self.root.after(0, self.display_results)
             
+        except TranscriptionCancelled:
+            self.root.after(0, self.handle_cancelled)
         except Exception as e:
-            # Clean up temporary files on error
-            self.cleanup_temp_files()
             error_msg = f"Transcription failed: {str(e)}"
             self.root.after(0, lambda: self.handle_error(error_msg))
+        finally:
+            # the models were only stopped between windows or batches, so they stay loaded for the next run
+            self.model_cache.unpin()
+            self.cancel_token = None
+            self.root.after(0, lambda: self.cancel_btn.config(state="disabled"))
+            self.root.after(0, self.reset_progress_labels)
     
-    def get_speaker_at_time(self, timestamp):
-        if not self.diarization_result:
-            return None
+    def open_caches(self):
+        """Open the on-disk result and diarization caches on first use"""
+        if self.result_cache is None:
+            self.result_cache = ResultCache()
+        if self.diarization_cache is None:
+            self.diarization_cache = DiarizationCache()
+        if self.translation_memory is None:
+            self.translation_memory = TranslationMemory()
+    
+    def clear_caches(self):
+        """Delete all cached transcripts and diarization results"""
+        if not messagebox.askyesno("Clear Cache", "Delete all cached transcripts, speaker diarization results and translations?"):
+            return
+        try:
+            self.open_caches()
+            removed = (self.result_cache.evict(0) + self.diarization_cache.evict(0) +
+                       self.translation_memory.clear())
+            self.set_status(f"Cache cleared ({removed} entries removed)", 'success')
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Failed to clear cache: {str(e)}")
+    
+    def load_diarization_model(self):
+        """Load the pyannote pipeline from Hugging Face (ModelCache loader)"""
+        hf_token = os.getenv('TOKEN')
         
-        # First, try exact match
-        for turn, _, speaker in self.diarization_result.itertracks(yield_label=True):
-            if turn.start <= timestamp <= turn.end:
-                return speaker
+        from pyannote.audio import Pipeline
         
-        # If no exact match, find the closest speaker segment with conservative fallback
-        closest_speaker = None
-        min_distance = float('inf')
+        # try token first, fallback to huggingface-cli login
+        try:
+            pipeline = Pipeline.from_pretrained(DIARIZATION_PIPELINE_NAME, use_auth_token=hf_token)
+        except Exception as token_error:
+            # Fallback to huggingface-cli login
+            pipeline = Pipeline.from_pretrained(DIARIZATION_PIPELINE_NAME, use_auth_token=True)
+        
+        # Move to CUDA if available
+        if torch.cuda.is_available():
+            pipeline = pipeline.to(torch.device("cuda"))
+        return pipeline
+    
+    def load_diarization_pipeline(self):
+        """Load the diarization pipeline if needed and pin it for this run; returns True if it is usable"""
+        if not PYANNOTE_AVAILABLE:
+            self.root.after(0, lambda: self.set_status("Speaker diarization unavailable (pyannote.audio not installed)", 'warning'))
+            self.diarization_pipeline = False
+            self.diarization_result = None
+        elif self.diarization_pipeline is not False:
+            key = ('diarization', DIARIZATION_PIPELINE_NAME)
+            try:
+                if self.model_cache.peek(key) is None:
+                    self.root.after(0, lambda: self.set_status("Loading speaker diarization model...", 'info'))
+                # waits for a background preload of the pipeline instead of starting a second one;
+                # a resident pipeline is a cache hit, which pins it before anything can evict it
+                self.diarization_pipeline = self.model_cache.get(key, self.load_diarization_model, pin=True)
+                self.root.after(0, self.update_model_panel)
+            except Exception as e:
+                self.root.after(0, lambda: self.set_status("Speaker diarization unavailable, continuing with transcription...", 'warning'))
+                self.diarization_pipeline = False
+                self.diarization_result = None
+        
+        return bool(self.diarization_pipeline)
+    
+    def run_diarization(self, audio, concurrent=False):
+        """Run speaker diarization on the decoded audio and store the result.
+        
+        In concurrent mode progress goes to the current task bar only and the
+        status line is left to the transcription.
+        """
+        try:
+            if not concurrent:
+                self.root.after(0, lambda: self.set_status("Performing speaker diarization...", 'info'))
+            
+            def on_progress(stage, fraction, eta):
+                # current bar: diarization only; overall bar: its first half
+                def update_ui():
+                    self.update_current_progress(int(fraction * 100))
+                    if not concurrent:
+                        self.set_status(diarization_progress_text(stage, fraction, eta), 'info')
+                        self.update_progress(int(fraction * 50))
+                self.root.after(0, update_ui)
+            
+            progress = DiarizationProgress(on_progress, self.cancel_token)
+            self.diarization_result = run_diarization_pipeline(self.diarization_pipeline, audio, progress)
+            self.speaker_index = SpeakerIndex.from_annotation(self.diarization_result)
+            self.update_current_progress(100)
+            if not concurrent:
+                self.update_progress(50)
+                self.root.after(0, lambda: self.set_status("Speaker diarization complete!", 'success'))
+        
+        except TranscriptionCancelled:
+            self.diarization_result = None
+            raise
+        except Exception as e:
+            self.diarization_result = None
+    
+    def build_transcribe_params(self):
+        """Whisper transcribe() options from the current GUI settings"""
+        transcribe_params = {
+            "word_timestamps": self.word_timestamps_var.get(),
+            "verbose": False
+        }
         
-        for turn, _, speaker in self.diarization_result.itertracks(yield_label=True):
-            # Calculate distance to this segment
-            if timestamp < turn.start:
-                distance = turn.start - timestamp
-            elif timestamp > turn.end:
-                distance = timestamp - turn.end
+        # Add language parameter if not auto-detect
+        source_lang = self.source_language_var.get()
+        if source_lang and source_lang != "auto":
+            transcribe_params["language"] = source_lang
+        
+        # Add translation task if enabled
+        if self.translate_var.get():
+            target_lang = self.target_language_var.get()
+            if target_lang == "en":
+                # Use Whisper's built-in translation to English
+                transcribe_params["task"] = "translate"
             else:
-                distance = 0  # fallback distance
-                return speaker
+                # For other languages, we'll transcribe normally and translate afterwards
+                # The translation will happen in display_results
+                pass
+        
+        return transcribe_params
+    
+    def run_whisper(self, audio, transcribe_params, layout='whisper_only', on_segment=None):
+        """Run Whisper on the decoded audio, mirroring tqdm progress onto the progress bars.
+        
+        layout decides which bars show Whisper progress: 'whisper_only' (both,
+        full range), 'after_diarization' (second half of overall) or
+        'concurrent' (overall bar only; the current bar belongs to diarization).
+        on_segment overrides the live display callback and skips the speech filter.
+        """
+        if on_segment is None:
+            if self.skip_silence_var.get():
+                return self.run_whisper_speech_only(audio, transcribe_params, layout)
+            on_segment = self.show_live_segment
+        
+        # capture progress by reading tqdm output from stderr
+        class ProgressCapture:
+            def __init__(self, gui_ref):
+                self.gui_ref = gui_ref
+                self.original_stderr = sys.stderr
+                # no extra buffer needed; we stream directly to original stderr
             
-            if distance < min_distance:
-                min_distance = distance
-                closest_speaker = speaker
+            def write(self, text):
+                # Parse tqdm progress from text like "100%|████| 612/612 [00:01<00:00, 327.88frames/s]"
+                if '|' in text and '%' in text:
+                    try:
+                        # Extract percentage
+                        percentage_match = re.search(r'(\d+)%', text)
+                        if percentage_match:
+                            percentage = int(percentage_match.group(1))
+                            # Map Whisper progress based on whether diarization was used
+                            if layout == 'after_diarization':
+                                # map to second half of progress bar
+                                mapped_percentage = 50 + int(percentage * 0.5)
+                            else:
+                                # Use full 0-100% range if no diarization
+                                mapped_percentage = percentage
+                            self.gui_ref.update_progress(mapped_percentage)
+                            # update progress for current task
+                            if layout != 'concurrent':
+                                self.gui_ref.update_current_progress(percentage)
+                            # Update status with more detail
+                            if 'frames/s' in text:
+                                frames_match = re.search(r'(\d+)/(\d+)', text)
+                                if frames_match:
+                                    current, total = frames_match.groups()
+                                    self.gui_ref.root.after(0, lambda: self.gui_ref.set_status(
+                                        f"Processing audio... ({current}/{total} frames, {percentage}%)", 'info'))
+                    except:
+                        pass
+                
+                # Still write to original stderr for any other output
+                self.original_stderr.write(text)
+            
+            def flush(self):
+                self.original_stderr.flush()
         
-        # only assign speaker if timestamp is very close
-        # handles timing misalignments
-        if min_distance <= 0.8:
-            return closest_speaker
+        # Use progress capture during transcription
+        progress_capture = ProgressCapture(self)
+        original_stderr = sys.stderr
         
-        return None
+        if self.long_file_var.get():
+            return self.run_whisper_chunked(audio, transcribe_params, layout, on_segment)
+        
+        try:
+            sys.stderr = progress_capture
+            return transcribe_streaming(self.model, audio, on_segment, self.cancel_token, **transcribe_params)
+        finally:
+            sys.stderr = original_stderr
+    
+    def expected_speech_source(self):
+        """SpeechMap source the voice activity filter will use, as far as it is known before the run"""
+        if self.diarization_result:
+            return 'diarization'
+        if self.speaker_diarization_var.get() and PYANNOTE_AVAILABLE and not self.parallel_diarization_var.get():
+            return 'diarization'
+        return 'energy'
+    
+    def run_whisper_speech_only(self, audio, transcribe_params, layout):
+        """Voice activity pre-filter: transcribe only the speech regions, timestamps mapped back"""
+        # a finished diarization already marks where people talk (not while it runs concurrently)
+        if self.diarization_result and layout != 'concurrent':
+            speech_map = SpeechMap.from_annotation(self.diarization_result, len(audio) / SAMPLE_RATE)
+        else:
+            speech_map = SpeechMap.from_audio(audio)
+        self.speech_source = speech_map.source
+        summary = speech_map.summary_text()
+        self.root.after(0, lambda: self.set_status(f"Processing audio: {summary}", 'info'))
+        
+        start = time.perf_counter()
+        result = transcribe_speech_only(lambda speech, callback: self.run_whisper(speech, transcribe_params, layout, callback),
+                                        audio, speech_map, self.show_live_segment)
+        speedup = speech_map.duration / max(time.perf_counter() - start, 1e-9)
+        self.root.after(0, lambda: self.set_status(f"Voice activity: {summary} ({speedup:.1f}x realtime)", 'info'))
+        return result
+    
+    def run_whisper_chunked(self, audio, transcribe_params, layout, on_segment):
+        """Long-file mode: transcribe chunks in worker processes, with progress counted in chunks"""
+        workers = default_chunk_workers()
+        
+        def on_chunk(done, total):
+            percentage = int(done * 100 / total)
+            self.update_progress(50 + percentage // 2 if layout == 'after_diarization' else percentage)
+            if layout != 'concurrent':
+                self.update_current_progress(percentage)
+            self.root.after(0, lambda: self.set_status(
+                f"Processing audio... ({done}/{total} chunks on {workers} workers)", 'info'))
+        
+        self.root.after(0, lambda: self.set_status(f"Processing audio in chunks on {workers} workers...", 'info'))
+        return transcribe_chunked(self.model, self.current_model_name, audio, DEFAULT_CHUNK_MINUTES, workers,
+                                  on_segment, on_chunk, cancel_token=self.cancel_token, **transcribe_params)
+    
+    def show_live_segment(self, segment):
+        """Queue a freshly decoded segment for display (called on the transcription thread)"""
+        speaker = None
+        if self.speaker_index is not None:
+            speaker = assign_speakers_to_intervals([segment['start']], [segment['end']], self.speaker_index)[0]
+        self.root.after(0, lambda: self.append_live_segment(segment, speaker))
+    
+    def append_live_segment(self, segment, speaker=None):
+        """Append one segment while transcription is still running; display_results redraws at the end"""
+        if self.transcription_result is not None:
+            return  # final results are already on screen
+        text = segment['text'].strip()
+        if self.timestamps_var.get() or self.clean_format_var.get():
+            start_time = self.format_timestamp(segment['start'])
+            end_time = self.format_timestamp(segment['end'])
+            speaker_prefix = f"[{speaker}] " if speaker is not None else ""
+            self.result_text.insert(tk.END, f"[{start_time} - {end_time}] {speaker_prefix}{text}\n\n")
+        else:
+            self.result_text.insert(tk.END, f"{text} ")
+        self.result_text.see(tk.END)
+    
+    def run_diarization_and_whisper_concurrently(self, audio, transcribe_params):
+        """Run diarization and Whisper at the same time, each on its share of CPU threads"""
+        diarization_threads, whisper_threads = split_cpu_threads()
+        
+        def _show_concurrent_layout():
+            self.current_progress_label.config(text=f"Speaker Diarization ({diarization_threads} threads):")
+            self.progress_label.config(text=f"Transcription ({whisper_threads} threads):")
+            self.set_status("Running speaker diarization and transcription in parallel...", 'info')
+        self.root.after(0, _show_concurrent_layout)
+        self.update_current_progress(0)
+        self.update_progress(0)
+        
+        _, result, error = run_phases_concurrently(
+            lambda: self.run_diarization(audio, concurrent=True),
+            lambda: self.run_whisper(audio, transcribe_params, 'concurrent'),
+            diarization_threads,
+            whisper_threads
+        )
+        if isinstance(error, TranscriptionCancelled):
+            raise error
+        return result
+    
+    def reset_progress_labels(self):
+        """Restore the default progress bar captions"""
+        self.current_progress_label.config(text="Current Task:")
+        self.progress_label.config(text="Overall Progress:")
     
     def display_results(self):
         self.result_text.delete(1.0, tk.END)
@@ -1087,7 +3270,7 @@ class WhisperGUI:
                 
                 speaker = None
                 if self.speaker_diarization_var.get() and self.diarization_result:
-                    speaker = self.get_speaker_at_time(segment['start'])
+                    speaker = segment.get('speaker')
                 
                 speaker_prefix = f"[{speaker}] " if speaker is not None else ""
                 
@@ -1103,14 +3286,19 @@ class WhisperGUI:
                         translated_text = self.translated_segments[segment_key]
                         mapped_words = self.map_translated_words_to_timings(segment['words'], translated_text)
                         
-                        for mapped_word in mapped_words:
+                        # mapped timings differ from the original words, so assign them in one pass
+                        mapped_speakers = [None] * len(mapped_words)
+                        if self.speaker_diarization_var.get() and self.speaker_index:
+                            mapped_speakers = assign_speakers_to_intervals(
+                                [w['start'] for w in mapped_words],
+                                [w['end'] for w in mapped_words],
+                                self.speaker_index)
+                        
+                        for mapped_word, word_speaker in zip(mapped_words, mapped_speakers):
                             word_start = self.format_timestamp(mapped_word['start'])
                             word_end = self.format_timestamp(mapped_word['end'])
                             word_text = mapped_word['word']
                             
-                            word_speaker = None
-                            if self.speaker_diarization_var.get() and self.diarization_result:
-                                word_speaker = self.get_speaker_at_time(mapped_word['start'])
                             word_speaker_prefix = f"[{word_speaker}] " if word_speaker is not None else ""
                             self.result_text.insert(tk.END, f"  {word_start}-{word_end}: {word_speaker_prefix}{word_text}\n")
                             
@@ -1124,7 +3312,7 @@ class WhisperGUI:
                             
                             word_speaker = None
                             if self.speaker_diarization_var.get() and self.diarization_result:
-                                word_speaker = self.get_speaker_at_time(word['start'])
+                                word_speaker = word.get('speaker')
                             word_speaker_prefix = f"[{word_speaker}] " if word_speaker is not None else ""
                             self.result_text.insert(tk.END, f"  {word_start}-{word_end}: {word_speaker_prefix}{word_text}\n")
                         
@@ -1206,7 +3394,7 @@ class WhisperGUI:
             
             speaker = None
             if self.speaker_diarization_var.get() and self.diarization_result:
-                speaker = self.get_speaker_at_time(segment['start'])
+                speaker = segment.get('speaker')
             
             speaker_prefix = f"[{speaker}] " if speaker is not None else ""
             self.result_text.insert(tk.END, f"[{start_time} - {end_time}] {speaker_prefix}{text}\n")
@@ -1220,6 +3408,23 @@ class WhisperGUI:
         
         segments = []
         
+        # precomputed speakers in segment order, with the whole start second shown in the text;
+        # matches come in the same order, so a cursor pairs each with its own segment even when
+        # several segments start within the same second
+        segment_speakers = [(int(segment['start']), segment.get('speaker'))
+                            for segment in self.transcription_result.get('segments', [])]
+        cursor = 0
+        
+        def next_segment_speaker(start_time):
+            nonlocal cursor
+            hours, minutes, seconds = (int(part) for part in start_time.split(':'))
+            start_seconds = hours * 3600 + minutes * 60 + seconds
+            for index in range(cursor, len(segment_speakers)):
+                if segment_speakers[index][0] == start_seconds:
+                    cursor = index + 1
+                    return segment_speakers[index][1]
+            return None
+        
         # determine if using clean or detailed format
         is_clean_format = self.clean_format_var.get() or 'Full segment:' not in content
         
@@ -1250,13 +3455,10 @@ class WhisperGUI:
                             start_time, end_time, speaker_part, text = match
                             clean_text = ' '.join(text.strip().split())
                             speaker_prefix = speaker_part if speaker_part and speaker_part.strip() else ""
+                            speaker = next_segment_speaker(start_time)
                             
                             # If no speaker in Full segment line, try to find it from original data
                             if not speaker_prefix and self.speaker_diarization_var.get() and self.diarization_result:
-                                # Convert timestamp back to seconds to find speaker
-                                time_parts = start_time.split(':')
-                                start_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + int(time_parts[2])
-                                speaker = self.get_speaker_at_time(start_seconds)
                                 speaker_prefix = f"[{speaker}] " if speaker is not None else ""
                             
                             segments.append(f"[{start_time} - {end_time}] {speaker_prefix}{clean_text}")
@@ -1266,10 +3468,8 @@ class WhisperGUI:
                             
                             # Try to find speaker from original data
                             speaker_prefix = ""
+                            speaker = next_segment_speaker(start_time)
                             if self.speaker_diarization_var.get() and self.diarization_result:
-                                time_parts = start_time.split(':')
-                                start_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + int(time_parts[2])
-                                speaker = self.get_speaker_at_time(start_seconds)
                                 speaker_prefix = f"[{speaker}] " if speaker is not None else ""
                             
                             segments.append(f"[{start_time} - {end_time}] {speaker_prefix}{clean_text}")
@@ -1359,7 +3559,7 @@ class WhisperGUI:
                 
                 # Add speaker info if available
                 if self.speaker_diarization_var.get() and self.diarization_result:
-                    speaker = self.get_speaker_at_time(segment['start'])
+                    speaker = segment.get('speaker')
                     if speaker:
                         text = f"[{speaker}] {text}"
                 
@@ -1379,55 +3579,32 @@ class WhisperGUI:
                 
                 # Add speaker info if available
                 if self.speaker_diarization_var.get() and self.diarization_result:
-                    speaker = self.get_speaker_at_time(segment['start'])
+                    speaker = segment.get('speaker')
                     if speaker:
                         text = f"[{speaker}] {text}"
                 
                 f.write(f"{start_time} --> {end_time}\n")
                 f.write(f"{text}\n\n")
     
-    def translate_text(self, text, target_lang='es'):
-        """Translate text using Google Translate (handles both sync and async versions)"""
-        if not GOOGLETRANS_AVAILABLE:
-            return text
+    def translate_texts(self, texts, target_langs, progress_callback=None):
+        """Translate texts into each target language in deduplicated batches.
         
-        try:
-            import asyncio
-            
-            translator = Translator()
-            result = translator.translate(text, dest=target_lang)
-            
-            # check if translator returned a coroutine
-            if asyncio.iscoroutine(result):
-                # handle GUI context async execution
-                try:
-                    # Try nest_asyncio for GUI compatibility
-                    try:
-                        import nest_asyncio
-                        nest_asyncio.apply()
-                        loop = asyncio.get_event_loop()
-                        result = loop.run_until_complete(result)
-                    except ImportError:
-                        # fallback to running asyncio in separate thread
-                        import concurrent.futures
-                        import threading
-                        
-                        def run_async():
-                            return asyncio.run(result)
-                        
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            future = executor.submit(run_async)
-                            result = future.result(timeout=10)  # 10 second timeout
-                            
-                except Exception as async_error:
-                    print(f"Async translation failed: {async_error}")
-                    return text
-            
-            return result.text if hasattr(result, 'text') else str(result)
-                
-        except Exception as e:
-            print(f"Translation warning: {e}")
-            return text  # Return original text if translation fails
+        Returns ({lang: translations}, error); originals are kept where translation fails.
+        """
+        error = self.translation_backend_unavailable()
+        if error:
+            return {lang: list(texts) for lang in target_langs}, error
+        
+        # persistent translation memory first
+        memory = None
+        if self.use_cache_var.get():
+            self.open_caches()
+            memory = self.translation_memory
+        engine = get_translation_engine(self.translation_backend_var.get())
+        source_lang = transcript_language(self.transcription_result, self.transcribe_params)
+        results = translate_languages(engine, texts, target_langs, source_lang, memory, progress_callback)
+        error = next((batcher.error for _, batcher in results.values() if batcher.error), None)
+        return {lang: translated for lang, (translated, _) in results.items()}, error
     
     def map_translated_words_to_timings(self, original_words, translated_text):
         """Map translated text back to original word timings"""
@@ -1480,127 +3657,116 @@ class WhisperGUI:
         
         try:
             segments = self.transcription_result['segments']
-            total_segments = len(segments)
+            texts = [segment['text'].strip() for segment in segments]
             
-            # Also translate full text if available
-            if 'text' in self.transcription_result:
-                total_segments += 1
+            self.root.after(0, lambda: self.set_status(f"Translating {len(texts)} segments to {target_lang}...", 'info'))
             
-            self.root.after(0, lambda: self.set_status(f"Translating {total_segments} items to {target_lang}...", 'info'))
+            def on_progress(done, total):
+                progress = int((done / total) * 100) if total else 100
+                self.root.after(0, lambda p=progress: self.update_current_progress(p))
             
-            current_item = 0
+            # translate entire segments for better context, batched and deduplicated
+            translated, error = self.translate_texts(texts, [target_lang], on_progress)
+            translated = translated[target_lang]
             
-            # Translate full text first if available
+            # the full text is the segments' text, so it is put together from their translations
+            # instead of being sent again as one oversized request
             if 'text' in self.transcription_result:
-                full_text = self.transcription_result['text']
-                translated_full_text = self.translate_text(full_text, target_lang)
-                self.translated_segments['full_text'] = translated_full_text
-                current_item += 1
-                progress = int((current_item / total_segments) * 100)
-                self.root.after(0, lambda p=progress: self.update_current_progress(p))
+                self.translated_segments['full_text'] = ' '.join(text for text in translated if text)
             
-            for i, segment in enumerate(segments):
-                text = segment['text'].strip()
-                
-                # Update progress
-                current_item += 1
-                progress = int((current_item / total_segments) * 100)
-                self.root.after(0, lambda p=progress: self.update_current_progress(p))
-                
-                # translate entire segment for better context
-                translated_text = self.translate_text(text, target_lang)
-                
+            for segment, translated_text in zip(segments, translated):
                 # Cache the translation
                 segment_key = f"{segment['start']}_{segment['end']}"
                 self.translated_segments[segment_key] = translated_text
             
             # Translation complete, update display
             self.root.after(0, lambda: self.update_current_progress(100))
-            self.root.after(0, lambda: self.set_status("Translation complete! Updating display...", 'success'))
+            if error:
+                self.root.after(0, lambda: self.set_status(f"Translation skipped: {error}", 'warning'))
+            else:
+                self.root.after(0, lambda: self.set_status("Translation complete! Updating display...", 'success'))
             self.root.after(0, self.display_results)
             
         except Exception as e:
             self.root.after(0, lambda: self.set_status(f"Translation error: {e}", 'error'))
             self.root.after(0, self.display_results)  # Show without translation
     
-    def export_translated_srt(self, filename, target_lang='es'):
-        """Export transcript as translated SRT subtitle file"""
-        if not GOOGLETRANS_AVAILABLE:
-            messagebox.showerror("Error", "Google Translate library not available. Please install googletrans.")
-            return
-            
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(self.transcription_result['segments'], 1):
-                    start_time = self.format_subtitle_timestamp_srt(segment['start'])
-                    end_time = self.format_subtitle_timestamp_srt(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    # Add speaker info if available
-                    speaker_prefix = ""
-                    if self.speaker_diarization_var.get() and self.diarization_result:
-                        speaker = self.get_speaker_at_time(segment['start'])
-                        if speaker:
-                            speaker_prefix = f"[{speaker}] "
-                    
-                    # Use cached translation if available for the same language, otherwise translate
-                    segment_key = f"{segment['start']}_{segment['end']}"
-                    if (segment_key in self.translated_segments and 
-                        target_lang == self.target_language_var.get() and 
-                        self.translate_var.get()):
-                        # reuse existing translation to avoid double-translating
-                        translated_text = self.translated_segments[segment_key]
-                    else:
-                        # Translate from original text
-                        translated_text = self.translate_text(text, target_lang)
-                    
-                    final_text = f"{speaker_prefix}{translated_text}"
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{final_text}\n\n")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export translated SRT: {str(e)}")
+    def translations_for_export(self, target_langs):
+        """Segment translations per language, reusing the on-screen ones for the same language"""
+        segments = self.transcription_result['segments']
+        segment_keys = [f"{segment['start']}_{segment['end']}" for segment in segments]
+        current_target = self.target_language_var.get() if self.translate_var.get() else None
+        
+        translations = {}
+        missing = []
+        for lang in target_langs:
+            if lang == current_target and all(key in self.translated_segments for key in segment_keys):
+                # reuse existing translation to avoid double-translating
+                translations[lang] = [self.translated_segments[key] for key in segment_keys]
+            else:
+                missing.append(lang)
+        
+        if missing:
+            # Translate from original text, all missing languages in parallel
+            translated, error = self.translate_texts([segment['text'].strip() for segment in segments], missing)
+            if error:
+                raise TranslationUnavailable(error)
+            translations.update(translated)
+        return translations
     
-    def export_translated_vtt(self, filename, target_lang='es'):
-        """Export transcript as translated WebVTT subtitle file"""
-        if not GOOGLETRANS_AVAILABLE:
-            messagebox.showerror("Error", "Google Translate library not available. Please install googletrans.")
-            return
-            
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("WEBVTT\n\n")
-                
-                for segment in self.transcription_result['segments']:
-                    start_time = self.format_subtitle_timestamp_vtt(segment['start'])
-                    end_time = self.format_subtitle_timestamp_vtt(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    # Add speaker info if available
-                    speaker_prefix = ""
-                    if self.speaker_diarization_var.get() and self.diarization_result:
-                        speaker = self.get_speaker_at_time(segment['start'])
-                        if speaker:
-                            speaker_prefix = f"[{speaker}] "
-                    
-                    # Use cached translation if available for the same language, otherwise translate
-                    segment_key = f"{segment['start']}_{segment['end']}"
-                    if (segment_key in self.translated_segments and 
-                        target_lang == self.target_language_var.get() and 
-                        self.translate_var.get()):
-                        # reuse existing translation to avoid double-translating
-                        translated_text = self.translated_segments[segment_key]
-                    else:
-                        # Translate from original text
-                        translated_text = self.translate_text(text, target_lang)
-                    
-                    final_text = f"{speaker_prefix}{translated_text}"
-                    
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{final_text}\n\n")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export translated VTT: {str(e)}")
+    def subtitle_cues(self):
+        """Timestamps and speaker prefixes per segment, shared by every translated export"""
+        cues = []
+        for segment in self.transcription_result['segments']:
+            # Add speaker info if available
+            speaker_prefix = ""
+            if self.speaker_diarization_var.get() and self.diarization_result:
+                speaker = segment.get('speaker')
+                if speaker:
+                    speaker_prefix = f"[{speaker}] "
+            cues.append({
+                'srt': (self.format_subtitle_timestamp_srt(segment['start']),
+                        self.format_subtitle_timestamp_srt(segment['end'])),
+                'vtt': (self.format_subtitle_timestamp_vtt(segment['start']),
+                        self.format_subtitle_timestamp_vtt(segment['end'])),
+                'prefix': speaker_prefix
+            })
+        return cues
+    
+    def write_translated_srt(self, filename, cues, translations):
+        """Write one translated SRT subtitle file"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            for i, (cue, translated_text) in enumerate(zip(cues, translations), 1):
+                f.write(f"{i}\n")
+                f.write(f"{cue['srt'][0]} --> {cue['srt'][1]}\n")
+                f.write(f"{cue['prefix']}{translated_text}\n\n")
+    
+    def write_translated_vtt(self, filename, cues, translations):
+        """Write one translated WebVTT subtitle file"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("WEBVTT\n\n")
+            for cue, translated_text in zip(cues, translations):
+                f.write(f"{cue['vtt'][0]} --> {cue['vtt'][1]}\n")
+                f.write(f"{cue['prefix']}{translated_text}\n\n")
+    
+    def export_translated_subtitle_files(self, filename, target_langs, formats):
+        """Translate into every target language, then write each language/format pair; returns the paths"""
+        translations = self.translations_for_export(target_langs)
+        cues = self.subtitle_cues()
+        
+        multiple = len(target_langs) > 1
+        root, _ = os.path.splitext(filename)
+        written = []
+        for lang in target_langs:
+            for format_type in formats:
+                ext = ".srt" if format_type == "SRT" else ".vtt"
+                path = translated_output_path(root + ext if len(formats) > 1 else filename, lang, multiple)
+                if format_type == "SRT":
+                    self.write_translated_srt(path, cues, translations[lang])
+                else:
+                    self.write_translated_vtt(path, cues, translations[lang])
+                written.append(path)
+        return written
     
     def export_translated_subtitles(self):
         """Export translated subtitles with language selection"""
@@ -1608,14 +3774,15 @@ class WhisperGUI:
             messagebox.showerror("Error", "No transcript to export as translated subtitles.")
             return
         
-        if not GOOGLETRANS_AVAILABLE:
-            messagebox.showerror("Error", "Google Translate library not available. Please install googletrans.")
+        reason = self.translation_backend_unavailable()
+        if reason:
+            messagebox.showerror("Error", reason)
             return
         
         # Create dialog for language and format selection
         dialog = tk.Toplevel(self.root)
         dialog.title("Export Translated Subtitles")
-        dialog.geometry("400x200")
+        dialog.geometry("400x360")
         dialog.transient(self.root)
         dialog.grab_set()
         
@@ -1628,8 +3795,8 @@ class WhisperGUI:
         main_frame = ttk.Frame(dialog, padding="20")
         main_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Language selection
-        ttk.Label(main_frame, text="Target Language:").grid(row=0, column=0, sticky=tk.W, pady=(0, 10))
+        # Language selection, several languages are exported in one pass
+        ttk.Label(main_frame, text="Target Languages:").grid(row=0, column=0, sticky=(tk.W, tk.N), pady=(0, 10))
         
         languages = {
             "Spanish": "es", "French": "fr", "German": "de", "Italian": "it", 
@@ -1648,16 +3815,30 @@ class WhisperGUI:
                     default_lang = lang_name
                     break
         
-        lang_var = tk.StringVar(value=default_lang)
-        lang_combo = ttk.Combobox(main_frame, textvariable=lang_var, values=list(languages.keys()), 
-                                 state="readonly", width=15)
-        lang_combo.grid(row=0, column=1, sticky=tk.W, pady=(0, 10))
+        lang_list_frame = ttk.Frame(main_frame)
+        lang_list_frame.grid(row=0, column=1, sticky=tk.W, pady=(0, 10))
+        lang_list = tk.Listbox(lang_list_frame, selectmode=tk.MULTIPLE, exportselection=False,
+                               height=8, width=18, relief='flat', font=self.app_font)
+        lang_scroll = ttk.Scrollbar(lang_list_frame, orient=tk.VERTICAL, command=lang_list.yview)
+        lang_list.configure(yscrollcommand=lang_scroll.set)
+        if self.dark_mode.get():
+            lang_list.configure(bg="#1e1e1e", fg="#cccccc", selectbackground="#264f78", selectforeground="#ffffff")
+            lang_scroll.configure(style="Dark.Vertical.TScrollbar")
+        else:
+            lang_list.configure(bg="white", fg="black", selectbackground="#0078d4", selectforeground="white")
+        lang_list.pack(side=tk.LEFT)
+        lang_scroll.pack(side=tk.LEFT, fill=tk.Y)
+        for i, lang_name in enumerate(languages):
+            lang_list.insert(tk.END, lang_name)
+            if lang_name == default_lang:
+                lang_list.selection_set(i)
+                lang_list.see(i)
         
         # Format selection
         ttk.Label(main_frame, text="Format:").grid(row=1, column=0, sticky=tk.W, pady=(0, 10))
         
         format_var = tk.StringVar(value="SRT")
-        format_combo = ttk.Combobox(main_frame, textvariable=format_var, values=["SRT", "WebVTT"], 
+        format_combo = ttk.Combobox(main_frame, textvariable=format_var, values=["SRT", "WebVTT", "SRT + WebVTT"], 
                                    state="readonly", width=15)
         format_combo.grid(row=1, column=1, sticky=tk.W, pady=(0, 10))
         
@@ -1668,6 +3849,7 @@ class WhisperGUI:
             cache_info = f"Note: Will use cached translation if same language ({current_target}) is selected."
         else:
             cache_info = "Note: Will translate from original text."
+        cache_info += "\nSeveral languages are saved as name.<lang>.srt / .vtt."
         
         info_label = ttk.Label(main_frame, text=cache_info, font=('Arial', 8))
         info_label.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 10))
@@ -1677,16 +3859,20 @@ class WhisperGUI:
         button_frame.grid(row=3, column=0, columnspan=2, pady=(10, 0))
         
         def export_translated():
-            target_lang = languages[lang_var.get()]
+            target_langs = [languages[lang_list.get(i)] for i in lang_list.curselection()]
+            if not target_langs:
+                messagebox.showerror("Error", "Select at least one target language.")
+                return
             format_type = format_var.get()
+            formats = ["SRT", "WebVTT"] if format_type == "SRT + WebVTT" else [format_type]
             
             # File dialog
-            if format_type == "SRT":
-                file_types = [("SRT files", "*.srt"), ("All files", "*.*")]
-                default_ext = ".srt"
-            else:
+            if format_type == "WebVTT":
                 file_types = [("WebVTT files", "*.vtt"), ("All files", "*.*")]
                 default_ext = ".vtt"
+            else:
+                file_types = [("SRT files", "*.srt"), ("All files", "*.*")]
+                default_ext = ".srt"
             
             filename = filedialog.asksaveasfilename(
                 title=f"Export Translated {format_type} Subtitles",
@@ -1696,12 +3882,11 @@ class WhisperGUI:
             
             if filename:
                 try:
-                    if format_type == "SRT":
-                        self.export_translated_srt(filename, target_lang)
-                    else:
-                        self.export_translated_vtt(filename, target_lang)
-                    
-                    messagebox.showinfo("Success", f"Translated {format_type} subtitles exported to {filename}")
+                    self.set_status(f"Translating subtitles to {', '.join(target_langs)}...", 'info')
+                    self.root.update_idletasks()
+                    written = self.export_translated_subtitle_files(filename, target_langs, formats)
+                    self.set_status(f"Exported {len(written)} translated subtitle files", 'success')
+                    messagebox.showinfo("Success", "Translated subtitles exported to:\n" + "\n".join(written))
                     dialog.destroy()
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to export translated subtitles: {str(e)}")
@@ -1709,12 +3894,20 @@ class WhisperGUI:
         ttk.Button(button_frame, text="Export", command=export_translated, style='App.TButton').pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=dialog.destroy, style='App.TButton').pack(side=tk.LEFT, padx=5)
 
-def run_cli(args):
-    """Run transcription in CLI mode"""
-    if not os.path.exists(args.input):
-        print(f"Error: Input file '{args.input}' does not exist.")
-        return 1
-    
+def load_diarization_pipeline_cli():
+    """Load the pyannote pipeline for CLI and server runs; raises if it can't be loaded"""
+    from pyannote.audio import Pipeline
+    hf_token = os.getenv('TOKEN')
+    try:
+        diarization_pipeline = Pipeline.from_pretrained(DIARIZATION_PIPELINE_NAME, use_auth_token=hf_token)
+    except Exception:
+        diarization_pipeline = Pipeline.from_pretrained(DIARIZATION_PIPELINE_NAME, use_auth_token=True)
+    if torch.cuda.is_available():
+        diarization_pipeline = diarization_pipeline.to(torch.device("cuda"))
+    return diarization_pipeline
+
+def load_cli_models(args):
+    """Load the Whisper model and, if enabled, the diarization pipeline for CLI runs"""
     print(f"Loading Whisper model: {args.model}")
     model = whisper.load_model(args.model)
     
@@ -1726,52 +3919,232 @@ def run_cli(args):
         else:
             try:
                 print("Loading speaker diarization model...")
-                hf_token = os.getenv('TOKEN')
-                try:
-                    diarization_pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",
-                                                                    use_auth_token=hf_token)
-                except Exception:
-                    diarization_pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",
-                                                                    use_auth_token=True)
-                if torch.cuda.is_available():
-                    diarization_pipeline = diarization_pipeline.to(torch.device("cuda"))
+                diarization_pipeline = load_diarization_pipeline_cli()
             except Exception as e:
                 print(f"Warning: Speaker diarization unavailable: {e}")
                 diarization_pipeline = None
     
-    diarization_result = None
-    if diarization_pipeline:
-        try:
-            print("Performing speaker diarization...")
-            # Convert file if needed for diarization
-            file_ext = os.path.splitext(args.input)[1].lower()
-            if file_ext in ['.wav', '.mp3', '.m4a', '.flac']:
-                diarization_file = args.input
+    return model, diarization_pipeline
+
+def run_cli(args):
+    """Run transcription in CLI mode"""
+    if getattr(args, 'stream_jsonl', False):
+        start_jsonl_stream()
+    
+    if getattr(args, 'job_db', None):
+        return run_job_store_cli(args)
+    
+    if is_batch_cli(args):
+        return run_batch_cli(args)
+    
+    if args.input == '-':
+        return run_stdin_cli(args)
+    
+    if not os.path.exists(args.input):
+        print(f"Error: Input file '{args.input}' does not exist.")
+        return 1
+    
+    model, diarization_pipeline = load_cli_models(args)
+    result_cache = open_result_cache(args)
+    exit_code = process_cli_input(args, model, diarization_pipeline, result_cache, open_diarization_cache(args))
+    if result_cache is not None:
+        print(f"Result cache: {result_cache.stats_text()}")
+    return exit_code
+
+def run_stdin_cli(args):
+    """Handle --input -: transcribe a live stream from stdin, writing each segment once it is final"""
+    if args.export_srt_translated or args.export_vtt_translated:
+        print("Error: translated subtitle export is not supported with --input -")
+        return 1
+    if args.speaker_diarization:
+        print("Note: speaker diarization needs the whole recording and is skipped with --input -")
+    
+    print(f"Loading Whisper model: {args.model}")
+    model = whisper.load_model(args.model)
+    
+    transcribe_params = {"word_timestamps": args.word_timestamps, "verbose": None}
+    if args.language and args.language != "auto":
+        transcribe_params["language"] = args.language
+    if args.translate:
+        transcribe_params["task"] = "translate"
+    
+    def format_timestamp(seconds, decimal_mark):
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        seconds_remainder = seconds % 60
+        milliseconds = int((seconds_remainder - int(seconds_remainder)) * 1000)
+        return f"{hours:02d}:{minutes:02d}:{int(seconds_remainder):02d}{decimal_mark}{milliseconds:03d}"
+    
+    try:
+        decoder = open_stdin_decoder(args.stdin_format)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    
+    # outputs are written and flushed segment by segment, so they can be followed while the stream runs
+    output_file = open(args.output, 'w', encoding='utf-8') if args.output else None
+    srt_file = open(args.export_srt, 'w', encoding='utf-8') if args.export_srt else None
+    vtt_file = open(args.export_vtt, 'w', encoding='utf-8') if args.export_vtt else None
+    if vtt_file:
+        vtt_file.write("WEBVTT\n\n")
+        vtt_file.flush()
+    
+    print(f"Transcribing stdin in {args.stream_window:g}s windows (Ctrl+C to stop)...")
+    count = 0
+    interrupted = False
+    try:
+        for segment in iter_rolling_transcription(model, decoder.stdout, transcribe_params, args.stream_window):
+            count += 1
+            text = segment['text'].strip()
+            if args.clean_format:
+                text = ' '.join(text.split())
+            if args.timestamps or args.clean_format:
+                start_time = str(timedelta(seconds=int(segment['start'])))
+                end_time = str(timedelta(seconds=int(segment['end'])))
+                line = f"[{start_time} - {end_time}] {text}"
             else:
-                # Convert video to audio
-                temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                temp_wav.close()
-                cmd = ['ffmpeg', '-i', args.input, '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', '-y', temp_wav.name]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    diarization_file = temp_wav.name
-                else:
-                    print("Warning: Could not convert file for diarization")
-                    diarization_file = args.input
+                line = text
             
-            diarization_result = diarization_pipeline(diarization_file)
-            
-            # Cleanup temp file if created
-            if diarization_file != args.input:
-                try:
-                    os.unlink(diarization_file)
-                except:
-                    pass
+            if getattr(args, 'stream_jsonl', False):
+                write_jsonl_record(segment_jsonl_record(segment, source='-'))
+            elif not output_file:
+                print(line, flush=True)
+            if output_file:
+                output_file.write(line + "\n")
+                output_file.flush()
+            if srt_file:
+                srt_file.write(f"{count}\n{format_timestamp(segment['start'], ',')} --> "
+                               f"{format_timestamp(segment['end'], ',')}\n{text}\n\n")
+                srt_file.flush()
+            if vtt_file:
+                vtt_file.write(f"{format_timestamp(segment['start'], '.')} --> "
+                               f"{format_timestamp(segment['end'], '.')}\n{text}\n\n")
+                vtt_file.flush()
+    except KeyboardInterrupt:
+        print("\nStopped by user")
+        interrupted = True
+        decoder.kill()
+    finally:
+        for f in (output_file, srt_file, vtt_file):
+            if f:
+                f.close()
+        decoder.stdout.close()
+        decoder.wait()
+    
+    if count == 0 and decoder.returncode != 0 and not interrupted:
+        print("Error: ffmpeg could not decode stdin (use --stdin-format for raw PCM)")
+        return 1
+    
+    print(f"Stream finished: {count} segments")
+    return 0
+
+def open_cli_cache(args, cache_class, subdir):
+    """Cache of cache_class configured from CLI args, or None with --no-cache"""
+    if getattr(args, 'no_cache', False):
+        return None
+    size_mb = getattr(args, 'cache_size_mb', None)
+    if size_mb is None:
+        size_mb = DEFAULT_CACHE_SIZE_MB
+    cache_dir = getattr(args, 'cache_dir', None)
+    return cache_class(os.path.join(cache_dir, subdir) if cache_dir else None,
+                       size_mb * 1024 * 1024, refresh=getattr(args, 'refresh', False))
+
+def open_result_cache(args):
+    """ResultCache configured from CLI args, or None with --no-cache"""
+    return open_cli_cache(args, ResultCache, "transcripts")
+
+def open_diarization_cache(args):
+    """DiarizationCache configured from CLI args, or None with --no-cache"""
+    if not PYANNOTE_AVAILABLE:
+        return None
+    return open_cli_cache(args, DiarizationCache, "diarization")
+
+def open_translation_memory(args):
+    """TranslationMemory configured from CLI args, or None with --no-cache"""
+    if getattr(args, 'no_cache', False):
+        return None
+    cache_dir = getattr(args, 'cache_dir', None)
+    return TranslationMemory(os.path.join(cache_dir, "translations.sqlite") if cache_dir else None,
+                             refresh=getattr(args, 'refresh', False))
+
+def clear_caches_cli(args):
+    """Handle --clear-cache: delete cached transcripts, diarization results and/or translations"""
+    args.no_cache = False
+    args.refresh = False
+    targets = ['transcripts', 'diarization', 'translations'] if args.clear_cache == 'all' else [args.clear_cache]
+    for target in targets:
+        if target == 'translations':
+            memory = open_translation_memory(args)
+            print(f"Removed {memory.clear()} translations from {memory.path}")
+            continue
+        cache_class = ResultCache if target == 'transcripts' else DiarizationCache
+        cache = open_cli_cache(args, cache_class, target)
+        removed = cache.evict(0)
+        print(f"Removed {removed} cached {target} entries from {cache.directory}")
+    return 0
+
+def list_translation_backends_cli():
+    """Handle --list-translation-backends"""
+    for name, backend in TRANSLATION_BACKENDS.items():
+        reason = backend.unavailable_reason()
+        print(f"{name}: {backend.description}")
+        print(f"    {backend.limits_text()}")
+        print(f"    {'unavailable: ' + reason if reason else 'available'}")
+    return 0
+
+def process_cli_input(args, model, diarization_pipeline, result_cache=None, diarization_cache=None,
+                      segment_callback=None, stage_callback=None, diarization_callback=None):
+    """Transcribe args.input with already loaded models and write the requested outputs.
+
+    segment_callback(segment) is called for every segment as it is transcribed
+    (all at once for a cached transcript), e.g. to track progress.
+    stage_callback(stage) is called as the file enters 'decoding', 'diarizing',
+    'transcribing' and 'exporting'; diarization_callback(stage, fraction, eta)
+    with DiarizationProgress updates.
+    """
+    def enter_stage(stage):
+        if stage_callback:
+            stage_callback(stage)
+    
+    # decode once; the same samples feed both Whisper and pyannote
+    enter_stage('decoding')
+    try:
+        audio = load_audio(args.input)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    
+    audio_hash = None
+    if result_cache is not None or diarization_cache is not None:
+        audio_hash = audio_content_hash(audio)
+    
+    def diarize_cli():
+        diarization_key = None
+        if diarization_cache is not None:
+            diarization_key = DiarizationCache.make_key(audio_hash)
+            cached = diarization_cache.get(diarization_key)
+            if cached is not None:
+                print("Speaker diarization loaded from cache")
+                return cached
+        last_printed = [None, -1]  # stage, tenth
+        
+        def on_progress(stage, fraction, eta):
+            # a line per stage and per 10% of the stage's share, so logs stay short
+            tenth = int(fraction * 10)
+            if [stage, tenth] != last_printed:
+                last_printed[:] = [stage, tenth]
+                print(diarization_progress_text(stage, fraction, eta))
+            if diarization_callback:
+                diarization_callback(stage, fraction, eta)
+        
+        try:
+            diarization_result = run_diarization_pipeline(diarization_pipeline, audio, DiarizationProgress(on_progress))
         except Exception as e:
             print(f"Warning: Speaker diarization failed: {e}")
-            diarization_result = None
-    
-    print("Processing audio...")
+            return None
+        if diarization_key:
+            diarization_cache.put(diarization_key, diarization_result)
+        return diarization_result
     
     # Prepare CLI transcription parameters
     transcribe_params = {
@@ -1789,38 +4162,130 @@ def run_cli(args):
             print(f"Warning: Whisper only supports translation to English. Target language '{args.target_language}' will be ignored.")
         transcribe_params["task"] = "translate"
     
-    result = model.transcribe(args.input, **transcribe_params)
+    # --stream-jsonl: one JSON object per segment on stdout as soon as Whisper decodes it
+    live_speaker_index = None
+    stream_jsonl = getattr(args, 'stream_jsonl', False)
     
-    def get_speaker_at_time_cli(timestamp):
-        if not diarization_result:
-            return None
-        
-        # First, try exact match
-        for turn, _, speaker in diarization_result.itertracks(yield_label=True):
-            if turn.start <= timestamp <= turn.end:
-                return speaker
-        
-        # Conservative fallback
-        closest_speaker = None
-        min_distance = float('inf')
-        
-        for turn, _, speaker in diarization_result.itertracks(yield_label=True):
-            if timestamp < turn.start:
-                distance = turn.start - timestamp
-            elif timestamp > turn.end:
-                distance = timestamp - turn.end
-            else:
-                distance = 0
-                return speaker
+    def report_segment(segment):
+        if stream_jsonl:
+            write_jsonl_record(segment_jsonl_record(segment, live_speaker_index, args.input))
+        if segment_callback:
+            segment_callback(segment)
+    on_segment = report_segment if stream_jsonl or segment_callback else None
+    
+    chunk_minutes = getattr(args, 'chunk_minutes', None)
+    checkpoint_minutes = None
+    if getattr(args, 'checkpoint', False):
+        checkpoint_minutes = getattr(args, 'checkpoint_minutes', None) or DEFAULT_CHECKPOINT_MINUTES
+    
+    use_vad = getattr(args, 'vad', False)
+    speech_source = None  # SpeechMap source the voice activity filter used
+    
+    def transcribe_whisper(whisper_audio, callback):
+        if checkpoint_minutes:
+            def on_window(done, total):
+                print(f"Window {done}/{total} transcribed, checkpoint saved")
             
-            if distance < min_distance:
-                min_distance = distance
-                closest_speaker = speaker
+            print(f"Checkpointed mode: {checkpoint_minutes:g}-minute windows, checkpoint in "
+                  f"{checkpoint_path(args.input)}")
+            return transcribe_checkpointed(model, args.model, whisper_audio, checkpoint_path(args.input),
+                                           checkpoint_minutes, callback, on_window, **transcribe_params)
+        if not chunk_minutes:
+            return transcribe_streaming(model, whisper_audio, callback, **transcribe_params)
+        workers = getattr(args, 'chunk_workers', None) or default_chunk_workers()
         
-        if min_distance <= 0.8:
-            return closest_speaker
+        def on_chunk(done, total):
+            print(f"Chunk {done}/{total} transcribed")
         
-        return None
+        print(f"Long-file mode: {chunk_minutes:g}-minute chunks on {workers} workers")
+        return transcribe_chunked(model, args.model, whisper_audio, chunk_minutes, workers, callback, on_chunk,
+                                  getattr(args, 'threads_per_worker', None), **transcribe_params)
+    
+    def transcribe_cli(diarization_result=None):
+        nonlocal speech_source
+        if not use_vad:
+            return transcribe_whisper(audio, on_segment)
+        # the diarization timeline already knows where people talk; otherwise detect it from the signal
+        if diarization_result:
+            speech_map = SpeechMap.from_annotation(diarization_result, len(audio) / SAMPLE_RATE)
+        else:
+            speech_map = SpeechMap.from_audio(audio)
+        speech_source = speech_map.source
+        print(f"Voice activity: {speech_map.summary_text()}")
+        start = time.perf_counter()
+        result = transcribe_speech_only(transcribe_whisper, audio, speech_map, on_segment)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            print(f"Whisper ran at {speech_map.duration / elapsed:.1f}x realtime on the full recording "
+                  f"({speech_map.speech_duration / elapsed:.1f}x on the speech it decoded)")
+        return result
+    
+    cache_key = None
+    result = None
+    if result_cache is not None:
+        # chunked, windowed and speech-only results differ slightly, so they are cached separately
+        key_params = dict(transcribe_params)
+        if chunk_minutes:
+            key_params['chunk_minutes'] = chunk_minutes
+        if checkpoint_minutes:
+            key_params['checkpoint_minutes'] = checkpoint_minutes
+        if use_vad:
+            # speech regions from diarization and from signal energy differ, and so do the transcripts;
+            # diarization only marks them when it finishes before transcription starts
+            diarized_first = diarization_pipeline and not getattr(args, 'parallel_diarization', False)
+            key_params['vad'] = 'diarization' if diarized_first else 'energy'
+        cache_key = ResultCache.make_key(audio_hash, args.model, key_params)
+        result = result_cache.get(cache_key)
+    cache_hit = result is not None
+    
+    if cache_hit:
+        print("Transcription loaded from cache")
+        diarization_result = None
+        if diarization_pipeline:
+            enter_stage('diarizing')
+            print("Performing speaker diarization...")
+            diarization_result = diarize_cli()
+    elif diarization_pipeline and getattr(args, 'parallel_diarization', False):
+        enter_stage('transcribing')
+        diarization_threads, whisper_threads = split_cpu_threads(args.diarization_threads)
+        print(f"Running speaker diarization ({diarization_threads} threads) and "
+              f"transcription ({whisper_threads} threads) in parallel...")
+        diarization_result, result, _ = run_phases_concurrently(
+            diarize_cli,
+            transcribe_cli,
+            diarization_threads,
+            whisper_threads
+        )
+    else:
+        diarization_result = None
+        if diarization_pipeline:
+            enter_stage('diarizing')
+            print("Performing speaker diarization...")
+            diarization_result = diarize_cli()
+            if on_segment and diarization_result:
+                # speakers are known before transcription starts, so streamed segments carry them
+                live_speaker_index = SpeakerIndex.from_annotation(diarization_result)
+        
+        enter_stage('transcribing')
+        print("Processing audio...")
+        result = transcribe_cli(diarization_result)
+    
+    enter_stage('exporting')
+    if cache_key and not cache_hit:
+        if use_vad and speech_source != key_params['vad']:
+            # diarization failed or found no speech, so the energy detector was used after all
+            key_params['vad'] = speech_source
+            cache_key = ResultCache.make_key(audio_hash, args.model, key_params)
+        result_cache.put(cache_key, result)
+    
+    # bulk speaker assignment for every segment and word, stored on the result
+    if diarization_result:
+        assign_speakers(result, diarization_result)
+    
+    if on_segment and cache_hit:
+        # nothing was decoded, stream the cached segments
+        for segment in result['segments']:
+            on_segment(segment)
     
     def format_timestamp_cli(seconds):
         return str(timedelta(seconds=int(seconds)))
@@ -1855,7 +4320,7 @@ def run_cli(args):
                 
                 # Add speaker info if available
                 if speaker_diarization and diarization_result:
-                    speaker = get_speaker_at_time_cli(segment['start'])
+                    speaker = segment.get('speaker')
                     if speaker:
                         text = f"[{speaker}] {text}"
                 
@@ -1875,112 +4340,91 @@ def run_cli(args):
                 
                 # Add speaker info if available
                 if speaker_diarization and diarization_result:
-                    speaker = get_speaker_at_time_cli(segment['start'])
+                    speaker = segment.get('speaker')
                     if speaker:
                         text = f"[{speaker}] {text}"
                 
                 f.write(f"{start_time} --> {end_time}\n")
                 f.write(f"{text}\n\n")
     
-    def translate_text_cli(text, target_lang='es'):
-        """Translate text using Google Translate for CLI (handles both sync and async versions)"""
-        if not GOOGLETRANS_AVAILABLE:
-            return text
-        
-        try:
-            import asyncio
-            
-            translator = Translator()
-            result = translator.translate(text, dest=target_lang)
-            
-            # check if translator returned a coroutine
-            if asyncio.iscoroutine(result):
-                # CLI mode async execution
-                try:
-                    result = asyncio.run(result)
-                except RuntimeError as e:
-                    if "cannot be called from a running event loop" in str(e):
-                        # running event loop, use run_until_complete
-                        try:
-                            loop = asyncio.get_event_loop()
-                            result = loop.run_until_complete(result)
-                        except Exception:
-                            print(f"Translation skipped due to async limitation: {text[:50]}...")
-                            return text
-                    else:
-                        print(f"Translation error: {e}")
-                        return text
-            
-            return result.text if hasattr(result, 'text') else str(result)
-            
-        except Exception as e:
-            print(f"Translation warning: {e}")
-            return text  # Return original text if translation fails
+    translation_memory = None
+    if args.export_srt_translated or args.export_vtt_translated:
+        translation_memory = open_translation_memory(args)
+    source_lang = transcript_language(result, transcribe_params)
     
-    def export_translated_srt_cli(filename, result, diarization_result, speaker_diarization, target_lang='es'):
-        """Export translated SRT subtitle file in CLI mode"""
-        if not GOOGLETRANS_AVAILABLE:
-            print("Warning: Google Translate library not available. Please install googletrans.")
+    def export_translated_subtitles_cli(result, diarization_result, speaker_diarization, target_langs):
+        """Translate into every target language in parallel, then write each language/format pair"""
+        reason = TRANSLATION_BACKENDS[args.translation_backend].unavailable_reason()
+        if reason:
+            print(f"Warning: {reason}")
             return False
+        
+        # timestamps and speaker labels are the same in every language, so build them once
+        segments = result['segments']
+        cues = []
+        for segment in segments:
+            speaker_prefix = ""
+            if speaker_diarization and diarization_result:
+                speaker = segment.get('speaker')
+                if speaker:
+                    speaker_prefix = f"[{speaker}] "
+            cues.append({
+                'srt': (format_subtitle_timestamp_srt_cli(segment['start']),
+                        format_subtitle_timestamp_srt_cli(segment['end'])),
+                'vtt': (format_subtitle_timestamp_vtt_cli(segment['start']),
+                        format_subtitle_timestamp_vtt_cli(segment['end'])),
+                'prefix': speaker_prefix
+            })
+        
+        engine = get_translation_engine(args.translation_backend)
+        texts = [segment['text'].strip() for segment in segments]
+        results = translate_languages(engine, texts, target_langs, source_lang, translation_memory)
+        
+        multiple = len(target_langs) > 1
+        success = True
+        for lang in target_langs:
+            translations, batcher = results[lang]
+            if batcher.error:
+                print(f"Error translating subtitles to {lang}: {batcher.error}")
+                success = False
+                continue
+            print(f"Translated {len(texts)} segments to {lang} with {batcher.requests} "
+                  f"{args.translation_backend} request(s)")
+            if batcher.failed:
+                print(f"Warning: {batcher.failed} distinct text(s) could not be translated to {lang} "
+                      f"and are left in the original language")
             
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(result['segments'], 1):
-                    start_time = format_subtitle_timestamp_srt_cli(segment['start'])
-                    end_time = format_subtitle_timestamp_srt_cli(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    # Add speaker info if available
-                    speaker_prefix = ""
-                    if speaker_diarization and diarization_result:
-                        speaker = get_speaker_at_time_cli(segment['start'])
-                        if speaker:
-                            speaker_prefix = f"[{speaker}] "
-                    
-                    # translate text content, skip speaker labels
-                    translated_text = translate_text_cli(text, target_lang)
-                    final_text = f"{speaker_prefix}{translated_text}"
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{final_text}\n\n")
-            return True
-        except Exception as e:
-            print(f"Error exporting translated SRT: {e}")
-            return False
-    
-    def export_translated_vtt_cli(filename, result, diarization_result, speaker_diarization, target_lang='es'):
-        """Export translated WebVTT subtitle file in CLI mode"""
-        if not GOOGLETRANS_AVAILABLE:
-            print("Warning: Google Translate library not available. Please install googletrans.")
-            return False
+            if args.export_srt_translated:
+                filename = translated_output_path(args.export_srt_translated, lang, multiple)
+                try:
+                    if os.path.dirname(filename):
+                        os.makedirs(os.path.dirname(filename), exist_ok=True)
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        for i, (cue, translated_text) in enumerate(zip(cues, translations), 1):
+                            # translated text content, speaker labels stay as-is
+                            f.write(f"{i}\n")
+                            f.write(f"{cue['srt'][0]} --> {cue['srt'][1]}\n")
+                            f.write(f"{cue['prefix']}{translated_text}\n\n")
+                    print(f"Translated SRT subtitles ({lang}) exported to: {filename}")
+                except Exception as e:
+                    print(f"Error exporting translated SRT: {e}")
+                    success = False
             
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("WEBVTT\n\n")
-                
-                for segment in result['segments']:
-                    start_time = format_subtitle_timestamp_vtt_cli(segment['start'])
-                    end_time = format_subtitle_timestamp_vtt_cli(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    # Add speaker info if available
-                    speaker_prefix = ""
-                    if speaker_diarization and diarization_result:
-                        speaker = get_speaker_at_time_cli(segment['start'])
-                        if speaker:
-                            speaker_prefix = f"[{speaker}] "
-                    
-                    # translate text content, skip speaker labels
-                    translated_text = translate_text_cli(text, target_lang)
-                    final_text = f"{speaker_prefix}{translated_text}"
-                    
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{final_text}\n\n")
-            return True
-        except Exception as e:
-            print(f"Error exporting translated VTT: {e}")
-            return False
+            if args.export_vtt_translated:
+                filename = translated_output_path(args.export_vtt_translated, lang, multiple)
+                try:
+                    if os.path.dirname(filename):
+                        os.makedirs(os.path.dirname(filename), exist_ok=True)
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        f.write("WEBVTT\n\n")
+                        for cue, translated_text in zip(cues, translations):
+                            f.write(f"{cue['vtt'][0]} --> {cue['vtt'][1]}\n")
+                            f.write(f"{cue['prefix']}{translated_text}\n\n")
+                    print(f"Translated WebVTT subtitles ({lang}) exported to: {filename}")
+                except Exception as e:
+                    print(f"Error exporting translated VTT: {e}")
+                    success = False
+        return success
     
     # Generate output
     output_lines = []
@@ -1993,7 +4437,7 @@ def run_cli(args):
             
             speaker = None
             if args.speaker_diarization and diarization_result:
-                speaker = get_speaker_at_time_cli(segment['start'])
+                speaker = segment.get('speaker')
             
             speaker_prefix = f"[{speaker}] " if speaker is not None else ""
             output_lines.append(f"[{start_time} - {end_time}] {speaker_prefix}{text}")
@@ -2005,7 +4449,7 @@ def run_cli(args):
             
             speaker = None
             if args.speaker_diarization and diarization_result:
-                speaker = get_speaker_at_time_cli(segment['start'])
+                speaker = segment.get('speaker')
             
             speaker_prefix = f"[{speaker}] " if speaker is not None else ""
             output_lines.append(f"[{start_time} - {end_time}] {speaker_prefix}{text}")
@@ -2032,23 +4476,20 @@ def run_cli(args):
             print(f"Error exporting VTT file: {e}")
             return 1
     
-    # Handle translated subtitle exports
-    if args.export_srt_translated:
-        print(f"\nTranslating SRT subtitles to {args.subtitle_language}...")
-        success = export_translated_srt_cli(args.export_srt_translated, result, diarization_result, 
-                                          args.speaker_diarization, args.subtitle_language)
-        if success:
-            print(f"Translated SRT subtitles exported to: {args.export_srt_translated}")
-        else:
+    if getattr(args, 'export_json', None):
+        try:
+            with open(args.export_json, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=_json_default)
+            print(f"\nJSON transcript exported to: {args.export_json}")
+        except Exception as e:
+            print(f"Error exporting JSON file: {e}")
             return 1
     
-    if args.export_vtt_translated:
-        print(f"\nTranslating WebVTT subtitles to {args.subtitle_language}...")
-        success = export_translated_vtt_cli(args.export_vtt_translated, result, diarization_result, 
-                                          args.speaker_diarization, args.subtitle_language)
-        if success:
-            print(f"Translated WebVTT subtitles exported to: {args.export_vtt_translated}")
-        else:
+    # Handle translated subtitle exports
+    if args.export_srt_translated or args.export_vtt_translated:
+        target_langs = parse_subtitle_languages(args.subtitle_language)
+        print(f"\nTranslating subtitles to {', '.join(target_langs)}...")
+        if not export_translated_subtitles_cli(result, diarization_result, args.speaker_diarization, target_langs):
             return 1
     
     if args.output:
@@ -2061,7 +4502,7 @@ def run_cli(args):
             return 1
     else:
         # Only show transcript output if no subtitle exports were requested
-        if not args.export_srt and not args.export_vtt:
+        if not args.export_srt and not args.export_vtt and not getattr(args, 'export_json', None):
             print("\n" + "="*50)
             print("TRANSCRIPT:")
             print("="*50)
@@ -2069,42 +4510,1347 @@ def run_cli(args):
     
     return 0
 
+SUPPORTED_MEDIA_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.mp3', '.wav', '.m4a', '.flac')
+
+# args holding output paths; in batch mode they are naming templates
+BATCH_OUTPUT_ARGS = ('output', 'export_srt', 'export_vtt', 'export_json', 'export_srt_translated',
+                     'export_vtt_translated')
+
+def is_batch_cli(args):
+    """True if any of the batch input options was given"""
+    return bool(getattr(args, 'input_dir', None) or getattr(args, 'input_glob', None) or
+                getattr(args, 'input_list', None))
+
+def collect_batch_inputs(args):
+    """Resolve --input-dir / --input-glob / --input-list into a list of files"""
+    paths = []
+    if args.input_dir:
+        if args.recursive:
+            for dirpath, _, filenames in os.walk(args.input_dir):
+                paths.extend(os.path.join(dirpath, name) for name in filenames)
+        else:
+            paths.extend(os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir))
+        paths = sorted(p for p in paths
+                       if os.path.isfile(p) and os.path.splitext(p)[1].lower() in SUPPORTED_MEDIA_EXTENSIONS)
+    if args.input_glob:
+        paths.extend(sorted(p for p in glob.glob(args.input_glob, recursive=True) if os.path.isfile(p)))
+    if args.input_list:
+        with open(args.input_list, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    paths.append(line)
+    
+    # keep order stable and drop duplicates
+    seen = set()
+    unique_paths = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique_paths.append(path)
+    return unique_paths
+
+def format_output_template(template, input_path, index):
+    """Expand an output naming template for one batch input file; ValueError if the template is malformed"""
+    name = os.path.basename(input_path)
+    stem, ext = os.path.splitext(name)
+    try:
+        return template.format(
+            stem=stem,
+            name=name,
+            ext=ext.lstrip('.'),
+            dir=os.path.dirname(os.path.abspath(input_path)),
+            index=index,
+            lang='{lang}'  # filled per subtitle language later
+        )
+    except KeyError as e:
+        raise ValueError(f"unknown placeholder {{{e.args[0]}}} in {template!r}") from None
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"invalid template {template!r} ({e}); write a literal brace as {{{{ or }}}}") from None
+
+def check_batch_output_paths(args, inputs):
+    """Expand the output templates for every input; False (after printing why) if one is malformed or two collide"""
+    owners = {}  # expanded absolute path -> (option, input)
+    for index, input_path in enumerate(inputs, 1):
+        for name in BATCH_OUTPUT_ARGS:
+            template = getattr(args, name, None)
+            if not template:
+                continue
+            option = '--' + name.replace('_', '-')
+            try:
+                path = os.path.abspath(format_output_template(template, input_path, index))
+            except ValueError as e:
+                print(f"Error: {option}: {e}")
+                return False
+            if path in owners:
+                other_option, other_input = owners[path]
+                print(f"Error: {other_option} for {other_input} and {option} for {input_path} would both write {path}; "
+                      f"add {{index}} or {{dir}} to the template")
+                return False
+            owners[path] = (option, input_path)
+    return True
+
+def probe_media_duration(path):
+    """Return media duration in seconds using ffprobe, or None if unavailable"""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+           '-of', 'default=noprint_wrappers=1:nokey=1', path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode == 0:
+            return float(result.stdout.strip())
+    except (OSError, ValueError):
+        pass
+    return None
+
+def print_batch_summary(statuses, load_time, elapsed):
+    """Print per-batch totals and throughput"""
+    succeeded = [s for s in statuses if s['ok']]
+    failed = [s for s in statuses if not s['ok']]
+    audio_seconds = sum(s['duration'] or 0 for s in succeeded)
+    
+    print("\n" + "="*50)
+    print("BATCH SUMMARY")
+    print("="*50)
+    print(f"Files: {len(succeeded)} succeeded, {len(failed)} failed (of {len(statuses)})")
+    if load_time is not None:
+        print(f"Model load time: {load_time:.1f}s")
+    print(f"Processing time: {elapsed:.1f}s")
+    print(f"Audio processed: {audio_seconds / 3600:.2f} h")
+    unknown = sum(1 for s in succeeded if s['duration'] is None)
+    if unknown:
+        print(f"  (duration unknown for {unknown} files - is ffprobe installed?)")
+    if elapsed > 0:
+        files_per_min = len(succeeded) / (elapsed / 60)
+        audio_hours_per_hour = audio_seconds / elapsed
+        print(f"Throughput: {files_per_min:.2f} files/min, {audio_hours_per_hour:.2f} audio-hours/hour")
+    cache_results = [s['cache_hit'] for s in statuses if s.get('cache_hit') is not None]
+    if cache_results:
+        hits = sum(1 for hit in cache_results if hit)
+        print(f"Result cache: {hits} hits, {len(cache_results) - hits} misses")
+    if failed:
+        print("Failed files:")
+        for status in failed:
+            print(f"  {status['input']}: {status['error']}")
+
+def build_batch_file_args(args, input_path, index):
+    """Copy args for one batch file with output templates expanded"""
+    file_args = argparse.Namespace(**vars(args))
+    file_args.input = input_path
+    for name in BATCH_OUTPUT_ARGS:
+        template = getattr(args, name)
+        if template:
+            path = format_output_template(template, input_path, index)
+            out_dir = os.path.dirname(path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            setattr(file_args, name, path)
+    return file_args
+
+def prepare_batch_outputs(args, inputs):
+    """Default and check the batch output templates; False (after printing why) if they are unusable"""
+    # default to a transcript next to each input if no outputs were requested
+    if not any(getattr(args, name) for name in BATCH_OUTPUT_ARGS):
+        args.output = os.path.join("{dir}", "{stem}.txt")
+    
+    # every template must vary per file, otherwise outputs overwrite each other
+    for name in BATCH_OUTPUT_ARGS:
+        template = getattr(args, name)
+        if template and not any(key in template for key in ('{stem}', '{name}', '{index}')):
+            option = '--' + name.replace('_', '-')
+            print(f"Error: {option} must contain {{stem}}, {{name}} or {{index}} in batch mode.")
+            return False
+    # files with the same name in different directories would still overwrite each other's outputs
+    return check_batch_output_paths(args, inputs)
+
+def run_batch_cli(args):
+    """Transcribe many inputs with the models loaded once for the whole batch"""
+    try:
+        inputs = collect_batch_inputs(args)
+    except OSError as e:
+        print(f"Error: Could not read batch inputs: {e}")
+        return 1
+    
+    if not inputs:
+        print("Error: No input files found for batch mode.")
+        return 1
+    
+    if not prepare_batch_outputs(args, inputs):
+        return 1
+    
+    workers = max(1, getattr(args, 'workers', 1) or 1)
+    if workers > 1:
+        return run_parallel_batch_cli(args, inputs, workers)
+    
+    print(f"Batch mode: {len(inputs)} files")
+    load_start = time.perf_counter()
+    model, diarization_pipeline = load_cli_models(args)
+    load_time = time.perf_counter() - load_start
+    result_cache = open_result_cache(args)
+    diarization_cache = open_diarization_cache(args)
+    
+    statuses = []
+    batch_start = time.perf_counter()
+    for index, input_path in enumerate(inputs, 1):
+        print(f"\n[{index}/{len(inputs)}] {input_path}")
+        statuses.append(process_batch_file(args, input_path, index, model, diarization_pipeline,
+                                           result_cache=result_cache, diarization_cache=diarization_cache))
+    
+    print_batch_summary(statuses, load_time, time.perf_counter() - batch_start)
+    return 0 if all(s['ok'] for s in statuses) else 1
+
+def process_batch_file(args, input_path, index, model, diarization_pipeline, duration=None, result_cache=None,
+                       diarization_cache=None):
+    """Run one batch file through the CLI pipeline and return its status record"""
+    status = {'input': input_path, 'index': index, 'ok': False, 'error': None, 'duration': duration,
+              'cache_hit': None}
+    hits_before = result_cache.hits if result_cache is not None else 0
+    try:
+        if not os.path.exists(input_path):
+            raise FileNotFoundError("file does not exist")
+        file_args = build_batch_file_args(args, input_path, index)
+        if status['duration'] is None:
+            status['duration'] = probe_media_duration(input_path)
+        if process_cli_input(file_args, model, diarization_pipeline, result_cache, diarization_cache) == 0:
+            status['ok'] = True
+        else:
+            status['error'] = "processing failed"
+    except Exception as e:
+        status['error'] = str(e)
+        print(f"Error processing {input_path}: {e}")
+    if result_cache is not None:
+        status['cache_hit'] = result_cache.hits > hits_before
+    return status
+
+def run_parallel_batch_cli(args, inputs, workers):
+    """Transcribe a batch across job worker processes, each keeping its own models loaded.
+
+    A worker that dies only fails the file it was running; it is replaced by a
+    fresh one and the rest of the batch carries on.
+    """
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    print(f"Batch mode: {len(inputs)} files, {workers} workers x {threads} torch threads")
+    if args.chunk_minutes:
+        # files already run in parallel; chunks of one file are transcribed inside its worker
+        print("Note: with --workers, long-file chunks are transcribed one after another within each worker")
+        args.chunk_workers = 1
+    
+    # longest files first so a long straggler doesn't start last
+    print("Probing media durations...")
+    durations = {path: probe_media_duration(path) for path in inputs}
+    order = sorted(range(len(inputs)), key=lambda i: -(durations[inputs[i]] or 0))
+    
+    # the same workers as --job-db, tracked in a store that lives only as long as the batch
+    store = JobStore(':memory:')
+    for position, i in enumerate(order):
+        file_args = build_batch_file_args(args, inputs[i], i + 1)
+        store.add(os.path.abspath(inputs[i]), {name: getattr(file_args, name, None) for name in JOB_OPTIONS}, position)
+    
+    batch_start = time.perf_counter()
+    try:
+        statuses = run_job_workers(args, store, store.runnable(1), workers, threads, max_attempts=1)
+    except (KeyboardInterrupt, RuntimeError) as e:
+        print("\nStopped by user" if isinstance(e, KeyboardInterrupt) else f"Error: {e}")
+        return 1
+    finally:
+        store.close()
+    
+    load_times = [s['load_time'] for s in statuses if s.get('load_time') is not None]
+    print_batch_summary(statuses, max(load_times, default=0.0), time.perf_counter() - batch_start)
+    return 0 if all(s['ok'] for s in statuses) else 1
+
+DEFAULT_SERVE_PORT = 8765
+DEFAULT_SERVE_QUEUE = 16  # jobs waiting beyond this are refused with 503 until the queue drains
+DEFAULT_SERVE_KEEP_JOBS = 100  # finished jobs kept, with their job directories, before the oldest are pruned
+
+# options a submitted job may set; anything else is taken from the --serve command line
+JOB_OPTIONS = ('model', 'output', 'export_srt', 'export_vtt', 'export_json', 'export_srt_translated',
+               'export_vtt_translated', 'timestamps', 'word_timestamps', 'speaker_diarization', 'clean_format',
+               'parallel_diarization', 'diarization_threads', 'language', 'translate', 'target_language',
+               'subtitle_language', 'translation_backend', 'no_cache', 'vad', 'chunk_minutes', 'chunk_workers',
+               'checkpoint', 'checkpoint_minutes')
+
+# outputs every job can be fetched as: name -> (option, file written in the job directory if not given)
+JOB_OUTPUTS = {
+    'transcript': ('output', 'transcript.txt'),
+    'srt': ('export_srt', 'subtitles.srt'),
+    'vtt': ('export_vtt', 'subtitles.vtt'),
+    'json': ('export_json', 'result.json'),
+}
+
+def pid_alive(pid):
+    """True if a process with this pid is running, or if that can't be checked safely"""
+    if os.name == 'nt':
+        return True  # os.kill would terminate the process there instead of probing it
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+def remove_stale_job_dirs(jobs_root):
+    """Remove <pid>-<id> job directories left by servers that are no longer running"""
+    try:
+        names = os.listdir(jobs_root)
+    except OSError:
+        return
+    for name in names:
+        pid = name.split('-', 1)[0]
+        if pid.isdigit() and not pid_alive(int(pid)):
+            shutil.rmtree(os.path.join(jobs_root, name), ignore_errors=True)
+
+class JobServer:
+    """Queue of transcription jobs run by worker threads against models kept resident in a ModelCache.
+
+    The queue is bounded: submit raises queue.Full when it is, so callers can
+    back off instead of piling work onto the server. Jobs write their outputs
+    to their own directory under jobs_dir, which belongs to this server alone
+    (several servers can share a cache dir) and is removed by close(); output
+    paths a client asks for must lie inside one of output_dirs. Only the last
+    keep_jobs finished jobs are kept.
+    """
+    
+    def __init__(self, args, workers=1, queue_size=DEFAULT_SERVE_QUEUE, output_dirs=(), keep_jobs=DEFAULT_SERVE_KEEP_JOBS,
+                 token=None):
+        self.args = args
+        self.output_dirs = [os.path.realpath(path) for path in output_dirs]
+        self.keep_jobs = keep_jobs
+        self.token = token
+        self.jobs = {}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.model_cache = ModelCache(get_model_budget_mb() * 1024 * 1024)
+        self.model_locks = {}  # one job at a time per model, a loaded model isn't thread-safe
+        self.in_use = {}  # key -> jobs using it, mirrored into model_cache.pinned
+        self.result_cache = open_result_cache(args)
+        self.diarization_cache = open_diarization_cache(args)
+        jobs_root = os.path.join(getattr(args, 'cache_dir', None) or get_cache_dir(), "jobs")
+        remove_stale_job_dirs(jobs_root)
+        self.jobs_dir = os.path.join(jobs_root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.started = time.time()
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+    
+    def close(self):
+        """Delete the outputs of this server's jobs; they can no longer be fetched"""
+        shutil.rmtree(self.jobs_dir, ignore_errors=True)
+    
+    def submit(self, input_path, options=None):
+        """Queue a job and return its status; raises ValueError for bad input, queue.Full when busy"""
+        options = dict(options or {})
+        if not isinstance(input_path, str) or not os.path.isabs(input_path):
+            raise ValueError("input must be an absolute path")
+        if not os.path.isfile(input_path):
+            raise ValueError(f"input file '{input_path}' does not exist")
+        unknown = sorted(set(options) - set(JOB_OPTIONS))
+        if unknown:
+            raise ValueError(f"unknown options: {', '.join(unknown)}")
+        if options.get('model', self.args.model) not in WHISPER_MODELS:
+            raise ValueError(f"unknown model '{options['model']}'")
+        if options.get('translation_backend', self.args.translation_backend) not in TRANSLATION_BACKENDS:
+            raise ValueError(f"unknown translation backend '{options['translation_backend']}'")
+        for name in BATCH_OUTPUT_ARGS:
+            if options.get(name):
+                if not isinstance(options[name], str) or not os.path.isabs(options[name]):
+                    raise ValueError(f"{name} must be an absolute path")
+                if not self.output_allowed(options[name]):
+                    raise ValueError(f"{name} must be inside a --serve-output-dir of the server; "
+                                     f"otherwise fetch the output from GET /jobs/<id>/<output>")
+        
+        job_id = uuid.uuid4().hex[:12]
+        job = {'id': job_id, 'input': input_path, 'options': options, 'state': 'queued', 'progress': 0.0,
+               'error': None, 'submitted': time.time(), 'started': None, 'finished': None, 'outputs': {}}
+        with self.lock:
+            self.jobs[job_id] = job
+        try:
+            self.queue.put_nowait(job_id)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job_id]
+            raise
+        return self.status(job_id)
+    
+    def output_allowed(self, path):
+        """Whether a client may have a job write to path"""
+        path = os.path.realpath(path)
+        return any(os.path.commonpath([path, directory]) == directory for directory in self.output_dirs)
+    
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            status = {key: value for key, value in job.items() if key != 'outputs'}
+            status['outputs'] = sorted(job['outputs'])
+            if job['state'] == 'queued':
+                waiting = list(self.queue.queue)
+                status['queue_position'] = waiting.index(job_id) + 1 if job_id in waiting else 0
+            return status
+    
+    def list_jobs(self):
+        with self.lock:
+            job_ids = list(self.jobs)
+        return [self.status(job_id) for job_id in job_ids]
+    
+    def output_path(self, job_id, name):
+        """Path of a finished job's output, or None"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job['outputs'].get(name) if job else None
+    
+    def health(self):
+        with self.lock:
+            states = [job['state'] for job in self.jobs.values()]
+        return {'status': 'ok', 'uptime': round(time.time() - self.started, 1), 'workers': len(self.threads),
+                'queued': states.count('queued'), 'running': states.count('running'),
+                'queue_size': self.queue.maxsize, 'models': self.model_cache.stats_text()}
+    
+    def use_models(self, keys, in_use):
+        """Pin (in_use=True) or release keys; a model is pinned while any job is using it"""
+        with self.model_cache.lock:
+            for key in keys:
+                self.in_use[key] = self.in_use.get(key, 0) + (1 if in_use else -1)
+            self.model_cache.pinned = {key for key, count in self.in_use.items() if count > 0}
+    
+    def job_args(self, job):
+        """Namespace for process_cli_input: the server's args overridden by the job's options"""
+        job_args = argparse.Namespace(**vars(self.args))
+        for name, value in job['options'].items():
+            setattr(job_args, name, value)
+        job_args.input = job['input']
+        job_args.stream_jsonl = False
+        job_dir = os.path.join(self.jobs_dir, job['id'])
+        os.makedirs(job_dir, exist_ok=True)
+        for name, (option, filename) in JOB_OUTPUTS.items():
+            if not getattr(job_args, option, None):
+                setattr(job_args, option, os.path.join(job_dir, filename))
+        return job_args
+    
+    def update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+    
+    def work(self):
+        while True:
+            job_id = self.queue.get()
+            with self.lock:
+                job = self.jobs[job_id]
+            self.update(job_id, state='running', started=time.time())
+            print(f"Job {job_id}: {job['input']}")
+            try:
+                self.run_job(job)
+            except Exception as e:
+                self.update(job_id, state='failed', error=str(e), finished=time.time())
+            print(f"Job {job_id}: {self.jobs[job_id]['state']}")
+            self.prune()
+            self.queue.task_done()
+    
+    def prune(self):
+        """Forget the oldest finished jobs beyond keep_jobs and delete their job directories"""
+        with self.lock:
+            finished = sorted((job for job in self.jobs.values() if job['finished'] is not None),
+                              key=lambda job: job['finished'])
+            pruned = [job['id'] for job in finished[:max(0, len(finished) - self.keep_jobs)]]
+            for job_id in pruned:
+                del self.jobs[job_id]
+        for job_id in pruned:
+            shutil.rmtree(os.path.join(self.jobs_dir, job_id), ignore_errors=True)
+    
+    def run_job(self, job):
+        job_args = self.job_args(job)
+        duration = probe_media_duration(job['input'])
+        
+        def on_segment(segment):
+            if duration:
+                self.update(job['id'], progress=round(min(1.0, segment['end'] / duration), 3))
+        
+        keys = [('whisper', job_args.model)]
+        if job_args.speaker_diarization:
+            keys.append(('diarization', DIARIZATION_PIPELINE_NAME))
+        with self.lock:
+            locks = [self.model_locks.setdefault(key, threading.Lock()) for key in sorted(keys)]
+        self.use_models(keys, True)
+        try:
+            for lock in locks:
+                lock.acquire()
+            try:
+                model, diarization_pipeline = load_resident_models(self.model_cache, job_args)
+                result_cache = None if job_args.no_cache else self.result_cache
+                diarization_cache = None if job_args.no_cache else self.diarization_cache
+                exit_code = process_cli_input(job_args, model, diarization_pipeline, result_cache,
+                                              diarization_cache, segment_callback=on_segment)
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+        finally:
+            self.use_models(keys, False)
+            self.model_cache.evict()
+        
+        if exit_code != 0:
+            self.update(job['id'], state='failed', error="processing failed (see server log)", finished=time.time())
+            return
+        outputs = {name: getattr(job_args, option) for name, (option, _) in JOB_OUTPUTS.items()
+                   if os.path.exists(getattr(job_args, option))}
+        self.update(job['id'], state='done', progress=1.0, outputs=outputs, finished=time.time())
+
+def load_resident_models(model_cache, args):
+    """Whisper model and diarization pipeline (or None) for args, loaded once into model_cache"""
+    whisper_key = ('whisper', args.model)
+    model = model_cache.get(whisper_key, lambda: whisper.load_model(args.model))
+    diarization_pipeline = None
+    if args.speaker_diarization and PYANNOTE_AVAILABLE:
+        try:
+            diarization_pipeline = model_cache.get(('diarization', DIARIZATION_PIPELINE_NAME),
+                                                   load_diarization_pipeline_cli, keep=(whisper_key,))
+        except Exception as e:
+            print(f"Warning: Speaker diarization unavailable: {e}")
+    return model, diarization_pipeline
+
+def make_job_request_handler(job_server):
+    """BaseHTTPRequestHandler class serving the JSON API of job_server"""
+    from http.server import BaseHTTPRequestHandler
+    
+    content_types = {'transcript': 'text/plain', 'srt': 'application/x-subrip', 'vtt': 'text/vtt',
+                     'json': 'application/json'}
+    
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        server_version = "WhisperGUI"
+        
+        def send_json(self, code, body, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def authorized(self):
+            """Check the bearer token if the server has one; answers 401 and returns False otherwise"""
+            if not job_server.token:
+                return True
+            if hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'),
+                                   f"Bearer {job_server.token}".encode('utf-8')):
+                return True
+            self.send_json(401, {'error': 'missing or wrong token'}, {'WWW-Authenticate': 'Bearer'})
+            return False
+        
+        def do_GET(self):
+            if not self.authorized():
+                return
+            parts = [part for part in self.path.split('?')[0].split('/') if part]
+            if parts == ['health']:
+                return self.send_json(200, job_server.health())
+            if parts == ['jobs']:
+                return self.send_json(200, {'jobs': job_server.list_jobs()})
+            if len(parts) in (2, 3) and parts[0] == 'jobs':
+                status = job_server.status(parts[1])
+                if status is None:
+                    return self.send_json(404, {'error': 'no such job'})
+                if len(parts) == 2:
+                    return self.send_json(200, status)
+                if parts[2] not in JOB_OUTPUTS:
+                    return self.send_json(404, {'error': f"outputs are {', '.join(JOB_OUTPUTS)}"})
+                path = job_server.output_path(parts[1], parts[2])
+                if path is None:
+                    return self.send_json(409, {'error': f"job is {status['state']}", 'state': status['state']})
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    return self.send_json(410, {'error': str(e)})
+                self.send_response(200)
+                self.send_header('Content-Type', content_types[parts[2]] + '; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self.send_json(404, {'error': 'not found'})
+        
+        def do_POST(self):
+            if not self.authorized():
+                return
+            if self.path.split('?')[0].rstrip('/') != '/jobs':
+                return self.send_json(404, {'error': 'not found'})
+            # a browser form can't send application/json without a CORS preflight
+            if self.headers.get_content_type() != 'application/json':
+                return self.send_json(415, {'error': 'Content-Type must be application/json'})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(body, dict) or not isinstance(body.get('options', {}), dict):
+                    raise ValueError("expected a JSON object with input and options")
+                status = job_server.submit(body.get('input'), body.get('options'))
+            except ValueError as e:
+                return self.send_json(400, {'error': str(e)})
+            except queue.Full:
+                return self.send_json(503, {'error': 'queue is full, retry later'}, {'Retry-After': '5'})
+            self.send_json(202, status, {'Location': f"/jobs/{status['id']}"})
+        
+        def log_message(self, format, *args):
+            pass  # job progress is logged by the workers
+    
+    return JobRequestHandler
+
+def is_loopback_host(host):
+    """Whether --host only accepts connections from this machine"""
+    import ipaddress
+    
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def run_server_cli(args):
+    """Handle --serve: keep models loaded and transcribe jobs submitted over HTTP"""
+    from http.server import ThreadingHTTPServer
+    
+    job_server = JobServer(args, args.serve_workers, args.serve_queue_size, args.serve_output_dir or (),
+                           args.serve_keep_jobs, args.serve_token)
+    try:
+        httpd = ThreadingHTTPServer((args.host, args.port), make_job_request_handler(job_server))
+    except OSError as e:
+        print(f"Error: could not listen on {args.host}:{args.port}: {e}")
+        return 1
+    
+    print(f"Loading Whisper model: {args.model}")
+    try:
+        load_resident_models(job_server.model_cache, args)
+    except Exception as e:
+        print(f"Warning: could not preload models: {e}")
+    print(f"Serving on http://{args.host}:{args.port} ({args.serve_workers} workers, "
+          f"queue of {args.serve_queue_size}{', token required' if args.serve_token else ''}, Ctrl+C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    finally:
+        httpd.server_close()
+        job_server.close()
+    return 0
+
+def submit_cli(args, defaults):
+    """Handle --submit: send inputs to a --serve process, wait for them and print or save the results"""
+    import urllib.error
+    import urllib.request
+    
+    base_url = args.server_url.rstrip('/')
+    headers = {'Content-Type': 'application/json'}
+    if args.serve_token:
+        headers['Authorization'] = f"Bearer {args.serve_token}"
+    
+    def request(method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(base_url + path, data=data, method=method, headers=headers)
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.read()
+    
+    def error_text(error):
+        try:
+            return json.loads(error.read()).get('error', error.reason)
+        except ValueError:
+            return error.reason
+    
+    if is_batch_cli(args):
+        try:
+            inputs = collect_batch_inputs(args)
+        except OSError as e:
+            print(f"Error: Could not read batch inputs: {e}")
+            return 1
+    else:
+        inputs = [args.input]
+    if not inputs:
+        print("Error: No input files found for batch mode.")
+        return 1
+    
+    # only what was set on the command line, so the server's own defaults apply otherwise
+    options = {name: getattr(args, name) for name in JOB_OPTIONS
+               if getattr(args, name, None) != getattr(defaults, name, None)}
+    
+    # outputs every job has are fetched and written here; only translated subtitles are written by the server
+    fetched = {option: name for name, (option, _) in JOB_OUTPUTS.items()}
+    if args.no_wait and any(option in options for option in fetched):
+        print("Error: --no-wait can't save outputs; fetch them later with GET /jobs/<id>/<output>")
+        return 1
+    if len(inputs) > 1 and not check_batch_output_paths(args, inputs):
+        return 1
+    
+    jobs = []
+    downloads = {}  # job id -> {output name: local path}
+    for index, input_path in enumerate(inputs, 1):
+        job_options = dict(options)
+        job_downloads = {}
+        for name in BATCH_OUTPUT_ARGS:
+            if job_options.get(name):
+                path = job_options[name]
+                if len(inputs) > 1:
+                    path = format_output_template(path, input_path, index)
+                if name in fetched:
+                    job_downloads[fetched[name]] = path
+                    del job_options[name]
+                else:
+                    job_options[name] = os.path.abspath(path)
+        while True:
+            try:
+                job = json.loads(request('POST', '/jobs', {'input': os.path.abspath(input_path),
+                                                           'options': job_options}))
+                break
+            except urllib.error.HTTPError as e:
+                if e.code != 503:
+                    print(f"Error: {input_path}: {error_text(e)}")
+                    return 1
+                # backpressure: the server's queue is full
+                time.sleep(float(e.headers.get('Retry-After') or 5))
+            except urllib.error.URLError as e:
+                print(f"Error: no server at {base_url} ({e.reason}); start one with --serve")
+                return 1
+        print(f"Submitted {input_path} as job {job['id']}")
+        jobs.append(job)
+        downloads[job['id']] = job_downloads
+    
+    if args.no_wait:
+        return 0
+    
+    failed = 0
+    for job in jobs:
+        last_line = None
+        while True:
+            try:
+                job = json.loads(request('GET', f"/jobs/{job['id']}"))
+            except urllib.error.URLError as e:
+                print(f"Error: lost connection to {base_url}: {getattr(e, 'reason', e)}")
+                return 1
+            if job['state'] in ('done', 'failed'):
+                break
+            line = f"Job {job['id']}: {job['state']}"
+            if job['state'] == 'queued' and job.get('queue_position'):
+                line += f" (position {job['queue_position']})"
+            elif job['state'] == 'running':
+                line += f" {job['progress']:.0%}"
+            if line != last_line:
+                print(line)
+                last_line = line
+            time.sleep(1)
+        
+        if job['state'] == 'failed':
+            print(f"Job {job['id']} failed: {job['error']}")
+            failed += 1
+            continue
+        print(f"Job {job['id']} done in {job['finished'] - job['started']:.1f}s")
+        for name, path in downloads[job['id']].items():
+            try:
+                data = request('GET', f"/jobs/{job['id']}/{name}")
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            except (urllib.error.URLError, OSError) as e:
+                print(f"Error: could not save {path}: {getattr(e, 'reason', e)}")
+                failed += 1
+                break
+            print(f"Saved {path}")
+        if len(jobs) == 1 and not any(name in options for name in BATCH_OUTPUT_ARGS):
+            print("\n" + "="*50)
+            print("TRANSCRIPT")
+            print("="*50)
+            print(request('GET', f"/jobs/{job['id']}/transcript").decode('utf-8'))
+    return 1 if failed else 0
+
+# --job-db: states a file moves through, in order
+JOB_STATES = ('queued', 'decoding', 'diarizing', 'transcribing', 'exporting', 'done', 'failed')
+JOB_ACTIVE_STATES = ('decoding', 'diarizing', 'transcribing', 'exporting')
+DEFAULT_JOB_ATTEMPTS = 3
+DEFAULT_JOB_TIMEOUT = 3600  # seconds a stage may go without progress before its worker is killed
+
+class JobStore:
+    """Persistent SQLite record of batch jobs: one row per input file.
+
+    Each row keeps the file's options (with output paths), its state, the
+    attempts made, the last error and the time spent in every stage, so a
+    batch that dies halfway can be resumed by running it again.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " input TEXT NOT NULL UNIQUE,"
+            " position INTEGER NOT NULL,"
+            " options TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " duration REAL,"
+            " cache_hit INTEGER,"
+            " stage_times TEXT NOT NULL DEFAULT '{}',"
+            " submitted REAL NOT NULL,"
+            " started REAL,"
+            " finished REAL)")
+        self._conn.commit()
+    
+    def add(self, input_path, options, position):
+        """Record a job; a file already in the store keeps its progress but takes the new options unless done.
+
+        New options also give a failed file a fresh set of attempts, since they may be what it needed.
+        """
+        self._conn.execute(
+            "INSERT INTO jobs (input, position, options, state, submitted) VALUES (?, ?, ?, 'queued', ?)"
+            " ON CONFLICT(input) DO UPDATE SET options = excluded.options, position = excluded.position,"
+            " attempts = CASE WHEN options != excluded.options THEN 0 ELSE attempts END,"
+            " state = CASE WHEN state = 'failed' AND options != excluded.options THEN 'queued' ELSE state END"
+            " WHERE state != 'done'",
+            (input_path, position, json.dumps(options), time.time()))
+        self._conn.commit()
+    
+    def retry_failed(self):
+        """Queue every failed job again with a fresh set of attempts; returns how many there were"""
+        count = self._conn.execute(
+            "UPDATE jobs SET state = 'queued', attempts = 0 WHERE state = 'failed'").rowcount
+        self._conn.commit()
+        return count
+    
+    def recover(self, max_attempts):
+        """Requeue jobs left mid-stage by a run that died; returns how many there were"""
+        placeholders = ", ".join("?" * len(JOB_ACTIVE_STATES))
+        count = self._conn.execute(
+            f"UPDATE jobs SET error = 'interrupted',"
+            f" state = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END"
+            f" WHERE state IN ({placeholders})", (max_attempts,) + JOB_ACTIVE_STATES).rowcount
+        self._conn.commit()
+        return count
+    
+    def runnable(self, max_attempts):
+        """(id, input, options) of queued jobs and failed ones with attempts left, in batch order"""
+        rows = self._conn.execute(
+            "SELECT id, input, options FROM jobs"
+            " WHERE state = 'queued' OR (state = 'failed' AND attempts < ?) ORDER BY position, id",
+            (max_attempts,)).fetchall()
+        return [(job_id, input_path, json.loads(options)) for job_id, input_path, options in rows]
+    
+    def start(self, job_id):
+        self._conn.execute(
+            "UPDATE jobs SET state = 'decoding', attempts = attempts + 1, error = NULL, stage_times = '{}',"
+            " started = ?, finished = NULL WHERE id = ?", (time.time(), job_id))
+        self._conn.commit()
+    
+    def set_state(self, job_id, state, stage_times):
+        self._conn.execute("UPDATE jobs SET state = ?, stage_times = ? WHERE id = ?",
+                           (state, json.dumps(stage_times), job_id))
+        self._conn.commit()
+    
+    def finish(self, job_id, state, stage_times, error=None, duration=None, cache_hit=None):
+        self._conn.execute(
+            "UPDATE jobs SET state = ?, stage_times = ?, error = ?, duration = COALESCE(?, duration),"
+            " cache_hit = ?, finished = ? WHERE id = ?",
+            (state, json.dumps(stage_times), error, duration, cache_hit, time.time(), job_id))
+        self._conn.commit()
+    
+    def release(self, job_id):
+        """Put a job interrupted by the user back in the queue without using up an attempt"""
+        self._conn.execute(
+            "UPDATE jobs SET state = 'queued', attempts = MAX(attempts - 1, 0), started = NULL WHERE id = ?",
+            (job_id,))
+        self._conn.commit()
+    
+    def attempts(self, job_id):
+        return self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+    
+    def counts(self):
+        rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+    
+    def counts_text(self):
+        counts = self.counts()
+        return ", ".join(f"{counts[state]} {state}" for state in JOB_STATES if counts.get(state)) or "empty"
+    
+    def jobs(self):
+        """Every job as a dict, in batch order"""
+        cursor = self._conn.execute("SELECT * FROM jobs ORDER BY position, id")
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    
+    def close(self):
+        self._conn.close()
+
+def job_status_cli(args):
+    """Handle --job-status: show the jobs recorded in --job-db"""
+    if not os.path.exists(args.job_db):
+        print(f"Error: job database '{args.job_db}' does not exist")
+        return 1
+    store = JobStore(args.job_db)
+    jobs = store.jobs()
+    print(f"{args.job_db}: {len(jobs)} jobs ({store.counts_text()})")
+    for job in jobs:
+        line = f"  [{job['state']:>12}] {job['input']}"
+        if job['attempts'] > 1:
+            line += f" (attempt {job['attempts']})"
+        if job['state'] == 'done' and job['started'] and job['finished']:
+            line += f" {job['finished'] - job['started']:.1f}s"
+        elif job['error']:
+            line += f": {job['error']}"
+        print(line)
+    store.close()
+    return 0
+
+def _job_worker_main(args, threads, conn):
+    """Job worker process: run jobs received on conn with resident models, reporting every stage back"""
+    if hasattr(os, 'setsid'):
+        os.setsid()  # own process group, so the watchdog can kill a hung ffmpeg along with the worker
+    torch.set_num_threads(threads)
+    if getattr(args, 'stream_jsonl', False):
+        start_jsonl_stream()
+    model_cache = ModelCache(get_model_budget_mb() * 1024 * 1024)
+    result_cache = open_result_cache(args)
+    diarization_cache = open_diarization_cache(args)
+    
+    def send(kind, job_id, value=None):
+        conn.send((kind, job_id, value))
+    
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        job_id, input_path, options = task
+        job_args = argparse.Namespace(**vars(args))
+        for name, value in options.items():
+            setattr(job_args, name, value)
+        job_args.input = input_path
+        report = {'error': None, 'duration': probe_media_duration(input_path), 'cache_hit': None, 'load_time': None}
+        hits_before = result_cache.hits if result_cache is not None else 0
+        try:
+            if not os.path.exists(input_path):
+                raise FileNotFoundError("file does not exist")
+            load_start = time.perf_counter()
+            model, diarization_pipeline = load_resident_models(model_cache, job_args)
+            report['load_time'] = time.perf_counter() - load_start
+            use_cache = not job_args.no_cache
+            exit_code = process_cli_input(job_args, model, diarization_pipeline,
+                                          result_cache if use_cache else None,
+                                          diarization_cache if use_cache else None,
+                                          segment_callback=lambda segment: send('progress', job_id, segment['end']),
+                                          stage_callback=lambda stage: send('stage', job_id, stage),
+                                          diarization_callback=lambda stage, fraction, eta: send(
+                                              'progress', job_id, stage if fraction < 1.0 else None))
+            if exit_code != 0:
+                report['error'] = "processing failed"
+        except Exception as e:
+            report['error'] = str(e)
+            print(f"Error processing {input_path}: {e}")
+        if result_cache is not None:
+            report['cache_hit'] = result_cache.hits > hits_before
+        send('finished', job_id, report)
+
+class JobWorker:
+    """Parent-side handle of a job worker process and the job it is running"""
+    
+    def __init__(self, context, args, threads):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_job_worker_main, args=(args, threads, child_conn))
+        self.process.start()
+        child_conn.close()
+        self.job = None  # (id, input)
+        self.stage = None
+        self.stage_started = None
+        self.stage_times = {}
+        self.last_activity = None
+        self.silent_step = None  # a step that runs without progress reports, exempt from the watchdog
+    
+    def assign(self, job_id, input_path, options):
+        self.job = (job_id, input_path)
+        self.stage_times = {}
+        self.enter_stage('decoding')
+        self.conn.send((job_id, input_path, options))
+    
+    def enter_stage(self, stage):
+        now = time.time()
+        if self.stage:
+            self.stage_times[self.stage] = round(self.stage_times.get(self.stage, 0.0) + now - self.stage_started, 2)
+        self.stage = stage
+        self.stage_started = now
+        self.last_activity = now
+        self.silent_step = None
+    
+    def done(self):
+        """Close the current stage and clear the job; returns the stage times"""
+        self.enter_stage(None)
+        times = self.stage_times
+        self.job = None
+        return times
+    
+    def kill(self):
+        """Kill the worker and everything it started (ffmpeg, chunk workers)"""
+        pid = self.process.pid
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                self.process.kill()
+        else:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True)
+        self.process.join()
+        self.conn.close()
+    
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+def run_job_workers(args, store, jobs, workers, threads, max_attempts):
+    """Run jobs, (id, input, options) rows of store, on job worker processes; returns their status records.
+
+    A watchdog kills a worker whose stage makes no progress for --job-timeout
+    seconds and starts a fresh one, as it does for a worker that dies. Failed
+    jobs go back in the queue until max_attempts is used up. On an exception
+    (Ctrl+C included) running jobs are released and every worker is killed.
+    """
+    from multiprocessing.connection import wait
+    
+    jobs = collections.deque(jobs)
+    # spawn gives every worker a clean interpreter (forking a process with torch threads can hang)
+    context = multiprocessing.get_context('spawn')
+    pool = [JobWorker(context, args, threads) for _ in range(workers)]
+    statuses = {}
+    
+    def settle(worker, error, report=None):
+        """Record the end of worker's job: done, back in the queue, or failed for good"""
+        job_id, input_path = worker.job
+        times = worker.done()
+        report = report or {}
+        if error is None:
+            store.finish(job_id, 'done', times, duration=report.get('duration'), cache_hit=report.get('cache_hit'))
+            print(f"Done: {input_path}")
+        elif store.attempts(job_id) < max_attempts:
+            store.finish(job_id, 'queued', times, error, report.get('duration'))
+            print(f"Failed (will retry): {input_path}: {error}")
+            jobs.append((job_id, input_path, options_by_id[job_id]))
+        else:
+            store.finish(job_id, 'failed', times, error, report.get('duration'))
+            print(f"Failed: {input_path}: {error}")
+        statuses[job_id] = {'input': input_path, 'ok': error is None, 'error': error,
+                            'duration': report.get('duration'), 'cache_hit': report.get('cache_hit'),
+                            'load_time': report.get('load_time')}
+    
+    options_by_id = {job_id: options for job_id, _, options in jobs}
+    try:
+        while jobs or any(worker.job for worker in pool):
+            for worker in pool:
+                if worker.job is None and jobs:
+                    job_id, input_path, options = jobs.popleft()
+                    store.start(job_id)
+                    print(f"[{store.counts_text()}] {input_path} (worker pid {worker.process.pid})")
+                    worker.assign(job_id, input_path, options)
+            
+            ready = wait([worker.conn for worker in pool], timeout=1.0)
+            for index, worker in enumerate(pool):
+                if worker.conn in ready:
+                    try:
+                        kind, job_id, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        # the worker died (out of memory, killed, crashed in native code)
+                        worker.kill()
+                        exit_code = worker.process.exitcode
+                        if worker.job is None:
+                            raise RuntimeError(f"a job worker failed to start (exit code {exit_code})")
+                        settle(worker, f"worker exited unexpectedly (exit code {exit_code})")
+                        pool[index] = JobWorker(context, args, threads)
+                        continue
+                    if worker.job is None or job_id != worker.job[0]:
+                        continue
+                    if kind == 'stage':
+                        worker.enter_stage(value)
+                        store.set_state(job_id, value, worker.stage_times)
+                    elif kind == 'progress':
+                        worker.last_activity = time.time()
+                        # pyannote clusters all embeddings in one call that reports nothing until it is done
+                        worker.silent_step = 'clustering' if value == 'clustering' else None
+                    elif kind == 'finished':
+                        settle(worker, value['error'], value)
+                elif worker.job and not worker.silent_step and time.time() - worker.last_activity > args.job_timeout:
+                    stage = worker.stage
+                    worker.kill()
+                    settle(worker, f"no progress while {stage} for {args.job_timeout:g}s, worker killed")
+                    pool[index] = JobWorker(context, args, threads)
+    except BaseException:
+        for worker in pool:
+            if worker.job:
+                store.release(worker.job[0])
+            worker.kill()
+        raise
+    
+    for worker in pool:
+        worker.stop()
+    return list(statuses.values())
+    
+
+def run_job_store_cli(args):
+    """Handle --job-db: run the batch through a durable job store, resuming unfinished work.
+
+    Jobs run in worker processes that keep their models loaded (see
+    run_job_workers); failed jobs are retried until --max-attempts is used up.
+    """
+    store = JobStore(args.job_db)
+    recovered = store.recover(args.max_attempts)
+    if recovered:
+        print(f"Recovered {recovered} jobs interrupted in a previous run")
+    if args.retry_failed:
+        print(f"Retrying {store.retry_failed()} failed jobs")
+    
+    if args.input or is_batch_cli(args):
+        batch = is_batch_cli(args)
+        try:
+            inputs = collect_batch_inputs(args) if batch else [args.input]
+        except OSError as e:
+            print(f"Error: Could not read batch inputs: {e}")
+            return 1
+        if batch and not prepare_batch_outputs(args, inputs):
+            return 1
+        for index, input_path in enumerate(inputs, 1):
+            file_args = build_batch_file_args(args, input_path, index) if batch else args
+            options = {name: getattr(file_args, name, None) for name in JOB_OPTIONS}
+            for name in BATCH_OUTPUT_ARGS:
+                if options[name]:
+                    options[name] = os.path.abspath(options[name])
+            store.add(os.path.abspath(input_path), options, index)
+    
+    jobs = collections.deque(store.runnable(args.max_attempts))
+    print(f"Job store {args.job_db}: {store.counts_text()}")
+    if not jobs:
+        print("Nothing left to run")
+        return 1 if store.counts().get('failed') else 0
+    
+    workers = max(1, min(args.workers or 1, len(jobs)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    if workers > 1 and args.chunk_minutes:
+        print("Note: with --workers, long-file chunks are transcribed one after another within each worker")
+        args.chunk_workers = 1
+    print(f"Running {len(jobs)} jobs on {workers} workers x {threads} torch threads "
+          f"(stage timeout {args.job_timeout:g}s, {args.max_attempts} attempts)")
+    
+    run_start = time.perf_counter()
+    try:
+        statuses = run_job_workers(args, store, jobs, workers, threads, args.max_attempts)
+    except (KeyboardInterrupt, RuntimeError) as e:
+        if isinstance(e, KeyboardInterrupt):
+            print("\nStopped by user; unfinished jobs stay queued for the next run")
+        else:
+            print(f"Error: {e}")
+        store.close()
+        return 1
+    
+    print_batch_summary(statuses, None, time.perf_counter() - run_start)
+    print(f"Job store {args.job_db}: {store.counts_text()}")
+    failed = store.counts().get('failed')
+    store.close()
+    return 1 if failed else 0
+
+def set_derived_cli_flags(args):
+    """Set the positive boolean flags the pipeline reads from their --no-* options"""
+    args.timestamps = not args.no_timestamps
+    args.word_timestamps = not args.no_word_timestamps
+    args.speaker_diarization = not args.no_speaker_diarization
+
 def main():
     parser = argparse.ArgumentParser(description='Whisper Transcription Tool with Speaker Diarization')
     parser.add_argument('--cli', action='store_true', help='Run in CLI mode')
-    parser.add_argument('--input', type=str, help='Input audio/video file')
+    parser.add_argument('--input', type=str, help='Input audio/video file, or - to transcribe a live stream from stdin')
+    parser.add_argument('--stdin-format', type=str,
+                       help='With --input -: raw PCM layout as FORMAT[:RATE[:CHANNELS]], e.g. s16le:16000:1 '
+                            '(default: let ffmpeg detect the container)')
+    parser.add_argument('--stream-window', type=float, default=STREAM_WINDOW_SECONDS,
+                       help=f'With --input -: seconds of audio transcribed at a time (default: {STREAM_WINDOW_SECONDS:g})')
+    parser.add_argument('--input-dir', type=str, help='Batch mode: transcribe all audio/video files in a directory')
+    parser.add_argument('--input-glob', type=str, help='Batch mode: transcribe files matching a glob pattern (quote it)')
+    parser.add_argument('--input-list', type=str, help='Batch mode: transcribe files listed in a text file, one per line')
+    parser.add_argument('--recursive', action='store_true', help='Batch mode: include subdirectories of --input-dir')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Batch mode: number of worker processes, each with its own loaded models (CPU use)')
+    parser.add_argument('--threads-per-worker', type=int,
+                       help='Torch threads per batch or chunk worker (default: CPU cores / workers)')
+    parser.add_argument('--job-db', type=str,
+                       help='Record every file of the run in this SQLite job database; running the same command '
+                            'again (or with only --job-db) resumes the unfinished files')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_JOB_ATTEMPTS,
+                       help=f'With --job-db: tries per file before it is marked failed (default: {DEFAULT_JOB_ATTEMPTS})')
+    parser.add_argument('--job-timeout', type=float, default=DEFAULT_JOB_TIMEOUT,
+                       help='With --job-db or --workers: kill a worker whose decoding, diarization or transcription makes no '
+                            f'progress for this many seconds, and retry the file (default: {DEFAULT_JOB_TIMEOUT})')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='With --job-db: give files that failed for good a fresh set of --max-attempts')
+    parser.add_argument('--job-status', action='store_true', help='Show the files recorded in --job-db, then exit')
+    parser.add_argument('--vad', action='store_true',
+                       help='Skip silence and other non-speech before transcription (uses the diarization timeline '
+                            'when diarization runs first)')
+    parser.add_argument('--chunk-minutes', type=float,
+                       help='Long-file mode: split the audio at silences into chunks of about this many minutes '
+                            'and transcribe them in parallel')
+    parser.add_argument('--chunk-workers', type=int,
+                       help='Long-file mode: worker processes, each with its own model '
+                            f'(default: {default_chunk_workers()} on this machine)')
+    parser.add_argument('--checkpoint', action='store_true',
+                       help='Transcribe in windows and save progress after each one to INPUT.whisper-checkpoint.json; '
+                            'rerunning the same command continues from the last window')
+    parser.add_argument('--checkpoint-minutes', type=float, default=DEFAULT_CHECKPOINT_MINUTES,
+                       help=f'With --checkpoint: minutes of audio per window (default: {DEFAULT_CHECKPOINT_MINUTES})')
     parser.add_argument('--model', type=str, default='large-v3', 
-                       choices=['tiny', 'base', 'small', 'medium', 'large', 'large-v2', 'large-v3', 'turbo'],
+                       choices=WHISPER_MODELS,
                        help='Whisper model to use')
     parser.add_argument('--output', type=str, help='Output file path')
     parser.add_argument('--no-timestamps', action='store_true', help='Disable timestamps')
     parser.add_argument('--no-word-timestamps', action='store_true', help='Disable word-level timestamps')
     parser.add_argument('--no-speaker-diarization', action='store_true', help='Disable speaker diarization')
     parser.add_argument('--clean-format', action='store_true', help='Use clean segment format only')
+    parser.add_argument('--parallel-diarization', action='store_true',
+                       help='Run speaker diarization at the same time as transcription (splits CPU threads)')
+    parser.add_argument('--diarization-threads', type=int,
+                       help='Torch threads for diarization with --parallel-diarization (default: half)')
     parser.add_argument('--language', type=str, default='auto', help='Source language (auto for auto-detect)')
     parser.add_argument('--translate', action='store_true', help='Translate to English')
     parser.add_argument('--target-language', type=str, default='en', help='Target language for translation (currently only "en" supported)')
     parser.add_argument('--export-srt', type=str, help='Export as SRT subtitle file to specified path')
     parser.add_argument('--export-vtt', type=str, help='Export as WebVTT subtitle file to specified path')
+    parser.add_argument('--export-json', type=str,
+                       help='Export the full result (segments, words, speakers) as JSON to specified path')
     parser.add_argument('--export-srt-translated', type=str, help='Export as translated SRT subtitle file to specified path')
     parser.add_argument('--export-vtt-translated', type=str, help='Export as translated WebVTT subtitle file to specified path')
-    parser.add_argument('--subtitle-language', type=str, default='es', help='Target language for subtitle translation (default: es for Spanish)')
+    parser.add_argument('--stream-jsonl', action='store_true',
+                       help='Write one JSON object per segment to stdout as soon as it is transcribed (other output goes to stderr)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the transcription, diarization and translation caches')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached results and overwrite them with fresh ones')
+    parser.add_argument('--clear-cache', choices=['transcripts', 'diarization', 'translations', 'all'],
+                       help='Delete cached transcripts, diarization results and/or translations, then exit')
+    parser.add_argument('--cache-dir', type=str, help='Cache directory (default: WHISPER_CACHE_DIR or ~/.cache/whisper_gui)')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                       help=f'Size limit per cache in MB, least recently used entries are evicted (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--subtitle-language', type=str, default='es',
+                       help='Target language(s) for subtitle translation, comma-separated for several, e.g. es,fr,de '
+                            '(default: es for Spanish)')
+    parser.add_argument('--translation-backend', choices=list(TRANSLATION_BACKENDS), default=DEFAULT_TRANSLATION_BACKEND,
+                       help=f'Backend for translated subtitles (default: {DEFAULT_TRANSLATION_BACKEND})')
+    parser.add_argument('--list-translation-backends', action='store_true',
+                       help='Show translation backends, their availability and limits, then exit')
+    parser.add_argument('--serve', action='store_true',
+                       help='Run a local HTTP server that keeps models loaded and transcribes submitted jobs')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address for --serve (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT,
+                       help=f'Port for --serve (default: {DEFAULT_SERVE_PORT})')
+    parser.add_argument('--serve-workers', type=int, default=1,
+                       help='With --serve: jobs transcribed at once (jobs using the same model still take turns)')
+    parser.add_argument('--serve-queue-size', type=int, default=DEFAULT_SERVE_QUEUE,
+                       help=f'With --serve: jobs that may wait before new ones are refused (default: {DEFAULT_SERVE_QUEUE})')
+    parser.add_argument('--serve-keep-jobs', type=int, default=DEFAULT_SERVE_KEEP_JOBS,
+                       help=f'With --serve: finished jobs kept before the oldest are deleted (default: {DEFAULT_SERVE_KEEP_JOBS})')
+    parser.add_argument('--serve-output-dir', action='append', metavar='DIR',
+                       help='With --serve: directory jobs may write output paths into (repeatable); '
+                            'by default outputs stay on the server and are fetched over HTTP')
+    parser.add_argument('--serve-token', type=str, default=os.getenv('WHISPER_SERVE_TOKEN'),
+                       help='Bearer token required by --serve and sent by --submit (default: WHISPER_SERVE_TOKEN); '
+                            'needed to listen on a --host other than localhost')
+    parser.add_argument('--submit', action='store_true',
+                       help='Send --input (or a batch) to a running --serve process instead of loading models here')
+    parser.add_argument('--server-url', type=str, default=f'http://127.0.0.1:{DEFAULT_SERVE_PORT}',
+                       help='Server for --submit (default: %(default)s)')
+    parser.add_argument('--no-wait', action='store_true', help='With --submit: print the job ids and exit')
     
     args = parser.parse_args()
     
+    if args.clear_cache:
+        return clear_caches_cli(args)
+    
+    if args.list_translation_backends:
+        return list_translation_backends_cli()
+    
+    if args.job_status:
+        if not args.job_db:
+            print("Error: --job-status needs --job-db")
+            return 1
+        return job_status_cli(args)
+    
+    if args.serve:
+        set_derived_cli_flags(args)
+        if args.serve_workers < 1 or args.serve_queue_size < 1 or args.serve_keep_jobs < 1:
+            print("Error: --serve-workers, --serve-queue-size and --serve-keep-jobs must be at least 1")
+            return 1
+        if not args.serve_token and not is_loopback_host(args.host):
+            print(f"Error: --host {args.host} accepts connections from other machines; set --serve-token "
+                  f"(or WHISPER_SERVE_TOKEN) to require a token")
+            return 1
+        return run_server_cli(args)
+    
+    if args.submit:
+        if not args.input and not is_batch_cli(args):
+            print("Error: --input (or --input-dir/--input-glob/--input-list) is required with --submit")
+            return 1
+        if args.input == '-':
+            print("Error: --submit sends file paths; stream stdin with --cli --input - instead")
+            return 1
+        set_derived_cli_flags(args)
+        defaults = parser.parse_args([])
+        set_derived_cli_flags(defaults)
+        return submit_cli(args, defaults)
+    
     if args.cli:
-        if not args.input:
-            print("Error: --input is required in CLI mode")
+        if not args.input and not is_batch_cli(args) and not args.job_db:
+            print("Error: --input (or --input-dir/--input-glob/--input-list) is required in CLI mode")
+            return 1
+        
+        if args.job_db and args.input == '-':
+            print("Error: --job-db runs files; it can't be used with --input -")
+            return 1
+        
+        if args.retry_failed and not args.job_db:
+            print("Error: --retry-failed needs --job-db")
+            return 1
+        
+        if args.max_attempts < 1 or args.job_timeout <= 0:
+            print("Error: --max-attempts must be at least 1 and --job-timeout positive")
+            return 1
+        
+        if args.chunk_minutes is not None and args.chunk_minutes * 60 < MIN_CHUNK_SECONDS:
+            print(f"Error: --chunk-minutes must be at least {MIN_CHUNK_SECONDS / 60:g}")
+            return 1
+        
+        if args.checkpoint and (args.chunk_minutes or args.input == '-'):
+            print("Error: --checkpoint can't be combined with --chunk-minutes or --input -")
+            return 1
+        
+        if args.checkpoint_minutes * 60 < MIN_CHUNK_SECONDS:
+            print(f"Error: --checkpoint-minutes must be at least {MIN_CHUNK_SECONDS / 60:g}")
+            return 1
+        
+        if args.input == '-' and args.stream_window < 2 * STREAM_TAIL_SECONDS:
+            print(f"Error: --stream-window must be at least {2 * STREAM_TAIL_SECONDS:g} seconds")
+            return 1
+        
+        if not parse_subtitle_languages(args.subtitle_language):
+            print("Error: --subtitle-language needs at least one language code")
             return 1
         
-        # Set boolean flags correctly
-        args.timestamps = not args.no_timestamps
-        args.word_timestamps = not args.no_word_timestamps
-        args.speaker_diarization = not args.no_speaker_diarization
+        set_derived_cli_flags(args)
         
         return run_cli(args)
     else:
         # GUI mode
+        import_tkinter()
         root = tk.Tk()
         app = WhisperGUI(root)
         root.mainloop()